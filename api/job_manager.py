@@ -7,6 +7,7 @@ from core.logging import JobLogger, LogStream
 from core.config import JOBS_DIR
 from workers.job import Job, JobConfig, JobStatus
 from workers.job_storage import JobStorage
+from core.job_control import PAUSE, RESUME
 from workers.worker_pool import WorkerPool
 
 class JobManager:
@@ -53,11 +54,15 @@ class JobManager:
         return job.status if job else JobStatus.FAILED
 
     def get_job_progress(self, job_id: str) -> float:
+        live = self.pool.get_progress(job_id)
+        if live is not None:
+            return live[0]
         job = self.get_job(job_id)
         return job.progress if job else 0.0
 
-    def get_job_results(self, job_id: str) -> List[dict]:
-        return JobStorage.get_results(job_id)
+    def get_job_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Results found so far; a running job's list grows as papers are parsed."""
+        return JobStorage.get_results(job_id, offset, limit)
 
     def get_log_file_path(self, job_id: str) -> str:
          return os.path.join(JOBS_DIR, job_id, "logs", "job.log")
@@ -79,10 +84,47 @@ class JobManager:
         if job.status in [JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED]:
             return False
             
-        # Update status to CANCELLED in storage
-        # The worker will pick this up in its next loop iteration
+        # A running worker stops as soon as the cancel signal reaches it
         job.status = JobStatus.CANCELLED
         JobStorage.save_job(job)
+        self.pool.cancel_job(job_id)
+        return True
+
+    def pause_job(self, job_id: str) -> bool:
+        """Hold a running job's requests until it is resumed. It keeps its worker."""
+        job = self.get_job(job_id)
+        if not job or job.status != JobStatus.RUNNING:
+            return False
+
+        job.status = JobStatus.PAUSED
+        JobStorage.save_job(job)
+        self.pool.signal_job(job_id, PAUSE)
+        return True
+
+    def resume_job(self, job_id: str) -> bool:
+        """
+        Let a paused job carry on, or re-queue a failed or cancelled job, or one
+        that completed with pages left (e.g. after Scholar kept blocking it).
+        A re-queued job continues from its last checkpoint.
+        """
+        job = self.get_job(job_id)
+        if job and job.status == JobStatus.PAUSED and self.pool.is_running(job_id):
+            job.status = JobStatus.RUNNING
+            JobStorage.save_job(job)
+            self.pool.signal_job(job_id, RESUME)
+            return True
+        # A paused job whose server went away is re-queued below
+        if not job or job.status in [JobStatus.PENDING, JobStatus.RUNNING]:
+            return False
+        if job.status == JobStatus.COMPLETED and JobStorage.load_checkpoint(job_id) is None:
+            return False
+
+        job.status = JobStatus.PENDING
+        job.error = None
+        job.completed_at = None
+        job.throttled_until = None
+        JobStorage.save_job(job)
+        self.pool.submit_job(job_id)
         return True
 
     def list_jobs(self, status: Optional[JobStatus] = None) -> List[Job]:
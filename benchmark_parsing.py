@@ -0,0 +1,110 @@
+"""
+Parse time per cached page: full html.parser tree (the old get_soup) against
+the configured parser restricted to each provider's parse targets.
+
+    python benchmark_parsing.py [--limit N] [--repeat N]
+"""
+import argparse
+import time
+from collections import defaultdict
+
+from bs4 import BeautifulSoup
+
+from core.config import HTML_PARSER
+from providers import ProviderRegistry, GoogleScholarProvider
+from providers import cache_index
+from providers.cache import get_html_cache_backend
+from providers.cache_index import get_cache_index
+
+
+def provider_classes():
+    classes = {cls.__name__: cls for cls in ProviderRegistry._providers.values()}
+    if ProviderRegistry._empty_provider:
+        classes.pop(ProviderRegistry._empty_provider.__name__, None)
+    return classes
+
+
+def timed(parse, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        soup = parse()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return soup, best
+
+
+def extract(provider, soup):
+    """What the provider reads from a page, to check the restricted tree loses nothing."""
+    if isinstance(provider, GoogleScholarProvider):
+        return [provider.parse_entry(entry)["title"] for entry in soup.find_all("div", class_="gs_r gs_or gs_scl")]
+    provider.soup = soup
+    try:
+        return provider.get_abstract()
+    except Exception as e:
+        return f"<error: {e}>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=0, help="pages per provider (0 = all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per page; the fastest is kept")
+    args = parser.parse_args()
+
+    classes = provider_classes()
+    backend = get_html_cache_backend()
+    stats = defaultdict(lambda: {"pages": 0, "bytes": 0, "before": 0.0, "after": 0.0, "mismatches": 0})
+
+    for entry in get_cache_index().list(cache_index.HTML):
+        cls = classes.get(entry.namespace)
+        if cls is None:
+            continue
+        row = stats[entry.namespace]
+        if args.limit and row["pages"] >= args.limit:
+            continue
+        try:
+            html = backend.load(entry.location)
+        except OSError:
+            continue
+
+        # Parsing needs no URL; pages from migrate_flat_cache or CacheIndex.rebuild have none
+        provider = cls(entry.url or entry.location)
+        full, before = timed(lambda: BeautifulSoup(html, "html.parser"), args.repeat)
+        restricted, after = timed(lambda: provider.get_soup(html), args.repeat)
+        # The full tree is the reference: the restricted one must yield the same
+        if extract(provider, restricted) != extract(provider, full):
+            row["mismatches"] += 1
+
+        row["pages"] += 1
+        row["bytes"] += len(html)
+        row["before"] += before
+        row["after"] += after
+
+    if not stats:
+        print("No cached provider pages found; run some searches first.")
+        return
+
+    print(f"Parser: html.parser (full tree) -> {HTML_PARSER} (restricted)\n")
+    header = f"{'Provider':<24}{'Pages':>7}{'Avg KB':>9}{'Before ms':>11}{'After ms':>10}{'Speedup':>9}{'Diffs':>7}"
+    print(header)
+    print("-" * len(header))
+    totals = {"pages": 0, "before": 0.0, "after": 0.0}
+    for name, row in sorted(stats.items()):
+        pages = row["pages"]
+        before_ms = row["before"] / pages * 1000
+        after_ms = row["after"] / pages * 1000
+        print(
+            f"{name:<24}{pages:>7}{row['bytes'] / pages / 1024:>9.1f}{before_ms:>11.2f}{after_ms:>10.2f}"
+            f"{before_ms / after_ms if after_ms else 0:>8.1f}x{row['mismatches']:>7}"
+        )
+        for key in totals:
+            totals[key] += row[key]
+    print("-" * len(header))
+    print(
+        f"{'All':<24}{totals['pages']:>7}{'':>9}{totals['before'] / totals['pages'] * 1000:>11.2f}"
+        f"{totals['after'] / totals['pages'] * 1000:>10.2f}{totals['before'] / totals['after']:>8.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
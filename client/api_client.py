@@ -54,12 +54,35 @@ class ApiClient:
         except requests.RequestException:
             return None
 
+    def get_job_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Results found so far, starting at offset. Running jobs return partial results."""
+        params = {"offset": offset}
+        if limit is not None:
+            params["limit"] = limit
+        resp = requests.get(self._url(f"/jobs/{job_id}/results"), params=params)
+        resp.raise_for_status()
+        return resp.json()
+
     def cancel_job(self, job_id: str) -> bool:
         resp = requests.post(self._url(f"/jobs/{job_id}/cancel"))
         if resp.status_code == 200:
             return resp.json().get("success", False)
         return False
 
+    def pause_job(self, job_id: str) -> bool:
+        """Hold a running job until resume_job() is called."""
+        resp = requests.post(self._url(f"/jobs/{job_id}/pause"))
+        if resp.status_code == 200:
+            return resp.json().get("success", False)
+        return False
+
+    def resume_job(self, job_id: str) -> bool:
+        """Continue a paused job, or a failed, cancelled or partially completed one from its last checkpoint."""
+        resp = requests.post(self._url(f"/jobs/{job_id}/resume"))
+        if resp.status_code == 200:
+            return resp.json().get("success", False)
+        return False
+
     # --- SLR Workflow ---
 
     def generate_questions(self, abstract: str, api_key: str, provider: str = "gemini") -> Dict:
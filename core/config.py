@@ -10,14 +10,129 @@ RESULTS_DIR = os.path.join(DATA_DIR, "results")
 DOWNLOAD_DIR = os.path.join(DATA_DIR, "pdfs")
 NOTES_DIR = os.path.join(DATA_DIR, "notes")
 JOBS_DIR = os.path.join(DATA_DIR, "jobs")
+PDF_STORE_DIR = os.path.join(DOWNLOAD_DIR, "objects")  # PDFs named by the SHA-256 of their content
+PDF_INCOMING_DIR = os.path.join(DOWNLOAD_DIR, "incoming")  # downloads in progress
 
 # Ensure directories exist
 for d in [DATA_DIR, SEARCH_DIR, RESULTS_DIR, DOWNLOAD_DIR, NOTES_DIR, JOBS_DIR]:
     os.makedirs(d, exist_ok=True)
 
 # Worker Settings
-MAX_WORKERS = 4
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", 4))
+# "thread": jobs run on threads of the server process; "process": each job runs
+# in a worker process (with its own browser pool) so parsing doesn't hold the API's GIL;
+# "async": jobs run as coroutines on one event loop, limited by ASYNC_MAX_JOBS
+WORKER_MODE = os.environ.get("WORKER_MODE", "thread")
+WORKER_MAX_JOBS_PER_PROCESS = int(os.environ.get("WORKER_MAX_JOBS_PER_PROCESS", 10))  # recycle a worker process after this many jobs
 DEFAULT_TIMEOUT = 300  # seconds
 
-# Job Settings
-JOB_POLL_INTERVAL = 1.0  # seconds
+# Job Queue Settings
+JOB_QUEUE_PATH = os.path.join(DATA_DIR, "job_queue.db")  # shared by every server process
+JOB_LEASE_TIMEOUT = int(os.environ.get("JOB_LEASE_TIMEOUT", 120))  # seconds without a heartbeat before a running job is reclaimed
+JOB_HEARTBEAT_INTERVAL = 30  # seconds between lease renewals
+JOB_POLL_INTERVAL = 1.0  # seconds between claim attempts of an idle worker
+JOB_MAX_ATTEMPTS = 3  # claims of one job before it is failed instead of retried
+JOB_CONTROL_POLL_INTERVAL = 0.25  # seconds between checks for cancel/pause signals sent from other processes
+
+# Async Runtime Settings (WORKER_MODE=async)
+ASYNC_MAX_JOBS = int(os.environ.get("ASYNC_MAX_JOBS", 200))  # jobs in flight at once
+ASYNC_IO_THREADS = int(os.environ.get("ASYNC_IO_THREADS", 32))  # threads for blocking fetch, enrichment and file calls
+ASYNC_PARSE_WORKERS = int(os.environ.get("ASYNC_PARSE_WORKERS", 2))  # threads parsing result pages off the loop
+
+# Browser Pool Settings
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", MAX_WORKERS))  # drivers per browser type
+BROWSER_MAX_PAGES = int(os.environ.get("BROWSER_MAX_PAGES", 50))  # recycle a driver after this many pages
+BROWSER_HEADLESS = os.environ.get("BROWSER_HEADLESS", "0") == "1"
+BROWSER_PAGE_LOAD_TIMEOUT = 60  # seconds
+
+# Abstract Enrichment Settings
+ENRICH_WORKERS = 10  # publisher pages fetched in parallel per SERP page
+ENRICH_TIMEOUT = 90  # seconds before an entry falls back to its snippet
+
+# Download Manager Settings
+DOWNLOAD_WORKERS = 4  # PDFs downloaded in parallel overall
+DOWNLOAD_PER_DOMAIN = 2  # parallel downloads from one domain
+DOWNLOAD_SEGMENTS = 4  # ranges fetched in parallel for a large file
+DOWNLOAD_SEGMENT_MIN_SIZE = 8 * 1024 ** 2  # bytes; smaller files are fetched in one stream
+DOWNLOAD_CHUNK_SIZE = 256 * 1024  # bytes read from the socket at a time
+DOWNLOAD_BUFFER_SIZE = 1024 ** 2  # bytes buffered before hitting the disk
+DOWNLOAD_MIN_PDF_BYTES = 1024  # anything smaller is an error page, not a paper
+BROWSER_DOWNLOAD_TIMEOUT = 120  # seconds to wait for a browser-driven download to finish
+
+# Search Pipeline Settings
+# Threads and input queue bound per stage. The fetch queue bounds how many
+# SERP pages are fetched ahead of enrichment.
+PIPELINE_STAGES = {
+    "fetch": {"workers": 1, "queue_size": 1},
+    "parse": {"workers": 1, "queue_size": 2},
+    "enrich": {"workers": ENRICH_WORKERS, "queue_size": 2 * ENRICH_WORKERS},
+    "persist": {"workers": 1, "queue_size": 2 * ENRICH_WORKERS},
+    "download": {"workers": DOWNLOAD_WORKERS, "queue_size": 20},
+}
+
+# Streaming Abstract Fetch Settings
+STREAM_ABSTRACTS = os.environ.get("STREAM_ABSTRACTS", "1") == "1"  # read publisher pages only up to the abstract
+STREAM_CHUNK_SIZE = 16 * 1024  # bytes parsed per step
+STREAM_MAX_BYTES = 2 * 1024 ** 2  # give up and fall back to the full-page fetch after this much
+STREAM_MIN_META_LENGTH = 200  # shorter description meta tags are usually truncated
+
+# HTTP Client Settings
+HTTP_CONNECT_TIMEOUT = 10  # seconds
+HTTP_READ_TIMEOUT = 30  # seconds
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5  # retry sleeps 0.5s, 1s, 2s, ...
+HTTP_POOL_HOSTS = 32  # hosts with a live connection pool
+HTTP_POOL_MAXSIZE = 10  # keep-alive connections per host
+
+# Tiered Fetch Settings
+FETCH_MIN_TEXT_LENGTH = 500  # visible characters below which a page is treated as a shell
+FETCH_TIER_TTL = 7 * 24 * 3600  # seconds before a remembered per-domain tier is re-probed
+
+# HTML Cache Settings
+HTML_CACHE_BACKEND = os.environ.get("HTML_CACHE_BACKEND", "sharded")  # "sharded" or legacy "flat"
+HTML_CACHE_COMPRESSION = os.environ.get("HTML_CACHE_COMPRESSION", "gzip")  # "zstd", "gzip" or "none"
+# "stale": expired pages with an ETag/Last-Modified are revalidated with a conditional
+# request instead of refetched; "always": revalidate on every read; "off": never
+HTML_CACHE_REVALIDATE = os.environ.get("HTML_CACHE_REVALIDATE", "stale")
+
+# Cache Expiry Settings
+SCHOLAR_CACHE_TTL = 3 * 24 * 3600  # seconds; Scholar result pages
+PUBLISHER_CACHE_TTL = 365 * 24 * 3600  # seconds; publisher abstract pages
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 5 * 1024 ** 3))  # across search, results and pdf dirs
+CACHE_COMPACTION_INTERVAL = 3600  # seconds between background compaction runs
+
+# Cache Index Settings
+CACHE_INDEX_PATH = os.path.join(DATA_DIR, "cache_index.db")
+# Cache hits update access times in batches rather than with a write per hit
+CACHE_TOUCH_INTERVAL = 30  # seconds between flushes of buffered access times
+CACHE_TOUCH_BATCH = 500  # buffered hits that force a flush
+
+# Negative Cache Settings
+NEGATIVE_CACHE_MAX_BACKOFF = 30 * 24 * 3600  # seconds; cap on retry-after for repeat failures
+
+# Rate Limit Settings (per domain, shared by all workers)
+RATE_LIMIT_DEFAULT = {"rate": 1.0, "burst": 3, "concurrency": 4, "jitter": 0.5}
+RATE_LIMITS = {
+    # Scholar blocks quickly: one request at a time, roughly every 10-15 seconds
+    "scholar.google.com": {"rate": 0.1, "burst": 1, "concurrency": 1, "jitter": 5.0},
+}
+BLOCK_BACKOFF_BASE = 60  # seconds a domain is paused after its first detected block
+BLOCK_BACKOFF_MAX = 3600  # seconds; cap for repeated blocks
+SCHOLAR_MAX_BLOCK_RETRIES = 5  # blocked attempts per result page before a job gives up paginating
+# Keep limiter state in SQLite so every process shares one budget per domain;
+# required with WORKER_MODE=process or several server processes, otherwise each has its own limits
+RATE_LIMIT_SHARED = os.environ.get("RATE_LIMIT_SHARED", "1" if WORKER_MODE == "process" else "0") == "1"
+RATE_LIMIT_DB_PATH = os.path.join(DATA_DIR, "rate_limits.db")
+RATE_LIMIT_SLOT_TIMEOUT = 60  # seconds without renewal before a request slot of a crashed process is freed
+RATE_LIMIT_SLOT_RENEW_INTERVAL = 20  # seconds between renewals of the slots a process holds
+RATE_LIMIT_SLOT_POLL = 0.05  # seconds before the first retry to take a shared request slot; doubles per retry
+RATE_LIMIT_SLOT_POLL_MAX = 1.0  # seconds; cap for the retry interval
+
+# HTML Parser Settings
+try:
+    import lxml  # noqa: F401
+    _DEFAULT_PARSER = "lxml"
+except ImportError:
+    _DEFAULT_PARSER = "html.parser"
+HTML_PARSER = os.environ.get("HTML_PARSER", _DEFAULT_PARSER)
+PARSE_RESTRICTED = os.environ.get("PARSE_RESTRICTED", "1") == "1"  # parse only each provider's parse_targets
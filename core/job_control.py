@@ -0,0 +1,185 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# Signals
+CANCEL = "cancel"
+PAUSE = "pause"
+RESUME = "resume"
+SIGNALS = (CANCEL, PAUSE, RESUME)
+
+
+class JobCancelled(Exception):
+    """Raised by work that was interrupted because its job was cancelled."""
+
+
+class JobControl:
+    """
+    Cancel and pause signals of one job. Checking them is an Event lookup, cheap
+    enough for tight loops; callbacks registered with on_cancel() (e.g. quitting
+    the browser a fetch is waiting on) run as soon as the job is cancelled.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._cancelled = threading.Event()
+        # Cleared while paused
+        self._running = threading.Event()
+        self._running.set()
+        self._callbacks: List[Callable[[], None]] = []
+        self._listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        # Job queue lease the job runs under, if it was claimed from the queue
+        self.owner: Optional[str] = None
+        self._abandoned = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    @property
+    def abandoned(self) -> bool:
+        """Stopped because another worker took the job over; its state is no longer ours to write."""
+        return self._abandoned
+
+    def abandon(self):
+        self._abandoned = True
+        self.cancel()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks = list(self._callbacks)
+        # Paused work wakes up and sees the cancel
+        self._running.set()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed for job {self.job_id}: {e}")
+        self._notify(CANCEL)
+
+    def pause(self):
+        with self._lock:
+            if self.cancelled or self.paused:
+                return
+            self._running.clear()
+        self._notify(PAUSE)
+
+    def resume(self):
+        with self._lock:
+            if self.cancelled or not self.paused:
+                return
+            self._running.set()
+        self._notify(RESUME)
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """Call listener(signal) whenever the job is cancelled, paused or resumed."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, signal: str):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(signal)
+            except Exception as e:
+                print(f"Job control listener failed for job {self.job_id}: {e}")
+
+    def wait_if_paused(self) -> bool:
+        """Block while the job is paused. Returns False if it was cancelled."""
+        self._running.wait()
+        return not self.cancelled
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep unless cancelled first. Returns False if cancelled."""
+        return not self._cancelled.wait(seconds)
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]) -> Iterator[None]:
+        """Run callback if the job is cancelled while inside the block."""
+        with self._lock:
+            self._callbacks.append(callback)
+            cancelled = self._cancelled.is_set()
+        if cancelled:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
+
+    @contextmanager
+    def bind(self) -> Iterator["JobControl"]:
+        """Make this the current thread's job control, for code that can't be passed it."""
+        previous = getattr(_current, "control", None)
+        _current.control = self
+        try:
+            yield self
+        finally:
+            _current.control = previous
+
+
+_current = threading.local()
+
+
+def current_control() -> Optional[JobControl]:
+    """The control bound to the calling thread, if it is working for a job."""
+    return getattr(_current, "control", None)
+
+
+class JobControlRegistry:
+    """Controls of the jobs running in this process, by job id."""
+
+    def __init__(self):
+        self._controls: Dict[str, JobControl] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> JobControl:
+        with self._lock:
+            if job_id not in self._controls:
+                self._controls[job_id] = JobControl(job_id)
+            return self._controls[job_id]
+
+    def find(self, job_id: str) -> Optional[JobControl]:
+        with self._lock:
+            return self._controls.get(job_id)
+
+    def remove(self, job_id: str):
+        with self._lock:
+            self._controls.pop(job_id, None)
+
+    def job_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._controls)
+
+    def signal(self, job_id: str, signal: str) -> bool:
+        """Apply CANCEL, PAUSE or RESUME to a job running in this process. False if it isn't."""
+        if signal not in SIGNALS:
+            raise ValueError(f"Unknown job signal: {signal}")
+        control = self.find(job_id)
+        if control is None:
+            return False
+        getattr(control, signal)()
+        return True
+
+
+_job_controls: Optional[JobControlRegistry] = None
+_job_controls_lock = threading.Lock()
+
+
+def get_job_controls() -> JobControlRegistry:
+    """Return the process-wide job control registry."""
+    global _job_controls
+    with _job_controls_lock:
+        if _job_controls is None:
+            _job_controls = JobControlRegistry()
+        return _job_controls
@@ -0,0 +1,307 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Marks the end of a stage's input
+_DONE = object()
+# How often blocked workers look up to see whether the pipeline was stopped
+TICK = 0.2  # seconds
+STOP_CHECK_INTERVAL = 1.0  # seconds between stop_check() calls while waiting for output
+
+
+class Stage:
+    """
+    One step of a Pipeline. `func` takes an item and returns an iterable of
+    items for the next stage (empty to drop it), run by `workers` threads
+    reading a queue bounded to `queue_size` items.
+    """
+
+    def __init__(self, name: str, func: Callable[[object], Iterable], workers: int = 1, queue_size: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(workers, 1)
+        self.input: queue.Queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._lock = threading.Lock()
+        self._running = self.workers
+        self.busy = 0
+        self.processed = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def _record(self, elapsed: float, failed: bool):
+        with self._lock:
+            self.busy -= 1
+            self.processed += 1
+            self.errors += failed
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "busy": self.busy,
+                "queue_depth": self.input.qsize(),
+                "queue_size": self.input.maxsize,
+                "processed": self.processed,
+                "errors": self.errors,
+                "avg_latency": self.total_time / self.processed if self.processed else 0.0,
+                "max_latency": self.max_time,
+            }
+
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues, so a slow stage holds back the
+    ones before it instead of letting work pile up. Items come out of run() in
+    completion order.
+    """
+    _running: Dict[str, "Pipeline"] = {}
+    _running_lock = threading.Lock()
+
+    def __init__(self, name: str, stages: List[Stage],
+                 on_error: Callable[[Stage, object, Exception], None] = None,
+                 output_size: int = 1):
+        self.name = name
+        self.stages = stages
+        self.on_error = on_error
+        self.output: queue.Queue = queue.Queue(maxsize=max(output_size, 1))
+        self._stopped = threading.Event()
+        self._source_closed = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.started_at: Optional[float] = None
+
+    @property
+    def source_closed(self) -> bool:
+        return self._source_closed.is_set() or self._stopped.is_set()
+
+    def close_source(self):
+        """Take no further input; items already inside still run to the end."""
+        self._source_closed.set()
+
+    def stop(self):
+        """Abandon everything in flight."""
+        self._stopped.set()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=TICK)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _next_queue(self, index: int) -> queue.Queue:
+        return self.stages[index + 1].input if index + 1 < len(self.stages) else self.output
+
+    def _feed(self, source: Iterable):
+        try:
+            for item in source:
+                if self.source_closed or not self._put(self.stages[0].input, item):
+                    break
+        finally:
+            self._put(self.stages[0].input, _DONE)
+
+    def _work(self, index: int):
+        stage = self.stages[index]
+        out = self._next_queue(index)
+        while not self._stopped.is_set():
+            try:
+                item = stage.input.get(timeout=TICK)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                # Pass the marker on to this stage's other workers
+                stage.input.put(_DONE)
+                break
+
+            with stage._lock:
+                stage.busy += 1
+            started = time.monotonic()
+            failed = False
+            try:
+                results = list(stage.func(item) or ())
+            except Exception as e:
+                failed = True
+                results = []
+                if self.on_error:
+                    self.on_error(stage, item, e)
+            stage._record(time.monotonic() - started, failed)
+
+            for result in results:
+                if not self._put(out, result):
+                    return
+
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last:
+            self._put(out, _DONE)
+
+    def run(self, source: Iterable, stop_check: Callable[[], bool] = None) -> Iterator:
+        """Push the source through all stages, yielding what comes out of the last one."""
+        self.started_at = time.time()
+        self._threads = [threading.Thread(target=self._feed, args=(source,), name=f"{self.name}-feed", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            self._threads += [
+                threading.Thread(target=self._work, args=(index,), name=f"{self.name}-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            ]
+        with Pipeline._running_lock:
+            Pipeline._running[self.name] = self
+        for thread in self._threads:
+            thread.start()
+
+        last_check = 0.0
+        try:
+            while not self._stopped.is_set():
+                if stop_check and time.monotonic() - last_check >= STOP_CHECK_INTERVAL:
+                    if stop_check():
+                        break
+                    last_check = time.monotonic()
+                try:
+                    item = self.output.get(timeout=TICK)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            # Workers stuck in a long call notice on their next queue operation
+            self.stop()
+            with Pipeline._running_lock:
+                Pipeline._running.pop(self.name, None)
+
+    def metrics(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "source_closed": self.source_closed,
+            "stages": {stage.name: stage.metrics() for stage in self.stages},
+        }
+
+    @classmethod
+    def running(cls) -> Dict[str, dict]:
+        """Metrics of every pipeline currently running in this process."""
+        with cls._running_lock:
+            pipelines = list(cls._running.values())
+        return {pipeline.name: pipeline.metrics() for pipeline in pipelines}
+
+
+class AsyncPipeline(Pipeline):
+    """
+    Pipeline whose stage workers are coroutines on an asyncio loop. Stage
+    functions stay blocking; `call(stage, item)` runs one off the loop (by
+    default in the loop's executor), so a stage worker waiting on I/O holds no
+    thread and many pipelines can share one loop.
+    """
+
+    def __init__(self, name: str, stages: List[Stage],
+                 on_error: Callable[[Stage, object, Exception], None] = None,
+                 output_size: int = 1,
+                 call: Callable[[Stage, object], Awaitable[Iterable]] = None):
+        super().__init__(name, stages, on_error, output_size)
+        self.call = call or self._call_in_executor
+        self._tasks: List[asyncio.Task] = []
+
+    @staticmethod
+    async def _call_in_executor(stage: Stage, item) -> Iterable:
+        return await asyncio.get_running_loop().run_in_executor(None, stage.func, item)
+
+    async def _put(self, q: asyncio.Queue, item) -> bool:
+        # stop() may come from a stage function on another thread, so poll
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(q.put(item), TICK)
+                return True
+            except asyncio.TimeoutError:
+                continue
+        return False
+
+    async def _get(self, q: asyncio.Queue):
+        while not self._stopped.is_set():
+            try:
+                return await asyncio.wait_for(q.get(), TICK)
+            except asyncio.TimeoutError:
+                continue
+        return _DONE
+
+    async def _feed(self, source: Iterable):
+        try:
+            for item in source:
+                if self.source_closed or not await self._put(self.stages[0].input, item):
+                    break
+        finally:
+            await self._put(self.stages[0].input, _DONE)
+
+    async def _work(self, index: int):
+        stage = self.stages[index]
+        out = self._next_queue(index)
+        while not self._stopped.is_set():
+            item = await self._get(stage.input)
+            if item is _DONE:
+                if not self._stopped.is_set():
+                    await stage.input.put(_DONE)
+                break
+
+            with stage._lock:
+                stage.busy += 1
+            started = time.monotonic()
+            failed = False
+            try:
+                results = list(await self.call(stage, item) or ())
+            except Exception as e:
+                failed = True
+                results = []
+                if self.on_error:
+                    self.on_error(stage, item, e)
+            stage._record(time.monotonic() - started, failed)
+
+            for result in results:
+                if not await self._put(out, result):
+                    return
+
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last:
+            await self._put(out, _DONE)
+
+    async def run(self, source: Iterable, stop_check: Callable[[], bool] = None) -> AsyncIterator:
+        """Push the source through all stages, yielding what comes out of the last one."""
+        self.started_at = time.time()
+        # Queues belong to the running loop
+        for stage in self.stages:
+            stage.input = asyncio.Queue(maxsize=stage.input.maxsize)
+        self.output = asyncio.Queue(maxsize=self.output.maxsize)
+        self._tasks = [asyncio.create_task(self._feed(source))]
+        for index, stage in enumerate(self.stages):
+            self._tasks += [asyncio.create_task(self._work(index)) for _ in range(stage.workers)]
+        with Pipeline._running_lock:
+            Pipeline._running[self.name] = self
+
+        last_check = 0.0
+        try:
+            while not self._stopped.is_set():
+                if stop_check and time.monotonic() - last_check >= STOP_CHECK_INTERVAL:
+                    if stop_check():
+                        break
+                    last_check = time.monotonic()
+                try:
+                    item = await asyncio.wait_for(self.output.get(), TICK)
+                except asyncio.TimeoutError:
+                    continue
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self.stop()
+            # Calls already running in a thread finish there; their results are dropped
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            with Pipeline._running_lock:
+                Pipeline._running.pop(self.name, None)
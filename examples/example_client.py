@@ -59,7 +59,8 @@ def main():
                     JobStatus.RUNNING: "🔄",
                     JobStatus.COMPLETED: "✅",
                     JobStatus.FAILED: "❌",
-                    JobStatus.CANCELLED: "🚫"
+                    JobStatus.CANCELLED: "🚫",
+                    JobStatus.PAUSED: "⏸️"
                 }.get(job.status, "?")
                 
                 print(f"[{status_symbol}] Job {job_id[:8]}... | Status: {job.status.value:<10} | Progress: {job.progress*100:5.1f}% | Results: {job.total_results}")
@@ -1,30 +1,91 @@
+import asyncio
 import os
 import json
 import hashlib
-from typing import List, Callable, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Dict, Iterator, List, Callable, Optional, Tuple
 from string import Template
 
-from core.config import RESULTS_DIR, DOWNLOAD_DIR
+from core.config import (
+    RESULTS_DIR, DOWNLOAD_DIR, SCHOLAR_MAX_BLOCK_RETRIES, PIPELINE_STAGES, ENRICH_WORKERS, ENRICH_TIMEOUT,
+    MAX_WORKERS,
+)
+from core.job_control import JobCancelled, JobControl, current_control
 from core.logging import JobLogger
+from core.pipeline import TICK, AsyncPipeline, Pipeline, Stage
 from workers.job import JobConfig
 
 from providers import GoogleScholarProvider, ProviderRegistry, DefaultEncoder
 from providers.provider import Provider
+from providers.cache_index import get_cache_index, RESULT
+from providers.fetcher import BlockedPageError
+from providers.rate_limiter import RateLimiter
 
-class SearchEngine:
-    def __init__(self):
-        pass
 
-    def search(self, query: str, config: JobConfig, 
-               progress_callback: Callable[[float, int], None] = None,
-               stop_check: Callable[[], bool] = None,
-               logger: JobLogger = None) -> List[dict]:
-        """
-        Execute a search query and return results.
-        params:
-            progress_callback: function(progress: float, count: int)
-            stop_check: function() -> bool. If returns True, stop search.
-        """
+class ScholarThrottledError(Exception):
+    pass
+
+
+RunBlocking = Callable[..., Awaitable]
+
+_enricher: Optional[ThreadPoolExecutor] = None
+_enricher_lock = threading.Lock()
+
+
+def get_enricher() -> ThreadPoolExecutor:
+    """
+    Process-wide threads running enrichment for the threaded pipeline, so a
+    stage worker can stop waiting at ENRICH_TIMEOUT. Room for every job's
+    stage workers plus as many stragglers.
+    """
+    global _enricher
+    with _enricher_lock:
+        if _enricher is None:
+            _enricher = ThreadPoolExecutor(max_workers=2 * ENRICH_WORKERS * MAX_WORKERS, thread_name_prefix="enrich")
+        return _enricher
+
+
+class SearchRun:
+    """
+    One execution of a search: the SERP URLs, the stage functions and progress
+    bookkeeping, shared by the threaded and the asyncio pipeline. Stage
+    functions are blocking; SERP fetch -> entry parse -> publisher enrichment ->
+    persistence -> PDF download, so page N+1 is fetched while the entries of
+    page N are being enriched.
+
+    Pages move through the stages as (page, papers-or-None) and their entries
+    as (page, seq, paper). A checkpoint records which pages have all their
+    papers emitted (or lost to a stage error) and the parsed papers not yet
+    emitted, so a resumed run skips finished pages and enriches the leftovers
+    without refetching.
+
+    The job's control stops the pipeline the moment the job is cancelled and
+    holds the fetch, enrich and download calls while it is paused.
+    """
+
+    def __init__(self, engine: "SearchEngine", query: str, config: JobConfig,
+                 progress_callback: Callable[[float, int], None] = None,
+                 stop_check: Callable[[], bool] = None,
+                 logger: JobLogger = None,
+                 throttle_callback: Callable[[Optional[datetime]], None] = None,
+                 checkpoint: Optional[dict] = None,
+                 checkpoint_callback: Callable[[Optional[dict]], None] = None,
+                 control: Optional[JobControl] = None):
+        self.engine = engine
+        self.config = config
+        self.progress_callback = progress_callback
+        self.stop_check = stop_check
+        self.logger = logger
+        self.throttle_callback = throttle_callback
+        self.checkpoint_callback = checkpoint_callback
+        self.name = f"search-{logger.job_id}" if logger else f"search-{uuid.uuid4()}"
+        self.pipeline: Optional[Pipeline] = None
+        self.control = control or JobControl(self.name)
+
         if logger:
             logger.info(f"Starting search for: {query}")
 
@@ -38,59 +99,374 @@ class SearchEngine:
 
         query_formatted = full_query.replace(" ", "+")
         base_url = "https://scholar.google.com/scholar?start=$index&q=$query&hl=en&as_sdt=0,5&as_ylo=$since_year&as_vis=1"
-        
-        all_papers = []
-        total_steps = (config.max_results - config.start) // config.step
-        # avoid division by zero
-        if total_steps < 1: total_steps = 1
-        
-        current_step = 0
-        
-        for i in range(config.start, config.max_results, config.step):
-            # Check for cancellation
-            if stop_check and stop_check():
-                if logger:
-                    logger.info("Search cancelled by user.")
-                break
 
-            url = Template(base_url).substitute(
-                index=i, 
-                query=query_formatted, 
-                since_year=config.since_year
+        self.starts = list(range(config.start, config.max_results, config.step))
+        self.urls = [
+            Template(base_url).substitute(index=i, query=query_formatted, since_year=config.since_year)
+            for i in self.starts
+        ]
+        self.total_steps = max(len(self.urls), 1)
+        self._lock = threading.Lock()
+
+        checkpoint = checkpoint or {}
+        # Pages whose papers have all been emitted
+        self.completed = set(checkpoint.get("completed_pages", []))
+        # Parsed papers not emitted yet, by page and position on the page
+        self.pending: Dict[int, Dict[int, dict]] = {
+            int(page): dict(enumerate(papers)) for page, papers in checkpoint.get("pending", {}).items()
+        }
+        self.count = checkpoint.get("emitted", 0)
+        # Papers dropped by a failing stage after parsing; their pages still complete
+        self.failed = checkpoint.get("failed", 0)
+        self.pages_parsed = len(self.completed) + len(self.pending)
+        self._reported_pages = self.pages_parsed
+        if checkpoint and logger:
+            logger.info(
+                f"Resuming from checkpoint: {len(self.completed)} pages done, {self.count} papers saved, "
+                f"{sum(len(p) for p in self.pending.values())} papers to enrich"
             )
-            
+
+    def source(self) -> List[Tuple[int, Optional[List[dict]]]]:
+        """Leftover papers of parsed pages first, then the pages still to fetch."""
+        items = [(page, list(papers.values())) for page, papers in sorted(self.pending.items())]
+        # parse() registers them again
+        self.pending = {}
+        self.pages_parsed -= len(items)
+        started = self.completed | {page for page, _ in items}
+        return items + [(page, None) for page in range(len(self.urls)) if page not in started]
+
+    def stages(self, enrich_deadline: bool = True) -> List[Stage]:
+        """
+        Stage functions of the run. With enrich_deadline the enrich stage gives
+        up on an entry after ENRICH_TIMEOUT itself; the async pipeline leaves
+        that to the event loop instead.
+        """
+        enrich = self.enrich_with_deadline if enrich_deadline else self.enrich
+        stage_funcs = [("fetch", self._controlled(self.fetch)), ("parse", self.parse),
+                       ("enrich", self._controlled(enrich)), ("persist", self.persist)]
+        if self.config.download_pdfs:
+            stage_funcs.append(("download", self._controlled(self.download)))
+        return [Stage(name, func, **PIPELINE_STAGES[name]) for name, func in stage_funcs]
+
+    def _controlled(self, func):
+        """
+        Wrap a stage function that makes requests: it waits while the job is
+        paused, and code below it (the browser pool, the fetcher) finds the
+        job's control through current_control().
+        """
+        def call(item):
+            if not self.control.wait_if_paused():
+                return []
+            with self.control.bind():
+                return func(item)
+        return call
+
+    def cancelled(self) -> bool:
+        return self.control.cancelled or bool(self.stop_check and self.stop_check())
+
+    def item_url(self, stage_name: str, item) -> Optional[str]:
+        """The URL a stage's call for this item will request, if any."""
+        if stage_name == "fetch":
+            page, papers = item
+            return self.urls[page] if papers is None else None
+        if stage_name == "enrich":
+            return item[2].get("url")
+        if stage_name == "download":
+            return item[2].get("download_url")
+        return None
+
+    def fetch(self, item):
+        page, papers = item
+        if papers is not None:
+            # Parsed before the checkpoint
+            return [item]
+        logger = self.logger
+        if self.cancelled():
+            self.pipeline.stop()
+            return []
+        if self.pipeline.source_closed:
+            return []
+        url = self.urls[page]
+        if logger:
+            logger.info(f"Fetching page {page + 1}/{self.total_steps}: {url}")
+        try:
+            provider = self.engine._fetch_page(url, self.stop_check, self.throttle_callback, logger)
+        except JobCancelled:
+            # The browser was quit under the fetch
+            self.pipeline.stop()
+            return []
+        except ScholarThrottledError as e:
+            # Further pages would only hit the same block; finish the ones in flight
             if logger:
-                logger.info(f"Fetching page {current_step+1}/{total_steps}: {url}")
-            
+                logger.error(f"{e}. Stopping with the results found so far.")
+            self.pipeline.close_source()
+            return []
+        if provider is None:
+            self.pipeline.stop()
+            return []
+        return [(page, provider)]
+
+    def parse(self, item):
+        page, content = item
+        papers = content if isinstance(content, list) else content.parse_entries(self.logger)
+        with self._lock:
+            self.pages_parsed += 1
+            if papers:
+                self.pending[page] = dict(enumerate(papers))
+            else:
+                self.completed.add(page)
+            self._save_checkpoint()
+        return [(page, seq, paper) for seq, paper in enumerate(papers)]
+
+    def enrich(self, item):
+        page, seq, paper = item
+        try:
+            return [(page, seq, GoogleScholarProvider.enrich(paper))]
+        except JobCancelled:
+            return []
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Enrichment failed for {paper['url']}, keeping snippet: {e}")
+            return [item]
+
+    def enrich_with_deadline(self, item):
+        """enrich() on the shared enricher threads, falling back to the snippet after ENRICH_TIMEOUT."""
+        future = get_enricher().submit(self._enrich_bound, item)
+        deadline = time.monotonic() + ENRICH_TIMEOUT
+        while True:
+            try:
+                return future.result(timeout=min(TICK, max(deadline - time.monotonic(), 0)))
+            except FuturesTimeout:
+                if self.cancelled():
+                    return []
+                if time.monotonic() >= deadline:
+                    return self.enrich_timed_out(item)
+
+    def _enrich_bound(self, item):
+        with self.control.bind():
+            return self.enrich(item)
+
+    def enrich_timed_out(self, item):
+        """Keep the snippet of an entry whose enrichment missed ENRICH_TIMEOUT; it still fills the cache when done."""
+        if self.logger:
+            self.logger.warning(f"Enrichment timed out after {ENRICH_TIMEOUT}s, keeping snippet: {item[2]['title']}")
+        return [item]
+
+    def persist(self, item):
+        paper = item[2]
+        # Save individual result (compatibility with old logic)
+        self.engine._save_result(paper)
+        if self.logger:
+            self.logger.info(f"Found: {paper['title']}")
+        return [item]
+
+    def download(self, item):
+        paper = item[2]
+        if paper.get("download_url"):
+            self.engine._handle_download(paper, self.logger)
+        return [item]
+
+    def on_error(self, stage, item, error):
+        if self.logger:
+            self.logger.error(f"Error in {stage.name} stage: {error}")
+        if stage.name in ("enrich", "persist", "download"):
+            # The paper is lost to this run; settle it so its page can complete
+            with self._lock:
+                self.failed += 1
+                self._settle(item)
+
+    def found(self, item) -> dict:
+        """Update progress for an item that came out of the pipeline; returns its paper."""
+        if self.progress_callback and self.pages_parsed != self._reported_pages:
+            self._reported_pages = self.pages_parsed
+            self.progress_callback(self._reported_pages / self.total_steps, self.count + 1)
+        return item[2]
+
+    def emitted(self, item):
+        """The consumer has stored the item's paper; a page is done once all of its papers are."""
+        with self._lock:
+            self.count += 1
+            self._settle(item)
+
+    def _settle(self, item):
+        """Take an emitted or failed paper off its page; call with the lock held."""
+        page, seq, _ = item
+        papers = self.pending.get(page)
+        if papers is not None:
+            papers.pop(seq, None)
+            if not papers:
+                del self.pending[page]
+                self.completed.add(page)
+                self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_callback:
+            return
+        completed = sorted(self.completed)
+        self.checkpoint_callback({
+            "completed_pages": completed,
+            "last_completed_index": self.starts[completed[-1]] if completed else None,
+            "emitted": self.count,
+            "failed": self.failed,
+            "pending": {str(page): list(papers.values()) for page, papers in self.pending.items()},
+            "updated_at": datetime.now().isoformat(),
+        })
+
+    def finish(self):
+        if self.progress_callback:
+            self.progress_callback(self.pages_parsed / self.total_steps, self.count)
+        if self.checkpoint_callback and len(self.completed) == len(self.urls):
+            # Nothing left to resume
+            self.checkpoint_callback(None)
+        logger = self.logger
+        if logger:
+            if self.cancelled():
+                logger.info("Search cancelled by user.")
+            for stage_name, m in self.pipeline.metrics()["stages"].items():
+                logger.info(
+                    f"Stage {stage_name}: {m['processed']} items, {m['errors']} errors, "
+                    f"avg {m['avg_latency']:.2f}s, max {m['max_latency']:.2f}s"
+                )
+            if self.failed:
+                logger.warning(f"{self.failed} papers were lost to stage errors.")
+            logger.info(f"Search completed. Found {self.count} papers.")
+
+
+class SearchEngine:
+    def __init__(self):
+        pass
+
+    def search(self, query: str, config: JobConfig, 
+               progress_callback: Callable[[float, int], None] = None,
+               stop_check: Callable[[], bool] = None,
+               logger: JobLogger = None,
+               throttle_callback: Callable[[Optional[datetime]], None] = None) -> List[dict]:
+        """Execute a search query and return all results. See iter_search for the params."""
+        return list(self.iter_search(query, config, progress_callback, stop_check, logger, throttle_callback))
+
+    def iter_search(self, query: str, config: JobConfig,
+                    progress_callback: Callable[[float, int], None] = None,
+                    stop_check: Callable[[], bool] = None,
+                    logger: JobLogger = None,
+                    throttle_callback: Callable[[Optional[datetime]], None] = None,
+                    checkpoint: Optional[dict] = None,
+                    checkpoint_callback: Callable[[Optional[dict]], None] = None,
+                    control: Optional[JobControl] = None) -> Iterator[dict]:
+        """
+        Execute a search query, yielding each paper as soon as it is enriched and saved.
+        Stage concurrency and queue bounds come from PIPELINE_STAGES.
+        params:
+            progress_callback: function(progress: float, count: int)
+            stop_check: function() -> bool. If returns True, stop search.
+            throttle_callback: function(until: Optional[datetime]). Called with the
+                resume time while Scholar is blocking us, and with None once it lets us through.
+            checkpoint: state saved by an earlier, interrupted run of the same search to continue from.
+            checkpoint_callback: function(state: Optional[dict]). Called after every
+                SERP page with the state to save, and with None once no page is left.
+                The state counts a paper as emitted once the consumer has taken the
+                next one (or finished), so store each paper before asking for more.
+            control: JobControl of the job. Cancelling it stops the search at once,
+                aborting in-flight browser fetches; pausing it holds the requests.
+        """
+        run = SearchRun(self, query, config, progress_callback, stop_check, logger, throttle_callback,
+                        checkpoint, checkpoint_callback, control)
+        run.pipeline = Pipeline(run.name, run.stages(), on_error=run.on_error)
+        with run.control.on_cancel(run.pipeline.stop):
+            for item in run.pipeline.run(run.source(), stop_check):
+                yield run.found(item)
+                run.emitted(item)
+        run.finish()
+
+    async def aiter_search(self, query: str, config: JobConfig,
+                           progress_callback: Callable[[float, int], None] = None,
+                           stop_check: Callable[[], bool] = None,
+                           logger: JobLogger = None,
+                           throttle_callback: Callable[[Optional[datetime]], None] = None,
+                           run_blocking: RunBlocking = None,
+                           checkpoint: Optional[dict] = None,
+                           checkpoint_callback: Callable[[Optional[dict]], None] = None,
+                           control: Optional[JobControl] = None) -> AsyncIterator[dict]:
+        """
+        iter_search for an asyncio loop: the same stages, with coroutine workers.
+        `run_blocking(func, item, url=..., cpu=...)` runs each blocking stage call;
+        `url` is the domain the call talks to and `cpu` marks parsing. The
+        progress and checkpoint callbacks are run through it as well. By
+        default calls go to the loop's executor.
+        """
+        run = SearchRun(self, query, config, progress_callback, stop_check, logger, throttle_callback,
+                        checkpoint, checkpoint_callback, control)
+
+        def blocking(func, *args, **kwargs):
+            if run_blocking is None:
+                return asyncio.get_running_loop().run_in_executor(None, func, *args)
+            return run_blocking(func, *args, **kwargs)
+
+        async def call(stage, item):
+            # Paused jobs wait here rather than holding a thread
+            while run.control.paused:
+                await asyncio.sleep(TICK)
+            pending = blocking(stage.func, item, url=run.item_url(stage.name, item), cpu=stage.name == "parse")
+            if stage.name != "enrich":
+                return await pending
+            # A late entry keeps its thread and domain slot until it finishes, but the job moves on
+            task = asyncio.ensure_future(pending)
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), ENRICH_TIMEOUT)
+            except asyncio.TimeoutError:
+                return run.enrich_timed_out(item)
+
+        run.pipeline = AsyncPipeline(run.name, run.stages(enrich_deadline=False), on_error=run.on_error, call=call)
+        with run.control.on_cancel(run.pipeline.stop):
+            # The progress and checkpoint callbacks write files, so they run off the loop too
+            async for item in run.pipeline.run(run.source(), stop_check):
+                yield await blocking(run.found, item)
+                await blocking(run.emitted, item)
+        await blocking(run.finish)
+
+    def _fetch_page(self, url: str, stop_check, throttle_callback, logger) -> Optional[GoogleScholarProvider]:
+        """
+        Fetch one result page, waiting out Scholar blocks.
+        Returns None if the job was cancelled while throttled.
+        """
+        limiter = RateLimiter()
+        throttled = False
+        blocks = 0
+        while True:
             try:
-                # Use GoogleScholarProvider to fetch search results
                 provider = GoogleScholarProvider(url, cache=True)
-                papers = provider.get_all_papers(logger=logger)
-                
-                for paper in papers:
-                    # Save individual result (compatibility with old logic)
-                    self._save_result(paper)
-                    
-                    # Store in list
-                    all_papers.append(paper)
-                    
-                    # Download PDF if requested
-                    if config.download_pdfs and paper.get("download_url"):
-                        self._handle_download(paper, logger)
-
-                # Update progress
-                current_step += 1
-                if progress_callback:
-                    progress_callback(current_step / total_steps, len(all_papers))
-                    
-            except Exception as e:
+                provider.load()
+                if throttled and throttle_callback:
+                    throttle_callback(None)
+                return provider
+            except BlockedPageError as e:
+                blocks += 1
+                if blocks > SCHOLAR_MAX_BLOCK_RETRIES:
+                    if throttled and throttle_callback:
+                        throttle_callback(None)
+                    raise ScholarThrottledError(f"Scholar still blocking after {blocks} attempts") from e
+
+                wait = limiter.paused_for(url)
+                throttled = True
                 if logger:
-                    logger.error(f"Error processing batch starting at {i}: {e}")
-        
-        if logger:
-            logger.info(f"Search completed. Found {len(all_papers)} papers.")
-            
-        return all_papers
+                    logger.warning(f"Scholar is throttling us ({e.reason}), retrying in {wait:.0f}s")
+                if throttle_callback:
+                    throttle_callback(datetime.now() + timedelta(seconds=wait))
+                if not self._sleep(wait, stop_check):
+                    return None
+
+    @staticmethod
+    def _sleep(seconds: float, stop_check) -> bool:
+        """Sleep in short ticks so cancellation is noticed. Returns False if stopped."""
+        control = current_control()
+        if control is not None:
+            # Wakes up the moment the job is cancelled
+            return control.sleep(seconds) and not (stop_check and stop_check())
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if stop_check and stop_check():
+                return False
+            time.sleep(min(1.0, max(deadline - time.monotonic(), 0)))
+        return True
 
     def _save_result(self, res: dict):
         # This matches the old parse_results_saver logic
@@ -98,6 +474,7 @@ class SearchEngine:
         cache_file = os.path.join(RESULTS_DIR, f"{res['provider']}_{url_hash}.json")
         with open(cache_file, "w") as f:
             json.dump(res, f, indent=4, cls=DefaultEncoder)
+        get_cache_index().put(RESULT, res["provider"], url_hash, cache_file, url=res["url"])
 
     def _handle_download(self, res: dict, logger: Optional[JobLogger]):
         title = res["title"]
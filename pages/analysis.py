@@ -3,6 +3,8 @@ import os
 import json
 import subprocess
 from providers.provider import DOWNLOAD_DIR, NOTES_DIR, Provider
+from providers.cache_index import get_cache_index, RESULT
+from providers.pdf_store import get_pdf_store
 import re
 from shared.ui import sidebar_api_key
 
@@ -10,36 +12,21 @@ st.set_page_config(page_title="Analysis", page_icon="🧬", layout="wide")
 api_key = sidebar_api_key()
 
 
-def fetch_all_jsons(directory):
+def fetch_all_jsons():
     json_files = []
-    for filename in os.listdir(directory):
-        if filename.endswith(".json"):
-            with open(os.path.join(directory, filename), "r") as file:
+    for entry in get_cache_index().list(RESULT):
+        try:
+            with open(entry.location, "r") as file:
                 json_files.append(json.load(file))
+        except FileNotFoundError:
+            continue
     return json_files
 
 
-def fetch_all_pdfs(directory):
-    pdf_files = {}
-    # filenames = []
-    for filename in os.listdir(directory):
-        if filename.endswith(".pdf"):
-            pdf_files[os.path.splitext(filename)[0]] = os.path.join(directory, filename)
-    return pdf_files
-
-
-PDFs = fetch_all_pdfs(DOWNLOAD_DIR)
-
-# print(PDFs)
-
-
 def check_pdf(data):
     if not data["download_url"]:
         return False
-    f = Provider.generate_filename(data["title"])
-    if f in PDFs:
-        return PDFs[f]
-    return False
+    return get_pdf_store().lookup_paper(data) or False
 
 
 def run(cmd):
@@ -57,7 +44,7 @@ def open_file(pdfLink):
 
 st.title("Downloaded papers")
 
-json_data = fetch_all_jsons(".data/results/")
+json_data = fetch_all_jsons()
 # json_data = list(set(json_data))
 json_data.sort(key=lambda x: x["title"])
 
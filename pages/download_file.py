@@ -1,8 +1,12 @@
 from urllib.parse import urlparse
 
 from providers import *
+from providers.http_client import HttpClient
+from providers.download_manager import is_valid_pdf
+from providers.pdf_store import get_pdf_store, browser_download_dir, incoming_path
 import streamlit as st
 import os
+import shutil
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.chrome.options import Options as ChromeOptions
@@ -17,32 +21,22 @@ def get_domain(url) -> str:
 
 
 def file_exists(title) -> bool:
-    """Check if a file with the given title exists in the download directory."""
-    file_path = os.path.join(DOWNLOAD_DIR, f"{title}.pdf")
-    return os.path.isfile(file_path)
+    """Check if a PDF with the given title is in the PDF store."""
+    return get_pdf_store().lookup(title=title) is not None
 
 
 def download_using_firefox_selenium(title, url) -> Tuple[bool, str]:
+    download_dir = browser_download_dir()
     firefox_options = FirefoxOptions()
     # firefox_options.headless = True  # type: ignore
-    # firefox_options.set_preference("browser.download.folderList", 2)
-    # firefox_options.set_preference("browser.download.manager.showWhenStarting", False)
-    # firefox_options.set_preference("browser.download.dir", DOWNLOAD_DIR)
-    firefox_options.set_preference(
-        "browser.helperApps.neverAsk.saveToDisk",
-        "application/pdf, application/x-pdf",
-    )
-    # firefox_options.set_preference("pdfjs.disabled", True)
-    DOWNLOAD_DIR_ABS = os.path.abspath(DOWNLOAD_DIR)
-    firefox_options.set_preference("browser.download.dir", DOWNLOAD_DIR_ABS)
+    firefox_options.set_preference("browser.download.dir", download_dir)
     firefox_options.set_preference("browser.download.useDownloadDir", True)
     firefox_options.set_preference("browser.download.folderList", 2)
     firefox_options.set_preference("browser.download.manager.showWhenStarting", False)
     firefox_options.set_preference(
-        "browser.helperApps.neverAsk.saveToDisk", "application/pdf"
+        "browser.helperApps.neverAsk.saveToDisk", "application/pdf, application/x-pdf"
     )
     firefox_options.set_preference("pdfjs.disabled", True)
-    firefox_options.set_preference("browser.download.dir", DOWNLOAD_DIR_ABS)
     firefox_options.set_preference("browser.download.panel.shown", False)
     firefox_options.set_preference(
         "browser.download.manager.showAlertOnComplete", False
@@ -50,20 +44,19 @@ def download_using_firefox_selenium(title, url) -> Tuple[bool, str]:
     firefox_options.set_preference("browser.download.manager.closeWhenDone", True)
     driver = webdriver.Firefox(options=firefox_options)
 
-    # try:
-    driver.get(url)
-    # finally:
-    # driver.quit()
+    try:
+        driver.get(url)
+        path = get_pdf_store().add_browser_download(download_dir, url=url, title=title)
+    finally:
+        driver.quit()
+        shutil.rmtree(download_dir, ignore_errors=True)
 
-    if file_exists(title):
-        status = True
-    else:
-        status = False
-    return status, url
+    return path is not None, url
 
 
 def download_using_chrome(title, url) -> Tuple[bool, str]:
     user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
+    download_dir = browser_download_dir()
 
     chrome_options = ChromeOptions()
     chrome_options.add_argument("--headless")
@@ -71,24 +64,25 @@ def download_using_chrome(title, url) -> Tuple[bool, str]:
     chrome_options.add_experimental_option(
         "prefs",
         {
-            "download.default_directory": DOWNLOAD_DIR,
+            "download.default_directory": download_dir,
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "plugins.plugins_disabled": ["Chrome PDF Viewer"],
+            "plugins.always_open_pdf_externally": True,
         },
     )
     driver = webdriver.Chrome(options=chrome_options)
     try:
         driver.get(url)
-        if file_exists(title):
-            status = True
-        else:
-            status = False
-        return status, url
+        path = get_pdf_store().add_browser_download(download_dir, url=url, title=title)
+        return path is not None, url
         # return True, driver.current_url
     except Exception as e:
         print(f"Error in {url}: {e}")
         return False, str(e)
+    finally:
+        driver.quit()
+        shutil.rmtree(download_dir, ignore_errors=True)
 
 
 def download_using_requests(title, url) -> Tuple[bool, str]:
@@ -102,18 +96,20 @@ def download_using_requests(title, url) -> Tuple[bool, str]:
         # headers = driver.execute_script("return navigator.userAgent;")
         driver.quit()
 
-        session = requests.Session()
-        for cookie in cookies:
-            session.cookies.set(cookie["name"], cookie["value"])
+        # Reuse the shared keep-alive pool, passing the browser cookies per request
+        browser_cookies = {cookie["name"]: cookie["value"] for cookie in cookies}
 
         headers = {"User-Agent": user_agent}
-        response = session.get(url, headers=headers, stream=True)
-        filename = Provider.generate_filename(title)
+        response = HttpClient().get(url, headers=headers, cookies=browser_cookies, stream=True)
         if response.status_code == 200:
-            file_path = os.path.join(DOWNLOAD_DIR, f"{filename}.pdf")
+            file_path = incoming_path(url)
             with open(file_path, "wb") as file:
                 for chunk in response.iter_content(chunk_size=8192):
                     file.write(chunk)
+            if not is_valid_pdf(file_path):
+                os.remove(file_path)
+                return False, "The response is not a PDF"
+            get_pdf_store().add(file_path, url=url, title=title)
             return True, url
         else:
             print(response.text)
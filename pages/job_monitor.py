@@ -51,6 +51,8 @@ else:
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("Status", job_detail['status'])
+                if job_detail.get('throttled'):
+                    st.warning(f"⏳ Throttled by Google Scholar, resuming at {job_detail['throttled_until']}")
                 pg = job_detail['progress']
                 st.progress(pg if pg <= 1.0 else 1.0)
             with col2:
@@ -2,6 +2,8 @@ from providers.provider import Provider
 
 
 class ACMProvider(Provider):
+    parse_targets = [("section", {"id": "abstract"})]
+
     def get_abstract(self):
         abstract = self.soup.find("section", id="abstract")
         if abstract:
@@ -2,6 +2,8 @@ from providers.provider import Provider
 
 
 class ArxivProvider(Provider):
+    parse_targets = [("blockquote", {"class": "abstract mathjax"})]
+
     # def download_pdf(self) -> str:
 
     def get_abstract(self) -> str:
@@ -0,0 +1,209 @@
+import atexit
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Dict, Iterator, List
+
+from selenium import webdriver
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+
+from core.job_control import JobCancelled, current_control
+from core.config import (
+    BROWSER_POOL_SIZE,
+    BROWSER_MAX_PAGES,
+    BROWSER_HEADLESS,
+    BROWSER_PAGE_LOAD_TIMEOUT,
+)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
+
+BROWSERS = ("firefox", "chrome")
+
+
+def _ensure_driver_path():
+    # Ensure driver directory is in path for easy finding
+    driver_dir = os.path.abspath(os.path.join(os.getcwd(), "driver"))
+    if os.path.exists(driver_dir) and driver_dir not in os.environ["PATH"]:
+        os.environ["PATH"] += os.pathsep + driver_dir
+
+
+def _create_firefox(headless: bool):
+    options = FirefoxOptions()
+    if headless:
+        options.add_argument("--headless")
+
+    # Enable JavaScript and other features explicitly
+    options.set_preference("javascript.enabled", True)
+    options.set_preference("dom.webdriver.enabled", False) # Anti-detection
+    options.set_preference("general.useragent.override", USER_AGENT)
+
+    return webdriver.Firefox(options=options)
+
+
+def _create_chrome(headless: bool):
+    options = ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+
+    # Enable JavaScript (default) & other features
+    options.add_argument("--enable-javascript")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--start-maximized")
+    options.add_argument("--disable-blink-features=AutomationControlled") # Anti-detection
+
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    return webdriver.Chrome(options=options)
+
+
+_FACTORIES = {
+    "firefox": _create_firefox,
+    "chrome": _create_chrome,
+}
+
+
+@dataclass
+class PooledDriver:
+    browser: str
+    driver: object
+    pages: int = 0
+
+
+class BrowserPool:
+    """
+    Process-wide pool of warm WebDriver sessions.
+    Drivers are leased per fetch and recycled after BROWSER_MAX_PAGES
+    page loads or as soon as a fetch raises.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(BrowserPool, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.size = BROWSER_POOL_SIZE
+        self.max_pages = BROWSER_MAX_PAGES
+        self.headless = BROWSER_HEADLESS
+        self._idle: Dict[str, List[PooledDriver]] = {b: [] for b in BROWSERS}
+        self._slots = {b: threading.BoundedSemaphore(self.size) for b in BROWSERS}
+        # Drivers started and not quit yet, idle or leased; guarded by _idle_lock
+        self._live = {b: 0 for b in BROWSERS}
+        self._idle_lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.close)
+        self._initialized = True
+
+    def _create(self, browser: str) -> PooledDriver:
+        _ensure_driver_path()
+        driver = _FACTORIES[browser](self.headless)
+        driver.set_page_load_timeout(BROWSER_PAGE_LOAD_TIMEOUT)
+        return PooledDriver(browser=browser, driver=driver)
+
+    def _start(self, browser: str, count: int = 1) -> List[PooledDriver]:
+        """Start `count` drivers already counted in _live; if one fails, none are kept."""
+        started = []
+        try:
+            for _ in range(count):
+                started.append(self._create(browser))
+        except BaseException:
+            with self._idle_lock:
+                self._live[browser] -= count - len(started)
+            for pooled in started:
+                self._quit(pooled)
+            raise
+        return started
+
+    def _quit(self, pooled: PooledDriver):
+        with self._idle_lock:
+            self._live[pooled.browser] -= 1
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"Error closing {pooled.browser} driver: {e}")
+
+    @contextmanager
+    def lease(self, browser: str) -> Iterator[object]:
+        """Lease a driver for the duration of the block; blocks while all N are busy."""
+        if browser not in self._slots:
+            raise ValueError(f"Unknown browser: {browser}. Available: {list(BROWSERS)}")
+
+        slot = self._slots[browser]
+        slot.acquire()
+        pooled = None
+        healthy = False
+        try:
+            with self._idle_lock:
+                if self._idle[browser]:
+                    pooled = self._idle[browser].pop()
+                else:
+                    self._live[browser] += 1
+            if pooled is None:
+                pooled = self._start(browser)[0]
+
+            yield pooled.driver
+            pooled.pages += 1
+            healthy = True
+        finally:
+            if pooled is not None:
+                keep = healthy and pooled.pages < self.max_pages and not self._closed
+                with self._idle_lock:
+                    # A warm_up racing this lease may have started one driver too many
+                    keep = keep and self._live[browser] <= self.size
+                    if keep:
+                        self._idle[browser].append(pooled)
+                if not keep:
+                    self._quit(pooled)
+            slot.release()
+
+    def fetch(self, browser: str, url: str) -> str:
+        """
+        Load a page. If the calling thread works for a job, cancelling the job
+        quits the driver mid-load and the fetch raises JobCancelled.
+        """
+        control = current_control()
+        if control is not None and control.cancelled:
+            raise JobCancelled(f"Not fetching {url}: job {control.job_id} was cancelled")
+        with self.lease(browser) as driver:
+            with control.on_cancel(driver.quit) if control is not None else nullcontext():
+                try:
+                    driver.get(url)
+                    html = driver.page_source
+                except Exception:
+                    if control is not None and control.cancelled:
+                        raise JobCancelled(f"Fetch of {url} aborted: job {control.job_id} was cancelled") from None
+                    raise
+            if control is not None and control.cancelled:
+                # Quit just as the load finished; the driver is gone either way
+                raise JobCancelled(f"Fetch of {url} aborted: job {control.job_id} was cancelled")
+            return html
+
+    def warm_up(self, browser: str, count: int = None):
+        """Start drivers ahead of the first fetch until `count` (at most the pool size) are running, leased ones included."""
+        count = min(count or self.size, self.size)
+        with self._idle_lock:
+            missing = max(count - self._live[browser], 0)
+            self._live[browser] += missing
+        for pooled in self._start(browser, missing):
+            with self._idle_lock:
+                self._idle[browser].append(pooled)
+
+    def close(self):
+        self._closed = True
+        with self._idle_lock:
+            idle = [p for drivers in self._idle.values() for p in drivers]
+            for drivers in self._idle.values():
+                drivers.clear()
+        for pooled in idle:
+            self._quit(pooled)
@@ -0,0 +1,359 @@
+import argparse
+import gzip
+import os
+import re
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from core.config import SEARCH_DIR, HTML_CACHE_BACKEND, HTML_CACHE_COMPRESSION
+from . import cache_index
+from .cache_index import CacheIndex, get_cache_index
+
+
+def is_stale(path: str, max_age: Optional[float]) -> bool:
+    return max_age is not None and time.time() - os.path.getmtime(path) > max_age
+
+
+def touch_access(path: str):
+    """Record a cache hit in the file's atime (LRU clock) without changing mtime (fetch time)."""
+    try:
+        os.utime(path, (time.time(), os.path.getmtime(path)))
+    except OSError:
+        pass
+
+
+def atomic_write(path: str, data: bytes):
+    """Write to a temp file in the target directory and rename it into place."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Codec:
+    extension = ".html"
+
+    def encode(self, html: str) -> bytes:
+        return html.encode("utf-8")
+
+    def decode(self, data: bytes) -> str:
+        return data.decode("utf-8")
+
+
+class GzipCodec(Codec):
+    extension = ".html.gz"
+
+    def encode(self, html: str) -> bytes:
+        return gzip.compress(html.encode("utf-8"), compresslevel=6)
+
+    def decode(self, data: bytes) -> str:
+        return gzip.decompress(data).decode("utf-8")
+
+
+class ZstdCodec(Codec):
+    extension = ".html.zst"
+
+    def encode(self, html: str) -> bytes:
+        return zstandard.ZstdCompressor(level=10).compress(html.encode("utf-8"))
+
+    def decode(self, data: bytes) -> str:
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+
+
+def get_codec(name: str) -> Codec:
+    if name == "zstd":
+        if zstandard is None:
+            print("zstandard is not installed, falling back to gzip")
+            return GzipCodec()
+        return ZstdCodec()
+    if name == "gzip":
+        return GzipCodec()
+    if name == "none":
+        return Codec()
+    raise ValueError(f"Unknown cache compression: {name}. Available: ['zstd', 'gzip', 'none']")
+
+
+class HtmlCache(ABC):
+    """Storage backend for fetched pages, keyed by provider name and URL hash."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Return the cached HTML, or None on a miss or when older than max_age seconds."""
+        pass
+
+    @abstractmethod
+    def put(self, namespace: str, key: str, html: str, url: str = None) -> str:
+        """Store the HTML and return the path it was written to."""
+        pass
+
+    @abstractmethod
+    def load(self, path: str) -> str:
+        """Read an entry straight from a known location."""
+        pass
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> bool:
+        pass
+
+    def exists(self, namespace: str, key: str) -> bool:
+        return self.get(namespace, key) is not None
+
+    # Backends without an index keep no validators, so every expired page is refetched
+    def get_validators(self, namespace: str, key: str) -> dict:
+        """ETag / Last-Modified of the cached page, even when it has expired."""
+        return {}
+
+    def set_validators(self, namespace: str, key: str, validators: Optional[dict]):
+        pass
+
+    def refresh(self, namespace: str, key: str) -> bool:
+        """Restart an entry's TTL without rewriting it. Returns False if there is no entry."""
+        return False
+
+
+class FlatFileCache(HtmlCache):
+    """Legacy layout: uncompressed `{namespace}_{key}.html` files in one directory."""
+
+    def __init__(self, root: str = SEARCH_DIR):
+        self.root = root
+
+    def path_for(self, namespace: str, key: str) -> str:
+        return os.path.join(self.root, f"{namespace}_{key}.html")
+
+    def get(self, namespace: str, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        path = self.path_for(namespace, key)
+        if not os.path.exists(path) or is_stale(path, max_age):
+            return None
+        touch_access(path)
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def put(self, namespace: str, key: str, html: str, url: str = None) -> str:
+        path = self.path_for(namespace, key)
+        atomic_write(path, html.encode("utf-8"))
+        return path
+
+    def load(self, path: str) -> str:
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def delete(self, namespace: str, key: str) -> bool:
+        path = self.path_for(namespace, key)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+
+class ShardedCache(HtmlCache):
+    """
+    Compressed pages in hash-prefix shards: `{root}/ab/cd/{namespace}_{key}.html.gz`.
+    Entries written with another codec stay readable after switching compression.
+    """
+
+    def __init__(self, root: str = SEARCH_DIR, compression: str = "gzip"):
+        self.root = root
+        self.codec = get_codec(compression)
+        self._codecs = [self.codec] + [
+            c for c in (GzipCodec(), Codec()) if c.extension != self.codec.extension
+        ]
+        if zstandard is not None and not isinstance(self.codec, ZstdCodec):
+            self._codecs.append(ZstdCodec())
+
+    def shard_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4])
+
+    def path_for(self, namespace: str, key: str, codec: Codec = None) -> str:
+        codec = codec or self.codec
+        return os.path.join(self.shard_dir(key), f"{namespace}_{key}{codec.extension}")
+
+    def _find(self, namespace: str, key: str):
+        for codec in self._codecs:
+            path = self.path_for(namespace, key, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def get(self, namespace: str, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        path, codec = self._find(namespace, key)
+        if path is None:
+            return None
+        try:
+            if is_stale(path, max_age):
+                return None
+            touch_access(path)
+            with open(path, "rb") as file:
+                return codec.decode(file.read())
+        except FileNotFoundError:
+            # Evicted between the lookup and the read
+            return None
+
+    def put(self, namespace: str, key: str, html: str, url: str = None) -> str:
+        path = self.path_for(namespace, key)
+        atomic_write(path, self.codec.encode(html))
+        return path
+
+    def load(self, path: str) -> str:
+        for codec in sorted(self._codecs, key=lambda c: len(c.extension), reverse=True):
+            if path.endswith(codec.extension):
+                with open(path, "rb") as file:
+                    return codec.decode(file.read())
+        raise ValueError(f"Unknown cache file type: {path}")
+
+    def delete(self, namespace: str, key: str) -> bool:
+        deleted = False
+        for codec in self._codecs:
+            path = self.path_for(namespace, key, codec)
+            if os.path.exists(path):
+                os.remove(path)
+                deleted = True
+        return deleted
+
+
+class IndexedCache(HtmlCache):
+    """
+    Wraps a backend with the SQLite cache index: hits and misses are answered
+    from the index, and every write or delete updates it in the same step.
+    """
+
+    def __init__(self, backend: HtmlCache, index: CacheIndex = None):
+        self.backend = backend
+        self.index = index or get_cache_index()
+
+    def get(self, namespace: str, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        entry = self.index.get(cache_index.HTML, namespace, key)
+        if entry is None:
+            return None
+        if max_age is not None and time.time() - entry.fetched_at > max_age:
+            return None
+        try:
+            html = self.backend.load(entry.location)
+        except FileNotFoundError:
+            # Removed behind the index's back
+            self.index.remove(cache_index.HTML, namespace, key)
+            return None
+        self.index.touch(cache_index.HTML, namespace, key)
+        return html
+
+    def put(self, namespace: str, key: str, html: str, url: str = None) -> str:
+        path = self.backend.put(namespace, key, html, url=url)
+        try:
+            self.index.put(cache_index.HTML, namespace, key, path, url=url)
+        except Exception:
+            # Don't leave a file the index doesn't know about
+            self.backend.delete(namespace, key)
+            raise
+        return path
+
+    def load(self, path: str) -> str:
+        return self.backend.load(path)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        self.index.remove(cache_index.HTML, namespace, key)
+        return self.backend.delete(namespace, key)
+
+    def get_validators(self, namespace: str, key: str) -> dict:
+        return self.index.get_validators(cache_index.HTML, namespace, key)
+
+    def set_validators(self, namespace: str, key: str, validators: Optional[dict]):
+        self.index.set_validators(cache_index.HTML, namespace, key, validators)
+
+    def refresh(self, namespace: str, key: str) -> bool:
+        entry = self.index.get(cache_index.HTML, namespace, key)
+        if entry is None:
+            return False
+        try:
+            # Backends and rebuild() read the fetch time from the mtime
+            os.utime(entry.location)
+        except FileNotFoundError:
+            self.index.remove(cache_index.HTML, namespace, key)
+            return False
+        self.index.refresh(cache_index.HTML, namespace, key)
+        return True
+
+
+_backend: Optional[HtmlCache] = None
+_backend_lock = threading.Lock()
+
+
+def get_html_cache_backend() -> HtmlCache:
+    """Return the configured process-wide HTML cache backend."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if HTML_CACHE_BACKEND == "flat":
+                backend = FlatFileCache(SEARCH_DIR)
+            elif HTML_CACHE_BACKEND == "sharded":
+                backend = ShardedCache(SEARCH_DIR, HTML_CACHE_COMPRESSION)
+            else:
+                raise ValueError(f"Unknown cache backend: {HTML_CACHE_BACKEND}. Available: ['flat', 'sharded']")
+            _backend = IndexedCache(backend)
+        return _backend
+
+
+def set_html_cache_backend(backend: HtmlCache):
+    """Plug in a different backend, e.g. for tests or a remote store."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+FLAT_CACHE_FILE = re.compile(r"^(?P<namespace>\w+?)_(?P<key>[0-9a-f]{32})\.html$")
+
+
+def migrate_flat_cache(source_dir: str = SEARCH_DIR, target: HtmlCache = None,
+                       remove: bool = True) -> int:
+    """Move legacy flat `{namespace}_{key}.html` files into the target backend."""
+    target = target or get_html_cache_backend()
+    inner = target.backend if isinstance(target, IndexedCache) else target
+    if isinstance(inner, FlatFileCache) and os.path.abspath(inner.root) == os.path.abspath(source_dir):
+        raise ValueError("Target backend is the flat cache being migrated")
+    migrated = 0
+    for filename in os.listdir(source_dir):
+        match = FLAT_CACHE_FILE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(source_dir, filename)
+        with open(path, "r", encoding="utf-8") as file:
+            html = file.read()
+        target.put(match.group("namespace"), match.group("key"), html)
+        if remove:
+            os.remove(path)
+        migrated += 1
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTML cache maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="Move the flat SEARCH_DIR cache into the configured backend")
+    migrate_parser.add_argument("--source", default=SEARCH_DIR)
+    migrate_parser.add_argument("--keep", action="store_true", help="Keep the original flat files")
+    subparsers.add_parser("reindex", help="Rebuild the cache index from the files on disk")
+    subparsers.add_parser("stats", help="Show entry counts and sizes from the cache index")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        count = migrate_flat_cache(args.source, remove=not args.keep)
+        print(f"Migrated {count} cached pages")
+    elif args.command == "reindex":
+        count = get_cache_index().rebuild()
+        print(f"Indexed {count} cache entries")
+    elif args.command == "stats":
+        for name, stat in sorted(get_cache_index().stats().items()):
+            print(f"{name}: {stat['entries']} entries, {stat['bytes']} bytes")
@@ -0,0 +1,303 @@
+import atexit
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.config import (
+    CACHE_INDEX_PATH, CACHE_TOUCH_INTERVAL, CACHE_TOUCH_BATCH, SEARCH_DIR, RESULTS_DIR, DOWNLOAD_DIR, PDF_STORE_DIR,
+)
+
+# Entry kinds
+HTML = "html"
+RESULT = "result"
+PDF = "pdf"
+
+STATUS_OK = "ok"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    url TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'ok',
+    location TEXT NOT NULL,
+    PRIMARY KEY (kind, namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_url ON entries (url);
+CREATE INDEX IF NOT EXISTS idx_entries_lru ON entries (kind, accessed_at);
+CREATE TABLE IF NOT EXISTS validators (
+    kind TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (kind, namespace, key)
+);
+"""
+
+
+@dataclass
+class CacheEntry:
+    kind: str
+    namespace: str
+    key: str
+    url: Optional[str]
+    size: int
+    fetched_at: float
+    accessed_at: float
+    hits: int
+    status: str
+    location: str
+
+
+class CacheIndex:
+    """
+    SQLite (WAL) index of everything cached on disk: fetched pages, saved
+    results and downloaded PDFs. Lookups and listings are indexed queries
+    instead of filesystem probes and directory walks.
+    """
+
+    def __init__(self, path: str = CACHE_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        # Access times and hit counts not written yet, by entry
+        self._touches: Dict[Tuple[str, str, str], Tuple[float, int]] = {}
+        self._touches_lock = threading.Lock()
+        self._touches_flushed = time.monotonic()
+        is_new = not os.path.exists(path)
+        self._connect().executescript(SCHEMA)
+        if is_new:
+            self.rebuild()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # One connection per thread; WAL lets readers run alongside the writer
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        return self._connect().execute(sql, params).fetchall()
+
+    def put(self, kind: str, namespace: str, key: str, location: str, url: str = None,
+            size: int = None, status: str = STATUS_OK, fetched_at: float = None):
+        now = time.time()
+        if size is None:
+            size = os.path.getsize(location) if os.path.exists(location) else 0
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO entries (kind, namespace, key, url, size, fetched_at, accessed_at, hits, status, location)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?)
+                ON CONFLICT (kind, namespace, key) DO UPDATE SET
+                    url = COALESCE(excluded.url, entries.url),
+                    size = excluded.size,
+                    fetched_at = excluded.fetched_at,
+                    accessed_at = excluded.accessed_at,
+                    status = excluded.status,
+                    location = excluded.location
+                """,
+                (kind, namespace, key, url, size, fetched_at or now, now, status, location),
+            )
+
+    def get(self, kind: str, namespace: str, key: str) -> Optional[CacheEntry]:
+        rows = self.query(
+            "SELECT * FROM entries WHERE kind = ? AND namespace = ? AND key = ?",
+            (kind, namespace, key),
+        )
+        return CacheEntry(**dict(rows[0])) if rows else None
+
+    def find_by_url(self, url: str, kind: str = None) -> List[CacheEntry]:
+        if kind:
+            rows = self.query("SELECT * FROM entries WHERE url = ? AND kind = ?", (url, kind))
+        else:
+            rows = self.query("SELECT * FROM entries WHERE url = ?", (url,))
+        return [CacheEntry(**dict(row)) for row in rows]
+
+    def touch(self, kind: str, namespace: str, key: str):
+        """
+        Record a hit. Hits are buffered and written in one transaction every
+        CACHE_TOUCH_INTERVAL or CACHE_TOUCH_BATCH hits; a crash only loses
+        some recency, which eviction can live with.
+        """
+        with self._touches_lock:
+            _, hits = self._touches.get((kind, namespace, key), (0.0, 0))
+            self._touches[(kind, namespace, key)] = (time.time(), hits + 1)
+            due = (len(self._touches) >= CACHE_TOUCH_BATCH
+                   or time.monotonic() - self._touches_flushed >= CACHE_TOUCH_INTERVAL)
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self):
+        """Write the buffered hits; done before anything reads access times."""
+        with self._touches_lock:
+            touches, self._touches = self._touches, {}
+            self._touches_flushed = time.monotonic()
+        if not touches:
+            return
+        with self.transaction() as conn:
+            conn.executemany(
+                "UPDATE entries SET accessed_at = MAX(accessed_at, ?), hits = hits + ? "
+                "WHERE kind = ? AND namespace = ? AND key = ?",
+                [(accessed_at, hits, *entry) for entry, (accessed_at, hits) in touches.items()],
+            )
+
+    def refresh(self, kind: str, namespace: str, key: str):
+        """Mark an entry as fetched now, e.g. after the server said it hasn't changed."""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE kind = ? AND namespace = ? AND key = ?",
+                (now, now, kind, namespace, key),
+            )
+
+    def remove(self, kind: str, namespace: str, key: str):
+        with self.transaction() as conn:
+            conn.execute(
+                "DELETE FROM entries WHERE kind = ? AND namespace = ? AND key = ?",
+                (kind, namespace, key),
+            )
+            conn.execute(
+                "DELETE FROM validators WHERE kind = ? AND namespace = ? AND key = ?",
+                (kind, namespace, key),
+            )
+
+    def get_validators(self, kind: str, namespace: str, key: str) -> Dict[str, str]:
+        """ETag / Last-Modified the entry was served with, for conditional requests."""
+        rows = self.query(
+            "SELECT etag, last_modified FROM validators WHERE kind = ? AND namespace = ? AND key = ?",
+            (kind, namespace, key),
+        )
+        if not rows:
+            return {}
+        return {name: rows[0][name] for name in ("etag", "last_modified") if rows[0][name]}
+
+    def set_validators(self, kind: str, namespace: str, key: str, validators: Optional[Dict[str, str]]):
+        with self.transaction() as conn:
+            if validators:
+                conn.execute(
+                    "INSERT OR REPLACE INTO validators (kind, namespace, key, etag, last_modified) VALUES (?, ?, ?, ?, ?)",
+                    (kind, namespace, key, validators.get("etag"), validators.get("last_modified")),
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM validators WHERE kind = ? AND namespace = ? AND key = ?",
+                    (kind, namespace, key),
+                )
+
+    def list(self, kind: str) -> List[CacheEntry]:
+        rows = self.query("SELECT * FROM entries WHERE kind = ? ORDER BY key", (kind,))
+        return [CacheEntry(**dict(row)) for row in rows]
+
+    def least_recently_used(self, kind: str = None) -> Iterator[CacheEntry]:
+        self.flush_touches()
+        if kind:
+            rows = self.query("SELECT * FROM entries WHERE kind = ? ORDER BY accessed_at", (kind,))
+        else:
+            rows = self.query("SELECT * FROM entries ORDER BY accessed_at")
+        for row in rows:
+            yield CacheEntry(**dict(row))
+
+    def older_than(self, kind: str, namespace: str, fetched_before: float,
+                   with_validators: bool = True) -> List[CacheEntry]:
+        """Entries fetched before the given time; optionally only those without validators."""
+        sql = "SELECT * FROM entries WHERE kind = ? AND namespace = ? AND fetched_at < ?"
+        if not with_validators:
+            sql += """ AND NOT EXISTS (
+                SELECT 1 FROM validators v
+                WHERE v.kind = entries.kind AND v.namespace = entries.namespace AND v.key = entries.key
+            )"""
+        rows = self.query(sql, (kind, namespace, fetched_before))
+        return [CacheEntry(**dict(row)) for row in rows]
+
+    def total_bytes(self) -> int:
+        return self.query("SELECT COALESCE(SUM(size), 0) AS total FROM entries")[0]["total"]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Entry count and bytes per kind and namespace."""
+        stats: Dict[str, Dict[str, int]] = {}
+        for row in self.query(
+            "SELECT kind, namespace, COUNT(*) AS entries, SUM(size) AS bytes FROM entries GROUP BY kind, namespace"
+        ):
+            name = f"{row['kind']}:{row['namespace']}" if row["namespace"] else row["kind"]
+            stats[name] = {"entries": row["entries"], "bytes": row["bytes"] or 0}
+        return stats
+
+    def rebuild(self) -> int:
+        """Re-index whatever is on disk. Used on first start and after manual cleanups."""
+        html_file = re.compile(r"^(?P<namespace>\w+?)_(?P<key>[0-9a-f]{32})\.html(\.gz|\.zst)?$")
+        result_file = re.compile(r"^(?P<namespace>\w+?)_(?P<key>[0-9a-f]{32})\.json$")
+        rows = []
+
+        def add(kind, namespace, key, path):
+            st = os.stat(path)
+            rows.append((kind, namespace, key, st.st_size, st.st_mtime, st.st_atime, path))
+
+        for root, _, filenames in os.walk(SEARCH_DIR):
+            for filename in filenames:
+                match = html_file.match(filename)
+                if match:
+                    add(HTML, match.group("namespace"), match.group("key"), os.path.join(root, filename))
+        if os.path.isdir(RESULTS_DIR):
+            for filename in os.listdir(RESULTS_DIR):
+                match = result_file.match(filename)
+                if match:
+                    add(RESULT, match.group("namespace"), match.group("key"), os.path.join(RESULTS_DIR, filename))
+        if os.path.isdir(DOWNLOAD_DIR):
+            for filename in os.listdir(DOWNLOAD_DIR):
+                if filename.endswith(".pdf"):
+                    add(PDF, "", os.path.splitext(filename)[0], os.path.join(DOWNLOAD_DIR, filename))
+        for root, _, filenames in os.walk(PDF_STORE_DIR):
+            for filename in filenames:
+                if filename.endswith(".pdf"):
+                    add(PDF, "sha256", os.path.splitext(filename)[0], os.path.join(root, filename))
+
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO entries (kind, namespace, key, size, fetched_at, accessed_at, location)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+        return len(rows)
+
+
+_index: Optional[CacheIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_cache_index() -> CacheIndex:
+    """Return the process-wide cache index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = CacheIndex()
+            atexit.register(_index.flush_touches)
+        return _index
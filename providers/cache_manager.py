@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from core.config import SEARCH_DIR, CACHE_MAX_BYTES, CACHE_COMPACTION_INTERVAL, HTML_CACHE_REVALIDATE
+from .cache_index import CacheIndex, CacheEntry, HTML, get_cache_index
+from .metadata_cache import MetadataCache
+from .provider import Provider
+
+STALE_TEMP_AGE = 3600  # seconds before an orphaned temp file is removed
+
+
+@dataclass
+class CompactionReport:
+    expired: int = 0
+    evicted: int = 0
+    temp_files: int = 0
+    stale_abstracts: int = 0
+    bytes_freed: int = 0
+    bytes_remaining: int = 0
+
+
+def provider_classes() -> Dict[str, type]:
+    """Map provider class name -> class, covering every loaded Provider subclass."""
+    classes = {}
+    pending = [Provider]
+    while pending:
+        cls = pending.pop()
+        classes[cls.__name__] = cls
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+def provider_ttls() -> Dict[str, Optional[float]]:
+    """Map provider class name -> cache_ttl, covering every loaded Provider subclass."""
+    return {name: cls.cache_ttl for name, cls in provider_classes().items()}
+
+
+class CacheManager:
+    """
+    Keeps the on-disk caches bounded: drops pages past their provider's TTL,
+    then evicts least recently used entries until the byte budget is met.
+    Expired pages with an ETag or Last-Modified are kept for revalidation and
+    only go when space runs out.
+    Expiry and eviction are queries on the cache index rather than directory scans.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, html_dir: str = SEARCH_DIR,
+                 index: CacheIndex = None):
+        self.max_bytes = max_bytes
+        self.html_dir = html_dir
+        self._index = index
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._compact_lock = threading.Lock()
+
+    @property
+    def index(self) -> CacheIndex:
+        if self._index is None:
+            self._index = get_cache_index()
+        return self._index
+
+    def _evict(self, entry: CacheEntry) -> int:
+        """Delete the entry's file and index row; returns the bytes freed."""
+        try:
+            os.remove(entry.location)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return 0
+        self.index.remove(entry.kind, entry.namespace, entry.key)
+        return entry.size
+
+    def _remove_temp_files(self, report: CompactionReport, now: float):
+        # Orphaned temp files and emptied shards are the only things not in the index
+        for root, dirs, filenames in os.walk(self.html_dir, topdown=False):
+            for filename in filenames:
+                if not filename.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    if now - os.path.getmtime(path) > STALE_TEMP_AGE:
+                        size = os.path.getsize(path)
+                        os.remove(path)
+                        report.temp_files += 1
+                        report.bytes_freed += size
+                except OSError:
+                    continue
+            if root != self.html_dir and not os.listdir(root):
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
+
+    def compact(self) -> CompactionReport:
+        with self._compact_lock:
+            report = CompactionReport()
+            now = time.time()
+
+            metadata = MetadataCache(self.index)
+            for namespace, cls in provider_classes().items():
+                if cls.extractor_version is not None:
+                    # Written by an older get_abstract(); they never match again
+                    report.stale_abstracts += metadata.purge_stale(namespace, cls.extractor_version)
+                if cls.cache_ttl is None:
+                    continue
+                # A conditional request can confirm these for the price of a 304
+                revalidates = cls.revalidate and HTML_CACHE_REVALIDATE != "off"
+                for entry in self.index.older_than(HTML, namespace, now - cls.cache_ttl,
+                                                   with_validators=not revalidates):
+                    report.expired += 1
+                    report.bytes_freed += self._evict(entry)
+
+            total = self.index.total_bytes()
+            if total > self.max_bytes:
+                # Evict down to 90% of the budget so we don't compact again immediately
+                target = int(self.max_bytes * 0.9)
+                for entry in self.index.least_recently_used():
+                    if total <= target:
+                        break
+                    freed = self._evict(entry)
+                    if freed:
+                        report.evicted += 1
+                        report.bytes_freed += freed
+                        total -= freed
+
+            self._remove_temp_files(report, now)
+            report.bytes_remaining = total
+            return report
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                report = self.compact()
+                if report.bytes_freed:
+                    print(f"Cache compaction: {report}")
+            except Exception as e:
+                print(f"Cache compaction error: {e}")
+
+    def start(self, interval: float = CACHE_COMPACTION_INTERVAL):
+        """Run compaction periodically on a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
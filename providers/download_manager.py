@@ -0,0 +1,253 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from core.config import (
+    DOWNLOAD_PER_DOMAIN,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_BUFFER_SIZE,
+    DOWNLOAD_SEGMENTS,
+    DOWNLOAD_SEGMENT_MIN_SIZE,
+    DOWNLOAD_MIN_PDF_BYTES,
+)
+from .http_client import HttpClient
+from .rate_limiter import RateLimiter
+from .urls import get_domain
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+PDF_MAGIC = b"%PDF-"
+# Readers accept the header anywhere in the first KB
+PDF_MAGIC_WINDOW = 1024
+# Bytes written between progress saves, so a resume loses at most this much
+STATE_SAVE_INTERVAL = 4 * 1024 ** 2
+
+
+class DownloadError(Exception):
+    pass
+
+
+class RangeIgnoredError(DownloadError):
+    """The server answered a range request with the whole file."""
+
+
+def is_valid_pdf(path: str, expected_size: Optional[int] = None) -> bool:
+    """PDF header in the first KB, and the size we were promised (if any)."""
+    try:
+        size = os.path.getsize(path)
+        if size < DOWNLOAD_MIN_PDF_BYTES or (expected_size is not None and size != expected_size):
+            return False
+        with open(path, "rb") as f:
+            return PDF_MAGIC in f.read(PDF_MAGIC_WINDOW)
+    except OSError:
+        return False
+
+
+class DownloadManager:
+    """
+    Downloads files into `<dest>.part` and renames them into place only once
+    they are complete and valid. Interrupted downloads resume with HTTP Range
+    requests; large files are fetched as several ranges in parallel.
+    """
+    _instance = None
+    _lock = threading.Lock()
+    _state_lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(DownloadManager, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._domain_slots: Dict[str, threading.BoundedSemaphore] = defaultdict(
+            lambda: threading.BoundedSemaphore(DOWNLOAD_PER_DOMAIN)
+        )
+        self._slots_lock = threading.Lock()
+        # Lock and number of callers per destination, dropped once nobody uses it
+        self._dest_locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._initialized = True
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        with self._slots_lock:
+            return self._domain_slots[get_domain(url)]
+
+    @contextmanager
+    def _dest_lock(self, dest: str) -> Iterator[None]:
+        """Only one download at a time may write a destination's part and state files."""
+        key = os.path.abspath(dest)
+        with self._slots_lock:
+            lock, users = self._dest_locks.get(key, (threading.Lock(), 0))
+            self._dest_locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._slots_lock:
+                lock, users = self._dest_locks[key]
+                if users == 1:
+                    del self._dest_locks[key]
+                else:
+                    self._dest_locks[key] = (lock, users - 1)
+
+    def download(self, url: str, dest: str) -> str:
+        """Download url to dest, resuming a previous partial download. Returns dest."""
+        # Wait for another download of the same file without holding a domain slot
+        with self._dest_lock(dest), self._slot(url):
+            try:
+                return self._download(url, dest)
+            except RangeIgnoredError:
+                # The file changed or the server dropped range support; start over once
+                self._discard(dest)
+                return self._download(url, dest)
+
+    def _download(self, url: str, dest: str) -> str:
+        part_path = dest + PART_SUFFIX
+        state_path = dest + STATE_SUFFIX
+        state = self._load_state(state_path, url) if os.path.exists(part_path) else None
+        if state is None:
+            state = self._start(url, part_path, state_path)
+
+        pending = [segment for segment in state["segments"] if not self._segment_complete(segment)]
+        if len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="segment") as executor:
+                futures = [executor.submit(self._fetch_segment, url, part_path, state_path, state, s)
+                           for s in pending]
+                for future in futures:
+                    future.result()
+        elif pending:
+            self._fetch_segment(url, part_path, state_path, state, pending[0])
+
+        if not is_valid_pdf(part_path, state.get("size")):
+            self._discard(dest)
+            raise DownloadError(f"Downloaded file from {url} is not a complete PDF")
+        os.replace(part_path, dest)
+        self._remove(state_path)
+        return dest
+
+    def _start(self, url: str, part_path: str, state_path: str) -> dict:
+        """Open the download; large range-capable files are split into segments."""
+        with RateLimiter().acquire(url):
+            response = HttpClient().get(url, stream=True, headers={"Accept-Encoding": "identity"})
+        if response.status_code != 200:
+            response.close()
+            raise DownloadError(f"HTTP {response.status_code} for {url}")
+
+        length = response.headers.get("Content-Length")
+        size = int(length) if length and length.isdigit() else None
+        state = {
+            "url": url,
+            "size": size,
+            "validator": response.headers.get("ETag") or response.headers.get("Last-Modified"),
+            "segments": [],
+        }
+
+        ranged = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        if ranged and size and size >= DOWNLOAD_SEGMENT_MIN_SIZE and DOWNLOAD_SEGMENTS > 1:
+            response.close()
+            step = -(-size // DOWNLOAD_SEGMENTS)
+            state["segments"] = [
+                {"start": start, "end": min(start + step, size) - 1, "done": 0}
+                for start in range(0, size, step)
+            ]
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+            self._save_state(state_path, state)
+            return state
+
+        # Small file or no range support: keep reading the response we have
+        segment = {"start": 0, "end": size - 1 if size else None, "done": 0}
+        state["segments"] = [segment]
+        open(part_path, "wb").close()
+        self._save_state(state_path, state)
+        self._write(response, part_path, state_path, state, segment)
+        return state
+
+    @staticmethod
+    def _segment_complete(segment: dict) -> bool:
+        if segment["end"] is None:
+            return segment.get("finished", False)
+        return segment["start"] + segment["done"] > segment["end"]
+
+    def _fetch_segment(self, url: str, part_path: str, state_path: str, state: dict, segment: dict):
+        offset = segment["start"] + segment["done"]
+        end = "" if segment["end"] is None else segment["end"]
+        headers = {"Range": f"bytes={offset}-{end}", "Accept-Encoding": "identity"}
+        if state.get("validator"):
+            headers["If-Range"] = state["validator"]
+
+        with RateLimiter().acquire(url):
+            response = HttpClient().get(url, stream=True, headers=headers)
+        if response.status_code == 200 and offset == 0 and len(state["segments"]) == 1:
+            # Nothing downloaded yet, so the full body is just as good
+            segment["done"] = 0
+        elif response.status_code != 206:
+            response.close()
+            if response.status_code in (200, 416):
+                raise RangeIgnoredError(f"Server ignored range request for {url}")
+            raise DownloadError(f"HTTP {response.status_code} for {url}")
+        self._write(response, part_path, state_path, state, segment)
+
+    def _write(self, response, part_path: str, state_path: str, state: dict, segment: dict):
+        """Copy a response body into the part file at the segment's offset."""
+        unsaved = 0
+        try:
+            with open(part_path, "r+b", buffering=DOWNLOAD_BUFFER_SIZE) as f:
+                f.seek(segment["start"] + segment["done"])
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    if segment["end"] is not None:
+                        # Never spill into the next segment
+                        chunk = chunk[:segment["end"] + 1 - segment["start"] - segment["done"]]
+                    f.write(chunk)
+                    segment["done"] += len(chunk)
+                    unsaved += len(chunk)
+                    if unsaved >= STATE_SAVE_INTERVAL:
+                        f.flush()
+                        self._save_state(state_path, state)
+                        unsaved = 0
+                    if self._segment_complete(segment):
+                        break
+            if segment["end"] is None:
+                segment["finished"] = True
+            elif not self._segment_complete(segment):
+                raise DownloadError(f"Connection closed early for {response.url}")
+        finally:
+            response.close()
+            self._save_state(state_path, state)
+
+    def _save_state(self, state_path: str, state: dict):
+        with self._state_lock:
+            tmp_path = f"{state_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, state_path)
+
+    @staticmethod
+    def _load_state(state_path: str, url: str) -> Optional[dict]:
+        try:
+            with open(state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("url") == url else None
+
+    def _discard(self, dest: str):
+        self._remove(dest + PART_SUFFIX)
+        self._remove(dest + STATE_SUFFIX)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,10 +1,16 @@
+from bs4 import BeautifulSoup
+
 from providers.provider import Provider
 
 
 class EmptyProvider(Provider):
+    # Fallback for domains without a provider: there is nothing to extract, so nothing is fetched
+    extractor_version = None
+    streaming = False
+
     def __init__(self, url, cache=False):
-        self.url = url
-        self.cache = cache
+        super().__init__(url, cache=cache)
+        self._soup = BeautifulSoup("", "html.parser")
 
     def get_abstract(self) -> str:
         return "Abstract not found"
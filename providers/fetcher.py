@@ -0,0 +1,297 @@
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import requests
+
+from core.config import DATA_DIR, FETCH_MIN_TEXT_LENGTH, FETCH_TIER_TTL
+from core.job_control import JobCancelled
+from .browser_pool import BrowserPool
+from .http_client import HttpClient
+from .negative_cache import get_negative_cache, KnownFailureError, TIMEOUT, BLOCKED, HTTP_STATUS, ERROR
+from .rate_limiter import RateLimiter
+from .urls import get_domain
+
+HTTP_TIER = "http"
+BROWSER_TIER = "browser"
+
+# Phrases that only show up on interstitials, never on a real article page
+BLOCK_MARKERS = [
+    "unusual traffic from your computer network",
+    "our systems have detected unusual traffic",
+    "please show you're not a robot",
+    "are you a robot",
+    "verify you are human",
+    "checking your browser before accessing",
+    "attention required! | cloudflare",
+    "cf-browser-verification",
+    "<title>just a moment...</title>",
+    "<title>access denied</title>",
+    "request unsuccessful. incapsula incident",
+]
+# Cloudflare injects its challenge-platform script into ordinary pages too, so
+# this only marks a block on a page with too little text to be an article
+CHALLENGE_MARKERS = [
+    "challenge-platform",
+]
+JS_SHELL_MARKERS = [
+    "enable javascript",
+    "javascript is disabled",
+    "javascript is required",
+    "requires javascript",
+]
+# Pages a tier couldn't render, as opposed to the site refusing us; they don't back the domain off
+SHELL_REASONS = ("empty", "js_shell", "too_short")
+BLOCK_STATUS_CODES = (401, 403, 429, 503)
+# Statuses that no browser will get around
+GONE_STATUS_CODES = (404, 410)
+
+BlockCheck = Optional[Callable[[str], Optional[str]]]
+
+_SCRIPT_RE = re.compile(r"<(script|style|noscript)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def visible_text(html: str) -> str:
+    text = _SCRIPT_RE.sub(" ", html)
+    text = _TAG_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def detect_block(html: Optional[str]) -> Optional[str]:
+    """
+    Classify a fetched page. Returns None for a usable page, otherwise the
+    reason it can't be used: "empty", "blocked", "captcha", "js_shell" or "too_short".
+    """
+    if not html or len(html) <= 30:
+        return "empty"
+
+    lowered = html.lower()
+    for marker in BLOCK_MARKERS:
+        if marker in lowered:
+            return "blocked"
+
+    text_length = len(visible_text(html))
+    if text_length < FETCH_MIN_TEXT_LENGTH:
+        if any(marker in lowered for marker in CHALLENGE_MARKERS):
+            return "blocked"
+        if "captcha" in lowered:
+            return "captcha"
+        if any(marker in lowered for marker in JS_SHELL_MARKERS) or "<script" in lowered:
+            return "js_shell"
+        return "too_short"
+    return None
+
+
+class BlockedPageError(Exception):
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"Blocked page ({reason}) for {url}")
+        self.url = url
+        self.reason = reason
+
+    @property
+    def is_block(self) -> bool:
+        """Anti-bot block (captcha, interstitial, blocking status) rather than a thin or JS-only page."""
+        return self.reason not in SHELL_REASONS
+
+
+@dataclass
+class FetchResult:
+    # None when the server answered 304 Not Modified
+    html: Optional[str]
+    # ETag / Last-Modified to send with the next conditional request
+    validators: Dict[str, str] = field(default_factory=dict)
+    not_modified: bool = False
+
+
+def response_validators(response: requests.Response) -> Dict[str, str]:
+    validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+    return {name: value for name, value in validators.items() if value}
+
+
+def conditional_headers(validators: Optional[Dict[str, str]]) -> Dict[str, str]:
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+class TieredFetcher:
+    """
+    Fetch pages cheapest tier first: plain HTTP, then a pooled browser when the
+    HTTP response looks blocked. Remembers per domain which tier worked last.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(TieredFetcher, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.state_file = os.path.join(DATA_DIR, "fetch_tiers.json")
+        self._tiers: Dict[str, dict] = self._load()
+        self._tiers_lock = threading.Lock()
+        self._initialized = True
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save(self):
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(self._tiers, f, indent=4)
+        os.replace(tmp_file, self.state_file)
+
+    def get_tier(self, url: str) -> Optional[str]:
+        """Tier that last worked for this domain, or None if unknown or stale."""
+        with self._tiers_lock:
+            entry = self._tiers.get(get_domain(url))
+        if entry and time.time() - entry["updated_at"] < FETCH_TIER_TTL:
+            return entry["tier"]
+        return None
+
+    def remember(self, url: str, tier: str):
+        domain = get_domain(url)
+        with self._tiers_lock:
+            entry = self._tiers.get(domain)
+            if entry and entry["tier"] == tier and time.time() - entry["updated_at"] < FETCH_TIER_TTL / 2:
+                return
+            self._tiers[domain] = {"tier": tier, "updated_at": time.time()}
+            self._save()
+
+    def fetch_http(self, url: str, extra_check: BlockCheck = None, validators: Dict[str, str] = None) -> FetchResult:
+        """Plain GET; with validators it is a conditional request that may come back not modified."""
+        with RateLimiter().acquire(url):
+            response = HttpClient().get(url, headers=conditional_headers(validators))
+        if response.status_code == 304 and validators:
+            return FetchResult(None, validators, not_modified=True)
+        if response.status_code in BLOCK_STATUS_CODES:
+            raise BlockedPageError(url, f"http_{response.status_code}")
+        response.raise_for_status()
+        reason = detect_block(response.text) or (extra_check and extra_check(response.text))
+        if reason:
+            raise BlockedPageError(url, reason)
+        return FetchResult(response.text, response_validators(response))
+
+    @staticmethod
+    def fetch_browser(url: str) -> str:
+        pool = BrowserPool()
+        with RateLimiter().acquire(url):
+            try:
+                return pool.fetch("firefox", url)
+            except JobCancelled:
+                raise
+            except Exception as e:
+                print(f"Firefox Selenium failed, trying Chrome: {e}")
+            return pool.fetch("chrome", url)
+
+    @staticmethod
+    def classify_failure(error: Exception):
+        """Map a fetch exception to a negative cache failure class and HTTP status."""
+        if isinstance(error, BlockedPageError):
+            return BLOCKED, None
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return HTTP_STATUS, error.response.status_code
+        if isinstance(error, (requests.Timeout, TimeoutError)) or "timeout" in type(error).__name__.lower():
+            return TIMEOUT, None
+        return ERROR, None
+
+    def fetch(self, url: str, prefer_browser: bool = False, cache_failures: bool = True,
+              detect_block: BlockCheck = None) -> str:
+        """
+        Fetch a page through the cheapest tier that works.
+        `detect_block` adds a caller-specific block check on top of the generic one.
+        """
+        return self.fetch_result(url, prefer_browser, cache_failures, detect_block).html
+
+    def fetch_result(self, url: str, prefer_browser: bool = False, cache_failures: bool = True,
+                     detect_block: BlockCheck = None, validators: Dict[str, str] = None) -> FetchResult:
+        """
+        Like fetch(), but also returns the response validators. Given the validators
+        of a cached copy it first asks over HTTP whether the page changed.
+        """
+        negative_cache = get_negative_cache()
+        previous_failure = negative_cache.lookup(url) if cache_failures else None
+        if previous_failure and previous_failure.active:
+            raise KnownFailureError(previous_failure)
+
+        try:
+            result = self._fetch_tiers(url, prefer_browser, detect_block, validators)
+        except JobCancelled:
+            # Says nothing about the page
+            raise
+        except Exception as e:
+            if isinstance(e, BlockedPageError) and e.is_block:
+                # Back the whole domain off, not just this URL
+                RateLimiter().report_block(url)
+            if cache_failures:
+                failure, status_code = self.classify_failure(e)
+                negative_cache.record(url, failure, status_code=status_code, detail=str(e))
+            raise
+
+        RateLimiter().report_success(url)
+        if previous_failure:
+            negative_cache.clear(url)
+        return result
+
+    def _fetch_tiers(self, url: str, prefer_browser: bool, extra_check: BlockCheck,
+                     validators: Dict[str, str] = None) -> FetchResult:
+        tier = self.get_tier(url) or (BROWSER_TIER if prefer_browser else HTTP_TIER)
+
+        # Validators only ever come from an HTTP response, and asking whether
+        # the page changed is cheap even for domains that need a browser
+        tried_http = tier == HTTP_TIER or bool(validators)
+        if tried_http:
+            try:
+                result = self.fetch_http(url, extra_check, validators)
+                if not result.not_modified:
+                    self.remember(url, HTTP_TIER)
+                return result
+            except BlockedPageError as e:
+                print(f"{e}, escalating to browser")
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code in GONE_STATUS_CODES:
+                    raise
+                print(f"HTTP fetch failed for {url}, escalating to browser: {e}")
+            except Exception as e:
+                print(f"HTTP fetch failed for {url}, escalating to browser: {e}")
+
+        try:
+            html = self.fetch_browser(url)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            if tried_http:
+                raise
+            # No working browser on this host: plain HTTP is better than nothing
+            print(f"Chrome Selenium failed: {e}. Falling back to requests...")
+            result = self.fetch_http(url, extra_check)
+            self.remember(url, HTTP_TIER)
+            return result
+        reason = detect_block(html)
+        if reason not in ("blocked", "captcha"):
+            reason = extra_check(html) if extra_check else None
+        if reason:
+            raise BlockedPageError(url, reason)
+        self.remember(url, BROWSER_TIER)
+        return FetchResult(html)
@@ -5,12 +5,45 @@ import requests
 import hashlib
 from typing import Tuple
 
+from core.config import SCHOLAR_CACHE_TTL
+from core.job_control import JobCancelled
+
 from .provider import Provider, SEARCH_DIR, RESULTS_DIR, DefaultEncoder
 from .registry import ProviderRegistry
 from .emptyprovider import EmptyProvider
+from .negative_cache import get_negative_cache, PARSE_MISS
+
+SCHOLAR_BLOCK_MARKERS = [
+    'id="gs_captcha',
+    "gs_captcha_f",
+    "/sorry/index",
+    "unusual traffic from your computer network",
+    "please show you're not a robot",
+]
+
 
 class GoogleScholarProvider(Provider):
-    def parse_results(self, entry, download=False):
+    requires_browser = True
+    # Result pages go stale within days
+    cache_ttl = SCHOLAR_CACHE_TTL
+    # Scholar blocks are about our traffic, not the URL; the lane backoff handles them
+    cache_failures = False
+    streaming = False
+    # parse_entries only reads the result entries
+    parse_targets = [("div", {"class": "gs_r gs_or gs_scl"})]
+
+    def detect_block(self, html):
+        lowered = html.lower()
+        for marker in SCHOLAR_BLOCK_MARKERS:
+            if marker in lowered:
+                return "scholar_captcha"
+        if 'id="gs_res_ccl' not in lowered:
+            # Not a result listing at all (an empty listing still has the container)
+            return "scholar_no_results_container"
+        return None
+
+    def parse_entry(self, entry):
+        """Extract the SERP fields of one result entry without touching the publisher page."""
         title = entry.find("h3", class_="gs_rt").text
         url = (
             entry.find("h3", class_="gs_rt").a["href"]
@@ -25,29 +58,64 @@ class GoogleScholarProvider(Provider):
             if entry.find("div", class_="gs_rs") is not None
             else None
         )
-        
-        # We need to resolve the provider for the paper URL
-        # This used to be a recursive call to parse_provider, now we use Registry
+
+        return {
+            "title": title,
+            "author": author,
+            "url": url,
+            "download_url": download_link,
+            "snippet": snippet,
+            "provider": EmptyProvider.__name__,
+            "provider_class": EmptyProvider.__name__,
+            "abstract": "Abstract not found",
+        }
+
+    @staticmethod
+    def enrich(paper):
+        """Resolve the publisher provider for the paper URL and fill in its abstract."""
+        url = paper["url"]
+        negative_cache = get_negative_cache()
+        if url and negative_cache.check(url):
+            # Known dead, paywalled or abstract-less page: keep the snippet
+            return paper
+
         try:
-            # Import here to avoid circular dependency if ProviderRegistry uses this file
-            # But ProviderRegistry is separate now
             provider_class = ProviderRegistry.get_provider_class(url)
             provider = provider_class(url, cache=True)
+            # Providers without an extractor (EmptyProvider) can't use the page
+            if provider.extractor_version is not None and provider.cached_abstract() is None and not provider.stream():
+                provider.load()
+        except JobCancelled:
+            raise
         except Exception as e:
             print(f"Error in {url}: {e}")
             provider = EmptyProvider(url, cache=True)
-        
+
+        try:
+            abstract = provider.abstract
+        except Exception as e:
+            negative_cache.record(url, PARSE_MISS, detail=str(e))
+            raise
+        if abstract == "Abstract not found" and not isinstance(provider, EmptyProvider):
+            negative_cache.record(url, PARSE_MISS, detail=provider.__class__.__name__)
+
         return {
-            "title": title,
-            "author": author,
-            "url": url,
-            "download_url": download_link,
-            "snippet": snippet,
+            **paper,
             "provider": provider.__class__.__name__,
             "provider_class": str(provider),
-            "abstract": provider.get_abstract(),
+            "abstract": abstract,
         }
 
+    def parse_results(self, entry, download=False):
+        return self.enrich(self.parse_entry(entry))
+
+    @staticmethod
+    def _log(logger, level, message):
+        if logger:
+            getattr(logger, level)(message)
+        else:
+            print(message)
+
     def save_results(self, res):
         url_hash = self.get_url_hash()
         print(url_hash)
@@ -57,36 +125,15 @@ class GoogleScholarProvider(Provider):
         with open(cache_file, "w") as f:
             json.dump(res, f, indent=4, cls=DefaultEncoder)
 
-    def get_all_papers(self, logger=None, download=False):
-        # Note: This method was originally doing too much (printing, saving, downloading)
-        # We will simplify it to just yield results, and let the caller handle the rest
-        # But to maintain some compatibility or logic, we'll return a list
-        
+    def parse_entries(self, logger=None):
+        """SERP fields of every result entry on the page, without enrichment."""
         papers = []
         if not self.soup:
             return papers
-            
+
         for entry in self.soup.find_all("div", class_="gs_r gs_or gs_scl"):
             try:
-                res = self.parse_results(entry)
-                
-                # We can save individual paper results here if we want
-                # Or let the engine handle it. The original code saved it immediately.
-                
-                # Original: parse_results_saver(res)
-                # We'll adapt that logic here or in the caller. 
-                # For now, let's return the dict.
-                
-                papers.append(res)
-                
-                if logger:
-                    logger.info(f"Found: {res['title']}")
-                
+                papers.append(self.parse_entry(entry))
             except Exception as e:
-                if logger:
-                    logger.error(f"Error parsing entry: {e}")
-                else:
-                    print(f"Error parsing entry: {e}")
-                    
+                self._log(logger, "error", f"Error parsing entry: {e}")
         return papers
-
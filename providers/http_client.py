@@ -0,0 +1,74 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_POOL_HOSTS,
+    HTTP_POOL_MAXSIZE,
+)
+from .browser_pool import USER_AGENT
+
+
+class HttpClient:
+    """
+    Process-wide HTTP client for pages and files that don't need a real browser.
+    Keeps a keep-alive connection pool per host and retries transient failures.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(HttpClient, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        self.session = self._build_session()
+        self._initialized = True
+
+    @staticmethod
+    def _build_session() -> requests.Session:
+        retry = Retry(
+            total=HTTP_RETRIES,
+            backoff_factor=HTTP_BACKOFF_FACTOR,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_connections is the number of per-host pools kept alive,
+        # pool_maxsize the number of connections kept per host
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_HOSTS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"User-Agent": USER_AGENT})
+        return session
+
+    def get(self, url: str, stream: bool = False, timeout=None, **kwargs) -> requests.Response:
+        return self.session.get(url, stream=stream, timeout=timeout or self.timeout, **kwargs)
+
+    def fetch_text(self, url: str, **kwargs) -> str:
+        """GET a page and return its body, raising on HTTP errors."""
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        return response.text
+
+    def close(self):
+        self.session.close()
@@ -2,6 +2,10 @@ from providers.provider import Provider
 
 
 class IEEEXplore(Provider):
+    # Abstract is rendered client-side
+    requires_browser = True
+    parse_targets = [("div", {"class": "abstract-text"})]
+
     def get_abstract(self) -> str:
         abstract = self.soup.find("div", class_="abstract-text")
         if abstract:
@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Optional
+
+from .cache_index import CacheIndex, get_cache_index
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extracted (
+    url_hash TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    extractor_version INTEGER NOT NULL,
+    abstract TEXT,
+    extracted_at REAL NOT NULL,
+    PRIMARY KEY (url_hash, provider)
+);
+"""
+
+
+class MetadataCache:
+    """
+    Fields extracted from cached pages, so known papers never need their HTML
+    re-parsed. Entries only match the provider's current extractor_version.
+    """
+
+    def __init__(self, index: CacheIndex = None):
+        self.index = index or get_cache_index()
+        self.index._connect().executescript(SCHEMA)
+
+    def get_abstract(self, url_hash: str, provider: str, extractor_version: int) -> Optional[str]:
+        rows = self.index.query(
+            "SELECT abstract FROM extracted WHERE url_hash = ? AND provider = ? AND extractor_version = ?",
+            (url_hash, provider, extractor_version),
+        )
+        return rows[0]["abstract"] if rows else None
+
+    def put_abstract(self, url_hash: str, provider: str, extractor_version: int, abstract: str):
+        with self.index.transaction() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO extracted (url_hash, provider, extractor_version, abstract, extracted_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (url_hash, provider, extractor_version, abstract, time.time()),
+            )
+
+    def purge_stale(self, provider: str, extractor_version: int) -> int:
+        """Drop a provider's entries written by older extractor versions."""
+        with self.index.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM extracted WHERE provider = ? AND extractor_version != ?",
+                (provider, extractor_version),
+            )
+            return cursor.rowcount
+
+
+_metadata_cache: Optional[MetadataCache] = None
+_metadata_cache_lock = threading.Lock()
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Return the process-wide metadata cache."""
+    global _metadata_cache
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache()
+        return _metadata_cache
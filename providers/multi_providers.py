@@ -2,15 +2,13 @@ from providers.provider import AbstractClassProvider
 
 
 class Wiley(AbstractClassProvider):
-    def get_abstract(self):
-        return super().get_abstract_by_class("article-section__content en main")
+    abstract_class = "article-section__content en main"
 
 
 class Frontiers(AbstractClassProvider):
-    def get_abstract(self):
-        return super().get_abstract_by_class("JournalAbstract")
+    abstract_class = "JournalAbstract"
 
 
 class MDPI(AbstractClassProvider):
-    def get_abstract(self):
-        return super().get_abstract_by_element("section", "html-abstract")
+    abstract_element = "section"
+    abstract_class = "html-abstract"
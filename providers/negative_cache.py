@@ -0,0 +1,119 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from core.config import NEGATIVE_CACHE_MAX_BACKOFF
+from .cache_index import CacheIndex, get_cache_index
+from .urls import normalize_url
+
+# Failure classes
+TIMEOUT = "timeout"
+BLOCKED = "blocked"
+PARSE_MISS = "parse_miss"
+HTTP_STATUS = "http_status"
+ERROR = "error"
+
+# First retry delay per failure class (seconds); doubles on every repeat failure
+BASE_BACKOFF = {
+    TIMEOUT: 10 * 60,
+    BLOCKED: 60 * 60,
+    PARSE_MISS: 7 * 24 * 3600,
+    HTTP_STATUS: 24 * 3600,
+    ERROR: 30 * 60,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS failures (
+    url TEXT PRIMARY KEY,
+    failure TEXT NOT NULL,
+    status_code INTEGER,
+    detail TEXT,
+    failures INTEGER NOT NULL DEFAULT 1,
+    failed_at REAL NOT NULL,
+    retry_after REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class FailureRecord:
+    url: str
+    failure: str
+    status_code: Optional[int]
+    detail: Optional[str]
+    failures: int
+    failed_at: float
+    retry_after: float
+
+    @property
+    def active(self) -> bool:
+        return time.time() < self.retry_after
+
+
+class KnownFailureError(Exception):
+    """Raised instead of going to the network for a URL that recently failed."""
+
+    def __init__(self, record: FailureRecord):
+        super().__init__(
+            f"Skipping {record.url}: {record.failure} failure #{record.failures}, "
+            f"retry after {time.ctime(record.retry_after)}"
+        )
+        self.record = record
+
+
+class NegativeCache:
+    """Remembers failed fetches and missing abstracts per normalized URL, with backoff."""
+
+    def __init__(self, index: CacheIndex = None):
+        self.index = index or get_cache_index()
+        self.index._connect().executescript(SCHEMA)
+
+    @staticmethod
+    def backoff(failure: str, status_code: Optional[int], failures: int) -> float:
+        base = BASE_BACKOFF.get(failure, BASE_BACKOFF[ERROR])
+        if failure == HTTP_STATUS and status_code and status_code >= 500:
+            base = BASE_BACKOFF[ERROR]
+        return min(base * 2 ** (failures - 1), NEGATIVE_CACHE_MAX_BACKOFF)
+
+    def record(self, url: str, failure: str, status_code: int = None, detail: str = None) -> FailureRecord:
+        key = normalize_url(url)
+        now = time.time()
+        with self.index.transaction() as conn:
+            row = conn.execute("SELECT failures FROM failures WHERE url = ?", (key,)).fetchone()
+            failures = row["failures"] + 1 if row else 1
+            retry_after = now + self.backoff(failure, status_code, failures)
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO failures (url, failure, status_code, detail, failures, failed_at, retry_after)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, failure, status_code, (detail or "")[:500], failures, now, retry_after),
+            )
+        return FailureRecord(key, failure, status_code, detail, failures, now, retry_after)
+
+    def lookup(self, url: str) -> Optional[FailureRecord]:
+        rows = self.index.query("SELECT * FROM failures WHERE url = ?", (normalize_url(url),))
+        return FailureRecord(**dict(rows[0])) if rows else None
+
+    def check(self, url: str) -> Optional[FailureRecord]:
+        """Return the failure record if the URL is still in backoff."""
+        record = self.lookup(url)
+        return record if record and record.active else None
+
+    def clear(self, url: str):
+        with self.index.transaction() as conn:
+            conn.execute("DELETE FROM failures WHERE url = ?", (normalize_url(url),))
+
+
+_negative_cache: Optional[NegativeCache] = None
+_negative_cache_lock = threading.Lock()
+
+
+def get_negative_cache() -> NegativeCache:
+    """Return the process-wide negative cache."""
+    global _negative_cache
+    with _negative_cache_lock:
+        if _negative_cache is None:
+            _negative_cache = NegativeCache()
+        return _negative_cache
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+from core.config import DOWNLOAD_DIR, PDF_STORE_DIR, PDF_INCOMING_DIR, BROWSER_DOWNLOAD_TIMEOUT
+from . import cache_index
+from .cache_index import CacheIndex, get_cache_index
+from .download_manager import is_valid_pdf
+from .urls import normalize_url
+
+# Alias kinds
+URL = "url"
+DOI = "doi"
+TITLE = "title"
+
+# Namespace of content-addressed entries in the cache index
+NAMESPACE = "sha256"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_aliases (
+    alias_type TEXT NOT NULL,
+    value TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (alias_type, value)
+);
+CREATE INDEX IF NOT EXISTS idx_pdf_aliases_sha256 ON pdf_aliases (sha256);
+"""
+
+# Files of downloads a browser is still writing
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".tmp")
+
+DOI_RE = re.compile(r"\b(10\.\d{4,9}/[^\s\"'<>?#]+)", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_title(title: str) -> str:
+    """Case and punctuation insensitive title key that, unlike generate_filename, keeps non-ASCII letters."""
+    title = unicodedata.normalize("NFKC", title).casefold()
+    return _NON_WORD_RE.sub(" ", title).strip()
+
+
+def extract_doi(*texts: Optional[str]) -> Optional[str]:
+    for text in texts:
+        if not text:
+            continue
+        match = DOI_RE.search(text)
+        if match:
+            return match.group(1).rstrip(".,;").lower()
+    return None
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 ** 2), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfStore:
+    """
+    PDFs stored once per content (SHA-256 of the bytes) under PDF_STORE_DIR,
+    found through aliases: the download URL, the DOI and the normalized title.
+    """
+
+    def __init__(self, root: str = PDF_STORE_DIR, index: CacheIndex = None):
+        self.root = root
+        self.index = index or get_cache_index()
+        self.index._connect().executescript(SCHEMA)
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], f"{sha256}.pdf")
+
+    def add(self, path: str, url: str = None, doi: str = None, title: str = None, sha256: str = None) -> str:
+        """Move a downloaded PDF into the store (dropping it if the content is known) and return its path."""
+        sha256 = sha256 or file_sha256(path)
+        target = self.path_for(sha256)
+        if os.path.exists(target):
+            if os.path.abspath(path) != os.path.abspath(target):
+                os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        self.index.put(cache_index.PDF, NAMESPACE, sha256, target, url=url)
+        self.add_aliases(sha256, url=url, doi=doi or extract_doi(url), title=title)
+        return target
+
+    def add_browser_download(self, directory: str, url: str = None, title: str = None,
+                             timeout: float = BROWSER_DOWNLOAD_TIMEOUT) -> Optional[str]:
+        """
+        Store the PDF a browser saved into `directory` (from browser_download_dir())
+        and remove the directory. Returns the stored path, or None if no valid PDF arrived.
+        """
+        try:
+            path = wait_for_download(directory, timeout)
+            if path is None or not is_valid_pdf(path):
+                return None
+            return self.add(path, url=url, title=title)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def add_aliases(self, sha256: str, url: str = None, doi: str = None, title: str = None):
+        aliases = []
+        if url:
+            aliases.append((URL, normalize_url(url)))
+        if doi:
+            aliases.append((DOI, doi.lower()))
+        if title and normalize_title(title):
+            aliases.append((TITLE, normalize_title(title)))
+        if not aliases:
+            return
+        with self.index.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pdf_aliases (alias_type, value, sha256) VALUES (?, ?, ?)",
+                [(alias_type, value, sha256) for alias_type, value in aliases],
+            )
+
+    def _resolve(self, alias_type: str, value: str) -> Optional[str]:
+        rows = self.index.query(
+            "SELECT sha256 FROM pdf_aliases WHERE alias_type = ? AND value = ?", (alias_type, value)
+        )
+        if not rows:
+            return None
+        entry = self.index.get(cache_index.PDF, NAMESPACE, rows[0]["sha256"])
+        # The file may have been evicted for space since the alias was written
+        if entry is None or not os.path.exists(entry.location):
+            return None
+        return entry.location
+
+    def lookup(self, url: str = None, doi: str = None, title: str = None) -> Optional[str]:
+        """Path of the stored PDF matching any of the given identifiers, most specific first."""
+        doi = doi or extract_doi(url)
+        candidates = [(DOI, doi.lower() if doi else None),
+                      (URL, normalize_url(url) if url else None),
+                      (TITLE, normalize_title(title) if title else None)]
+        for alias_type, value in candidates:
+            if value:
+                location = self._resolve(alias_type, value)
+                if location:
+                    return location
+        return None
+
+    def lookup_paper(self, paper: dict) -> Optional[str]:
+        download_url = paper.get("download_url")
+        doi = paper.get("doi") or extract_doi(download_url, paper.get("url"))
+        return self.lookup(url=download_url, doi=doi, title=paper.get("title"))
+
+    def migrate(self, papers: List[dict] = None, source_dir: str = DOWNLOAD_DIR) -> Dict[str, int]:
+        """
+        Move title-named PDFs from DOWNLOAD_DIR into the store. Titles, URLs and
+        DOIs are recovered from saved results whose generated filename matches.
+        """
+        from .provider import Provider
+
+        if papers is None:
+            papers = []
+            for entry in self.index.list(cache_index.RESULT):
+                try:
+                    with open(entry.location, "r") as f:
+                        papers.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        by_filename: Dict[str, List[dict]] = {}
+        for paper in papers:
+            if paper.get("title"):
+                by_filename.setdefault(Provider.generate_filename(paper["title"]), []).append(paper)
+
+        report = {"migrated": 0, "duplicates": 0, "invalid": 0}
+        for filename in sorted(os.listdir(source_dir)):
+            path = os.path.join(source_dir, filename)
+            if not filename.endswith(".pdf") or not os.path.isfile(path):
+                continue
+            key = os.path.splitext(filename)[0]
+            if not is_valid_pdf(path):
+                report["invalid"] += 1
+                continue
+
+            sha256 = file_sha256(path)
+            known = os.path.exists(self.path_for(sha256))
+            matches = by_filename.get(key, [])
+            entry = self.index.get(cache_index.PDF, "", key)
+            url = entry.url if entry else None
+            if url and len(matches) > 1:
+                # Colliding titles: the download URL tells which paper this file is
+                same_url = [p for p in matches if p.get("download_url") and normalize_url(p["download_url"]) == normalize_url(url)]
+                matches = same_url or matches
+            self.add(path, url=url, title=matches[0]["title"] if matches else key.replace("_", " "), sha256=sha256)
+            for paper in matches:
+                self.add_aliases(
+                    sha256,
+                    url=paper.get("download_url"),
+                    doi=paper.get("doi") or extract_doi(paper.get("download_url"), paper.get("url")),
+                    title=paper["title"],
+                )
+            self.index.remove(cache_index.PDF, "", key)
+            report["duplicates" if known else "migrated"] += 1
+        return report
+
+
+_pdf_store: Optional[PdfStore] = None
+_pdf_store_lock = threading.Lock()
+
+
+def get_pdf_store() -> PdfStore:
+    """Return the process-wide PDF store."""
+    global _pdf_store
+    with _pdf_store_lock:
+        if _pdf_store is None:
+            _pdf_store = PdfStore()
+        return _pdf_store
+
+
+def incoming_path(url: str) -> str:
+    """Where a download lands before it is hashed; stable per URL so it can resume."""
+    os.makedirs(PDF_INCOMING_DIR, exist_ok=True)
+    return os.path.join(PDF_INCOMING_DIR, f"{hashlib.md5(url.encode()).hexdigest()}.pdf")
+
+
+def browser_download_dir() -> str:
+    """A fresh directory for one browser-driven download to land in, so its file can be told apart."""
+    os.makedirs(PDF_INCOMING_DIR, exist_ok=True)
+    return tempfile.mkdtemp(prefix="browser-", dir=PDF_INCOMING_DIR)
+
+
+def wait_for_download(directory: str, timeout: float = BROWSER_DOWNLOAD_TIMEOUT) -> Optional[str]:
+    """Path of the PDF a browser saved into `directory`, once it is complete; None on timeout."""
+    deadline = time.monotonic() + timeout
+    while True:
+        names = os.listdir(directory)
+        pdfs = [name for name in names if name.lower().endswith(".pdf")]
+        if pdfs and not any(name.endswith(PARTIAL_SUFFIXES) for name in names):
+            return os.path.join(directory, pdfs[0])
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed PDF store maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="move title-named PDFs from the download dir into the store")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        report = get_pdf_store().migrate()
+        print(
+            f"Migrated {report['migrated']} PDFs, merged {report['duplicates']} duplicates, "
+            f"skipped {report['invalid']} invalid files"
+        )
+
+
+if __name__ == "__main__":
+    main()
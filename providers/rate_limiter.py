@@ -0,0 +1,297 @@
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+
+from core.config import (
+    RATE_LIMIT_DEFAULT, RATE_LIMITS, BLOCK_BACKOFF_BASE, BLOCK_BACKOFF_MAX,
+    RATE_LIMIT_SHARED, RATE_LIMIT_SLOT_POLL, RATE_LIMIT_SLOT_POLL_MAX, JOB_CONTROL_POLL_INTERVAL,
+)
+from core.job_control import JobCancelled, JobControl, current_control
+from .shared_limits import SharedLimits
+from .urls import get_domain
+
+THROUGHPUT_WINDOW = 60.0  # seconds
+
+
+@dataclass
+class DomainPolicy:
+    rate: float  # requests per second, sustained
+    burst: int  # requests allowed back to back
+    concurrency: int  # requests in flight at once
+    jitter: float  # max random extra delay per request (seconds)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class DomainLane:
+    """
+    Token bucket, concurrency limit and counters for one domain. With a
+    SharedLimits store the state lives there instead, shared across processes.
+    """
+
+    def __init__(self, domain: str, policy: DomainPolicy, store: Optional[SharedLimits] = None):
+        self.domain = domain
+        self.policy = policy
+        self.store = store
+        self.bucket = TokenBucket(policy.rate, policy.burst)
+        self.slots = threading.BoundedSemaphore(policy.concurrency)
+        self._lock = threading.Lock()
+        self.paused_until = 0.0
+        self.blocks = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._completed = deque()
+
+    def acquire_slot(self, timeout: Optional[float] = None, wait: Callable[[float], None] = time.sleep):
+        """
+        Take a request slot, waiting at most timeout seconds; returns a handle for release_slot, or None.
+        A shared slot is polled for with backoff, sleeping through `wait`, which may raise to give up.
+        """
+        if self.store is None:
+            return True if self.slots.acquire(timeout=timeout) else None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        poll = RATE_LIMIT_SLOT_POLL
+        while True:
+            holder = self.store.try_acquire_slot(self.domain, self.policy.concurrency)
+            if holder is not None:
+                return holder
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                poll = min(poll, remaining)
+            wait(poll)
+            poll = min(poll * 2, RATE_LIMIT_SLOT_POLL_MAX)
+
+    def release_slot(self, handle):
+        if self.store is None:
+            self.slots.release()
+        else:
+            self.store.release_slot(handle)
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it."""
+        if self.store is not None:
+            return self.store.reserve(self.domain, self.policy.rate, self.policy.burst)
+        return self.bucket.reserve()
+
+    def pause_remaining(self) -> float:
+        if self.store is not None:
+            return self.store.pause_remaining(self.domain)
+        return max(self.paused_until - time.time(), 0.0)
+
+    def report_block(self) -> float:
+        """Pause the lane with exponential backoff; returns the pause length."""
+        if self.store is not None:
+            return self.store.report_block(self.domain, self.policy.burst)
+        with self._lock:
+            self.blocks += 1
+            pause = min(BLOCK_BACKOFF_BASE * 2 ** (self.blocks - 1), BLOCK_BACKOFF_MAX)
+            self.paused_until = max(self.paused_until, time.time() + pause)
+            return pause
+
+    def report_success(self):
+        if self.store is not None:
+            self.store.report_success(self.domain)
+            return
+        with self._lock:
+            self.blocks = 0
+
+    def record_start(self, waited: float):
+        if self.store is not None:
+            self.store.record_start(self.domain, waited)
+            return
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def record_end(self):
+        if self.store is not None:
+            self.store.record_end(self.domain)
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            self._completed.append(now)
+            while self._completed and now - self._completed[0] > THROUGHPUT_WINDOW:
+                self._completed.popleft()
+
+    def metrics(self) -> dict:
+        if self.store is not None:
+            metrics = self.store.metrics().get(self.domain, {
+                "requests": 0, "in_flight": 0, "avg_wait": 0.0, "max_wait": 0.0, "total_wait": 0.0,
+                "requests_per_minute": 0.0, "paused_for": 0.0, "blocks": 0,
+            })
+            return {**metrics, "policy": self.policy.__dict__}
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(1 for t in self._completed if now - t <= THROUGHPUT_WINDOW)
+            return {
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "avg_wait": self.total_wait / self.requests if self.requests else 0.0,
+                "max_wait": self.max_wait,
+                "total_wait": self.total_wait,
+                "requests_per_minute": recent * 60.0 / THROUGHPUT_WINDOW,
+                "paused_for": max(self.paused_until - time.time(), 0.0),
+                "blocks": self.blocks,
+                "policy": self.policy.__dict__,
+            }
+
+
+class RateLimiter:
+    """
+    Process-wide politeness scheduler. Every request to a domain must go through
+    acquire(), which enforces that domain's rate, burst, concurrency and jitter.
+    With RATE_LIMIT_SHARED the limits are shared by every process on the host.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(RateLimiter, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._lanes: Dict[str, DomainLane] = {}
+        self._lanes_lock = threading.Lock()
+        self.store = SharedLimits() if RATE_LIMIT_SHARED else None
+        self._initialized = True
+
+    @staticmethod
+    def policy_for(domain: str) -> DomainPolicy:
+        # Exact domain first, then parent domains (www.example.com -> example.com)
+        parts = domain.split(".")
+        for i in range(len(parts) - 1):
+            candidate = ".".join(parts[i:])
+            if candidate in RATE_LIMITS:
+                return DomainPolicy(**{**RATE_LIMIT_DEFAULT, **RATE_LIMITS[candidate]})
+        return DomainPolicy(**RATE_LIMIT_DEFAULT)
+
+    def lane(self, url: str) -> DomainLane:
+        domain = get_domain(url)
+        with self._lanes_lock:
+            if domain not in self._lanes:
+                self._lanes[domain] = DomainLane(domain, self.policy_for(domain), self.store)
+            return self._lanes[domain]
+
+    @staticmethod
+    def _check(control: Optional[JobControl], url: str):
+        """Wait while the calling job is paused; raise JobCancelled if it was cancelled."""
+        if control is not None and not control.wait_if_paused():
+            raise JobCancelled(f"Not fetching {url}: job {control.job_id} was cancelled")
+
+    @staticmethod
+    def _sleep(seconds: float, control: Optional[JobControl], url: str):
+        """Sleep, waking up early with JobCancelled if the calling job is cancelled."""
+        if control is None:
+            time.sleep(seconds)
+        elif not control.sleep(seconds):
+            raise JobCancelled(f"Not fetching {url}: job {control.job_id} was cancelled")
+
+    def _take_slot(self, lane: DomainLane, control: Optional[JobControl], url: str):
+        if control is None:
+            return lane.acquire_slot()
+        if lane.store is not None:
+            # One wait, so the polls keep backing off; the job may pause or be cancelled between them
+            def wait(seconds: float):
+                self._sleep(seconds, control, url)
+                self._check(control, url)
+            return lane.acquire_slot(wait=wait)
+        while True:
+            slot = lane.acquire_slot(timeout=JOB_CONTROL_POLL_INTERVAL)
+            if slot is not None:
+                return slot
+            self._check(control, url)
+
+    @contextmanager
+    def acquire(self, url: str) -> Iterator[DomainLane]:
+        """
+        Block until a request to the URL's domain is allowed, and hold a slot for the block.
+        Waits give way to the calling job's control: a paused job waits without
+        holding a slot and a cancelled one gets JobCancelled.
+        """
+        lane = self.lane(url)
+        control = current_control()
+        started = time.monotonic()
+        while True:
+            self._check(control, url)
+            slot = self._take_slot(lane, control, url)
+            try:
+                remaining = lane.pause_remaining()
+                if remaining <= 0:
+                    delay = lane.reserve()
+                    if lane.policy.jitter:
+                        delay += random.uniform(0, lane.policy.jitter)
+                    if delay > 0:
+                        self._sleep(delay, control, url)
+                    break
+            except BaseException:
+                lane.release_slot(slot)
+                raise
+            # Sleep out a block pause without the slot; it may be extended meanwhile, so check again after
+            lane.release_slot(slot)
+            self._sleep(remaining, control, url)
+        try:
+            lane.record_start(time.monotonic() - started)
+            try:
+                yield lane
+            finally:
+                lane.record_end()
+        finally:
+            lane.release_slot(slot)
+
+    def report_block(self, url: str) -> float:
+        lane = self.lane(url)
+        pause = lane.report_block()
+        print(f"Blocked by {lane.domain}, pausing requests for {pause:.0f}s")
+        return pause
+
+    def report_success(self, url: str):
+        self.lane(url).report_success()
+
+    def paused_for(self, url: str) -> float:
+        """Seconds until requests to the URL's domain resume."""
+        return self.lane(url).pause_remaining()
+
+    def metrics(self) -> Dict[str, dict]:
+        with self._lanes_lock:
+            lanes = list(self._lanes.values())
+        if self.store is not None:
+            # Include domains only other processes have fetched from
+            for domain in self.store.metrics():
+                if domain not in self._lanes:
+                    lanes.append(self.lane(f"https://{domain}/"))
+        return {lane.domain: lane.metrics() for lane in lanes}
@@ -1,6 +1,8 @@
 from providers.provider import Provider
 
 class ScienceDirectProvider(Provider):
+    parse_targets = [("div", {"class": "abstract author"})]
+
     def get_abstract(self) -> str:
         abstract = self.soup.find("div", class_="abstract author")
         if abstract:
@@ -0,0 +1,216 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+from core.config import (
+    RATE_LIMIT_DB_PATH, RATE_LIMIT_SLOT_TIMEOUT, RATE_LIMIT_SLOT_RENEW_INTERVAL, BLOCK_BACKOFF_BASE, BLOCK_BACKOFF_MAX,
+)
+
+THROUGHPUT_WINDOW = 60.0  # seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS domains (
+    domain TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0,
+    blocks INTEGER NOT NULL DEFAULT 0,
+    requests INTEGER NOT NULL DEFAULT 0,
+    total_wait REAL NOT NULL DEFAULT 0,
+    max_wait REAL NOT NULL DEFAULT 0
+);
+-- Requests in flight; the holding process renews its rows, so those of a crashed one expire
+CREATE TABLE IF NOT EXISTS slots (
+    holder TEXT PRIMARY KEY,
+    domain TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_slots_domain ON slots (domain, expires_at);
+CREATE TABLE IF NOT EXISTS completions (
+    domain TEXT NOT NULL,
+    completed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions ON completions (domain, completed_at);
+"""
+
+
+def new_holder_id() -> str:
+    return f"{os.getpid()}:{uuid.uuid4().hex[:12]}"
+
+
+class SharedLimits:
+    """
+    Per-domain rate limiter state in SQLite (WAL), shared by every process
+    that fetches: token buckets, block pauses and backoff, in-flight slots and
+    counters. Used instead of in-memory lanes when jobs run in several
+    processes, so the per-domain limits hold across all of them.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH, slot_timeout: float = RATE_LIMIT_SLOT_TIMEOUT,
+                 renew_interval: float = RATE_LIMIT_SLOT_RENEW_INTERVAL):
+        self.path = path
+        self.slot_timeout = slot_timeout
+        self.renew_interval = renew_interval
+        self._local = threading.local()
+        # Slots this process holds; a heartbeat thread renews them while there are any
+        self._held: Set[str] = set()
+        self._held_lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # One connection per thread; WAL lets readers run alongside the writer
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _ensure(conn: sqlite3.Connection, domain: str, capacity: int):
+        conn.execute(
+            "INSERT OR IGNORE INTO domains (domain, tokens, updated_at) VALUES (?, ?, ?)",
+            (domain, float(capacity), time.time()),
+        )
+
+    def try_acquire_slot(self, domain: str, concurrency: int) -> Optional[str]:
+        """Take one of the domain's in-flight slots; returns its holder id, or None if all are taken."""
+        now = time.time()
+        holder = new_holder_id()
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM slots WHERE domain = ? AND expires_at < ?", (domain, now))
+            in_flight = conn.execute("SELECT COUNT(*) FROM slots WHERE domain = ?", (domain,)).fetchone()[0]
+            if in_flight >= concurrency:
+                return None
+            conn.execute(
+                "INSERT INTO slots (holder, domain, expires_at) VALUES (?, ?, ?)",
+                (holder, domain, now + self.slot_timeout),
+            )
+        self._hold(holder)
+        return holder
+
+    def release_slot(self, holder: str):
+        with self._held_lock:
+            self._held.discard(holder)
+        self._connect().execute("DELETE FROM slots WHERE holder = ?", (holder,))
+
+    def renew_slots(self, holders: List[str]):
+        """Push back the expiry of slots still in use."""
+        expires_at = time.time() + self.slot_timeout
+        with self.transaction() as conn:
+            conn.executemany("UPDATE slots SET expires_at = ? WHERE holder = ?",
+                             [(expires_at, holder) for holder in holders])
+
+    def _hold(self, holder: str):
+        with self._held_lock:
+            self._held.add(holder)
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._renew_loop, name="rate-limit-slots", daemon=True)
+                self._heartbeat.start()
+
+    def _renew_loop(self):
+        # Long requests keep their slots; the thread ends once none are held
+        while True:
+            time.sleep(self.renew_interval)
+            with self._held_lock:
+                holders = list(self._held)
+                if not holders:
+                    self._heartbeat = None
+                    return
+            try:
+                self.renew_slots(holders)
+            except sqlite3.Error as e:
+                print(f"Renewing rate limit slots failed: {e}")
+
+    def reserve(self, domain: str, rate: float, capacity: int) -> float:
+        """Take a token from the domain's bucket, returning how long the caller must wait before using it."""
+        now = time.time()
+        with self.transaction() as conn:
+            self._ensure(conn, domain, capacity)
+            row = conn.execute("SELECT tokens, updated_at FROM domains WHERE domain = ?", (domain,)).fetchone()
+            tokens = min(capacity, row["tokens"] + max(now - row["updated_at"], 0) * rate) - 1
+            conn.execute("UPDATE domains SET tokens = ?, updated_at = ? WHERE domain = ?", (tokens, now, domain))
+        return 0.0 if tokens >= 0 else -tokens / rate
+
+    def pause_remaining(self, domain: str) -> float:
+        row = self._connect().execute("SELECT paused_until FROM domains WHERE domain = ?", (domain,)).fetchone()
+        return max(row["paused_until"] - time.time(), 0.0) if row else 0.0
+
+    def report_block(self, domain: str, capacity: int) -> float:
+        """Pause the domain with exponential backoff; returns the pause length."""
+        with self.transaction() as conn:
+            self._ensure(conn, domain, capacity)
+            blocks = conn.execute("SELECT blocks FROM domains WHERE domain = ?", (domain,)).fetchone()[0] + 1
+            pause = min(BLOCK_BACKOFF_BASE * 2 ** (blocks - 1), BLOCK_BACKOFF_MAX)
+            conn.execute(
+                "UPDATE domains SET blocks = ?, paused_until = MAX(paused_until, ?) WHERE domain = ?",
+                (blocks, time.time() + pause, domain),
+            )
+        return pause
+
+    def report_success(self, domain: str):
+        self._connect().execute("UPDATE domains SET blocks = 0 WHERE domain = ? AND blocks > 0", (domain,))
+
+    def record_start(self, domain: str, waited: float):
+        self._connect().execute(
+            "UPDATE domains SET requests = requests + 1, total_wait = total_wait + ?, max_wait = MAX(max_wait, ?) "
+            "WHERE domain = ?",
+            (waited, waited, domain),
+        )
+
+    def record_end(self, domain: str):
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO completions (domain, completed_at) VALUES (?, ?)", (domain, now))
+            conn.execute("DELETE FROM completions WHERE domain = ? AND completed_at < ?",
+                         (domain, now - THROUGHPUT_WINDOW))
+
+    def metrics(self) -> Dict[str, dict]:
+        """Counters of every domain, in the shape of DomainLane.metrics() without the policy."""
+        now = time.time()
+        conn = self._connect()
+        in_flight = {
+            row["domain"]: row["n"]
+            for row in conn.execute(
+                "SELECT domain, COUNT(*) AS n FROM slots WHERE expires_at >= ? GROUP BY domain", (now,)
+            )
+        }
+        recent = {
+            row["domain"]: row["n"]
+            for row in conn.execute(
+                "SELECT domain, COUNT(*) AS n FROM completions WHERE completed_at >= ? GROUP BY domain",
+                (now - THROUGHPUT_WINDOW,),
+            )
+        }
+        metrics = {}
+        for row in conn.execute("SELECT * FROM domains"):
+            domain = row["domain"]
+            metrics[domain] = {
+                "requests": row["requests"],
+                "in_flight": in_flight.get(domain, 0),
+                "avg_wait": row["total_wait"] / row["requests"] if row["requests"] else 0.0,
+                "max_wait": row["max_wait"],
+                "total_wait": row["total_wait"],
+                "requests_per_minute": recent.get(domain, 0) * 60.0 / THROUGHPUT_WINDOW,
+                "paused_for": max(row["paused_until"] - now, 0.0),
+                "blocks": row["blocks"],
+            }
+        return metrics
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+from core.job_control import JobCancelled, current_control
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, callers arriving while it runs wait for and share its result
+    (or exception). Nothing is kept once the call finishes. A caller whose
+    leader was aborted by the cancel of another job tries again; one whose
+    own job is cancelled stops waiting with JobCancelled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    @staticmethod
+    def _follow(key: Hashable, future: Future):
+        """Wait for the leader's result; a cancel of the caller's own job ends the wait at once."""
+        control = current_control()
+        if control is None:
+            return future.result()
+        woken = threading.Event()
+        future.add_done_callback(lambda _: woken.set())
+        with control.on_cancel(woken.set):
+            woken.wait()
+        if not future.done():
+            raise JobCancelled(f"Stopped waiting for {key}: job {control.job_id} was cancelled")
+        return future.result()
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = Future()
+            if leader:
+                break
+            try:
+                return self._follow(key, future)
+            except JobCancelled:
+                control = current_control()
+                if control is not None and control.cancelled:
+                    raise
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight group for page fetches."""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+        return _single_flight
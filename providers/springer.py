@@ -2,6 +2,8 @@ from providers.provider import Provider
 
 
 class SpringerProvider(Provider):
+    parse_targets = [("div", {"id": "Abs1-content"})]
+
     def get_abstract(self) -> str:
         abstract = self.soup.find("div", id="Abs1-content")
         if abstract:
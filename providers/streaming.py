@@ -0,0 +1,157 @@
+import codecs
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from core.config import STREAM_CHUNK_SIZE, STREAM_MAX_BYTES, STREAM_MIN_META_LENGTH
+from .http_client import HttpClient
+from .negative_cache import get_negative_cache
+from .rate_limiter import RateLimiter
+
+# Meta tags that hold the full abstract; the first one seen ends the read
+ABSTRACT_META = ("citation_abstract", "dcterms.abstract", "dc.abstract")
+# Meta tags that often hold a shortened description; only used when the
+# head ends without a full abstract and the description looks complete
+DESCRIPTION_META = ("dc.description", "dcterms.description", "og:description", "twitter:description")
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+Target = Tuple[str, Dict[str, str]]
+
+
+@dataclass
+class StreamResult:
+    # Abstract read from a meta tag, if that is what ended the read
+    meta_abstract: Optional[str]
+    # The page up to the point where reading stopped
+    html: str
+    bytes_read: int
+
+
+def clean_meta(content: str) -> str:
+    return _SPACE_RE.sub(" ", _TAG_RE.sub(" ", content)).strip()
+
+
+def attr_matches(name: str, expected: str, actual: Optional[str]) -> bool:
+    """Same rule as BeautifulSoup: a single class matches any of the tag's classes."""
+    if actual is None:
+        return False
+    if name == "class" and " " not in expected:
+        return expected in actual.split()
+    return actual == expected
+
+
+class AbstractStreamParser(HTMLParser):
+    """
+    Incremental parser fed page chunks as they arrive. `done` turns True once an
+    abstract meta tag has been read or one of the target elements has closed.
+    """
+
+    def __init__(self, targets: Optional[List[Target]] = None):
+        super().__init__(convert_charrefs=True)
+        self.targets = targets or []
+        self.meta_abstract: Optional[str] = None
+        self.description: Optional[str] = None
+        self.target_found = False
+        self._head_done = False
+        self._open_target: Optional[str] = None
+        self._depth = 0
+
+    @property
+    def done(self) -> bool:
+        return self.meta_abstract is not None or self.target_found
+
+    def _matches_target(self, tag: str, attrs: Dict[str, Optional[str]]) -> bool:
+        for name, expected_attrs in self.targets:
+            if tag == name and all(attr_matches(k, v, attrs.get(k)) for k, v in expected_attrs.items()):
+                return True
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        if tag == "meta":
+            self._handle_meta(attrs)
+        elif tag == "body":
+            self._end_of_head()
+        elif self._open_target is not None:
+            if tag == self._open_target:
+                self._depth += 1
+        elif self._matches_target(tag, attrs):
+            self._open_target = tag
+            self._depth = 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "meta" and not self.done:
+            self._handle_meta(dict(attrs))
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == "head":
+            self._end_of_head()
+        elif self._open_target is not None and tag == self._open_target:
+            self._depth -= 1
+            if self._depth == 0:
+                self.target_found = True
+
+    def _handle_meta(self, attrs):
+        name = (attrs.get("name") or attrs.get("property") or "").lower()
+        content = attrs.get("content")
+        if not content:
+            return
+        if name in ABSTRACT_META:
+            self.meta_abstract = clean_meta(content)
+        elif name in DESCRIPTION_META and self.description is None:
+            self.description = clean_meta(content)
+
+    def _end_of_head(self):
+        if self._head_done:
+            return
+        self._head_done = True
+        description = self.description
+        if (description and len(description) >= STREAM_MIN_META_LENGTH
+                and not description.endswith(("...", "…"))):
+            self.meta_abstract = description
+
+
+def stream_abstract(url: str, targets: Optional[List[Target]] = None) -> Optional[StreamResult]:
+    """
+    GET a page over plain HTTP and parse it as it downloads, stopping at the
+    first abstract meta tag or the first complete target element. Returns None
+    when the page can't be streamed or neither shows up; callers then fall
+    back to the full-page fetch, which also handles failure bookkeeping.
+    """
+    if get_negative_cache().check(url):
+        return None
+
+    with RateLimiter().acquire(url):
+        response = HttpClient().get(url, stream=True)
+        try:
+            content_type = response.headers.get("Content-Type", "")
+            if response.status_code != 200 or "html" not in content_type.lower():
+                return None
+
+            # requests assumes ISO-8859-1 for text/* without a charset; pages are almost always UTF-8
+            encoding = response.encoding if "charset" in content_type.lower() else "utf-8"
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            parser = AbstractStreamParser(targets)
+            chunks = []
+            bytes_read = 0
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                bytes_read += len(chunk)
+                text = decoder.decode(chunk)
+                chunks.append(text)
+                parser.feed(text)
+                if parser.done or bytes_read >= STREAM_MAX_BYTES:
+                    break
+        finally:
+            # Drops the connection if the body wasn't read to the end
+            response.close()
+
+    if not parser.done:
+        return None
+    return StreamResult(parser.meta_abstract, "".join(chunks), bytes_read)
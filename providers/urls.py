@@ -0,0 +1,26 @@
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+def get_domain(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as a key for per-URL state (failures, in-flight fetches)."""
+    parsed = urlparse(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ]
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((
+        parsed.scheme.lower(),
+        parsed.netloc.lower(),
+        path,
+        parsed.params,
+        urlencode(sorted(query)),
+        "",
+    ))
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import Any, Dict, List, Optional
 import os
 import logging
 import traceback
@@ -21,7 +21,7 @@ logger = logging.getLogger("server")
 load_dotenv()
 
 from shared.schemas import (
-    SearchQueryRequest, JobResponse, JobDetailResponse, CancelJobResponse,
+    SearchQueryRequest, JobResponse, JobDetailResponse, CancelJobResponse, PauseJobResponse, ResumeJobResponse,
     SLRGenerateRequest, ResearchQuestionsModel, SLRRefineRequest,
     SLRQueryRequest, SLRQueryResponse, SLRFilterRequest, FilterResponse,
     DownloadRequest, DownloadResponse, SearchQueryModel
@@ -36,6 +36,9 @@ from slr.workflow import SLRWorkflow
 from slr.workflow import SLRWorkflow
 from ai import get_provider
 from server.extension import router as extension_router
+from providers.cache_manager import CacheManager
+from providers.rate_limiter import RateLimiter
+from core.pipeline import Pipeline
 
 app = FastAPI(title="SLR Worker API", version="1.0.0")
 
@@ -64,6 +67,15 @@ async def unhandled_exception_handler(request, exc):
 
 # --- Service Instances ---
 job_manager = JobManager()
+cache_manager = CacheManager()
+
+@app.on_event("startup")
+def start_cache_compaction():
+    cache_manager.start()
+
+@app.on_event("shutdown")
+def stop_cache_compaction():
+    cache_manager.stop()
 
 # --- Job Routes ---
 
@@ -71,6 +83,16 @@ job_manager = JobManager()
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics/fetch")
+def fetch_metrics():
+    """Per-domain wait time and throughput from the shared rate limiter."""
+    return RateLimiter().metrics()
+
+@app.get("/metrics/pipeline")
+def pipeline_metrics():
+    """Queue depth, busy workers and latency per stage of every running search."""
+    return Pipeline.running()
+
 @app.post("/jobs", response_model=JobResponse)
 def submit_job(req: SearchQueryRequest):
     logger.info(f"Submitting job: query='{req.query}', max_results={req.max_results}")
@@ -106,6 +128,13 @@ def get_job(job_id: str):
     base_data = _map_job_to_response(job).model_dump()
     return JobDetailResponse(**base_data, logs=logs, results=results)
 
+@app.get("/jobs/{job_id}/results", response_model=List[Dict[str, Any]])
+def get_job_results(job_id: str, offset: int = 0, limit: Optional[int] = None):
+    """Results found so far; poll with offset to receive only new papers of a running job."""
+    if not job_manager.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_manager.get_job_results(job_id, offset, limit)
+
 @app.post("/jobs/{job_id}/cancel", response_model=CancelJobResponse)
 def cancel_job(job_id: str):
     success = job_manager.cancel_job(job_id)
@@ -116,6 +145,26 @@ def cancel_job(job_id: str):
         logger.warning(f"Failed to cancel job: {job_id} (not found or finished)")
         return CancelJobResponse(success=False, message="Job not found or already completed")
 
+@app.post("/jobs/{job_id}/pause", response_model=PauseJobResponse)
+def pause_job(job_id: str):
+    success = job_manager.pause_job(job_id)
+    if success:
+        logger.info(f"Job paused: {job_id}")
+        return PauseJobResponse(success=True, message="Job paused")
+    else:
+        logger.warning(f"Failed to pause job: {job_id} (not found or not running)")
+        return PauseJobResponse(success=False, message="Job not found or not running")
+
+@app.post("/jobs/{job_id}/resume", response_model=ResumeJobResponse)
+def resume_job(job_id: str):
+    success = job_manager.resume_job(job_id)
+    if success:
+        logger.info(f"Job resumed: {job_id}")
+        return ResumeJobResponse(success=True, message="Job resumed, or queued to continue from its last checkpoint")
+    else:
+        logger.warning(f"Failed to resume job: {job_id} (not found, still active or nothing left to do)")
+        return ResumeJobResponse(success=False, message="Job not found, still active or already complete")
+
 def _map_job_to_response(job) -> JobResponse:
     # Helper to map internal Job object to Pydantic model
     return JobResponse(
@@ -125,7 +174,9 @@ def _map_job_to_response(job) -> JobResponse:
         progress=job.progress,
         total_results=job.total_results,
         created_at=job.created_at.isoformat(),
-        error=job.error
+        error=job.error,
+        throttled=job.throttled_until is not None,
+        throttled_until=job.throttled_until.isoformat() if job.throttled_until else None
     )
 
 # --- SLR Routes ---
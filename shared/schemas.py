@@ -11,6 +11,7 @@ class JobStatusEnum(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    PAUSED = "paused"
 
 # --- Common Models ---
 
@@ -29,6 +30,8 @@ class JobResponse(BaseModel):
     total_results: int
     created_at: str
     error: Optional[str] = None
+    throttled: bool = False
+    throttled_until: Optional[str] = None
     
 class JobDetailResponse(JobResponse):
     logs: List[str] = []
@@ -38,6 +41,14 @@ class CancelJobResponse(BaseModel):
     success: bool
     message: str
 
+class PauseJobResponse(BaseModel):
+    success: bool
+    message: str
+
+class ResumeJobResponse(BaseModel):
+    success: bool
+    message: str
+
 # --- SLR Models ---
 
 class SLRGenerateRequest(BaseModel):
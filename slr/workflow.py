@@ -1,6 +1,7 @@
 import os
 import zipfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -9,8 +10,9 @@ import json
 from ai.base import LLMProvider
 from api.job_manager import JobManager
 from workers.job import JobStatus
-from core.config import DOWNLOAD_DIR
+from core.config import DOWNLOAD_DIR, DOWNLOAD_WORKERS
 from providers.provider import Provider
+from providers.pdf_store import get_pdf_store
 
 from .question_generator import ResearchQuestionGenerator, ResearchQuestions
 from .query_generator import QueryGenerator, SearchQuery
@@ -127,7 +129,10 @@ class SLRWorkflow:
 
     def download_and_zip_pdfs(self, papers: List[Dict], workflow_id: str) -> Optional[str]:
         """Step 7: Download PDFs for included papers and create zip."""
+        # (path, name in the zip) per paper
         downloaded_files = []
+        to_download = []
+        store = get_pdf_store()
         
         for paper in papers:
             download_url = paper.get("download_url")
@@ -135,21 +140,28 @@ class SLRWorkflow:
                 continue
             
             title = paper.get("title", "Unknown")
-            filename = Provider.generate_filename(title)
-            filepath = os.path.join(DOWNLOAD_DIR, f"{filename}.pdf")
             
             # Check if already downloaded
-            if os.path.exists(filepath):
-                downloaded_files.append(filepath)
+            path = store.lookup_paper(paper)
+            if path is not None:
+                downloaded_files.append((path, title))
                 continue
-            
-            # Try to download
+            to_download.append((title, download_url))
+
+        # Download in parallel; the download manager bounds each domain on its own
+        def download(item):
+            title, url = item
             try:
-                success, path = Provider.download_pdf(title, download_url)
-                if success:
-                    downloaded_files.append(path)
+                return Provider.download_pdf(title, url)
             except Exception as e:
                 print(f"Failed to download {title}: {e}")
+                return False, None
+
+        if to_download:
+            with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(to_download))) as executor:
+                for (title, _), (success, path) in zip(to_download, executor.map(download, to_download)):
+                    if success:
+                        downloaded_files.append((path, title))
         
         if not downloaded_files:
             return None
@@ -158,9 +170,18 @@ class SLRWorkflow:
         zip_path = os.path.join(DOWNLOAD_DIR, f"slr_{workflow_id}.zip")
         
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for filepath in downloaded_files:
-                arcname = os.path.basename(filepath)
-                zipf.write(filepath, arcname)
+            added = set()
+            names = set()
+            for filepath, title in downloaded_files:
+                # Stored files are named by content hash; the same PDF under two titles is zipped once
+                if filepath in added:
+                    continue
+                added.add(filepath)
+                name = Provider.generate_filename(title) or "paper"
+                if name in names:
+                    name = f"{name}_{os.path.basename(filepath)[:8]}"
+                names.add(name)
+                zipf.write(filepath, f"{name}.pdf")
         
         return zip_path
 
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing the worker package first settles the extract_searches <-> workers import cycle
+import workers  # noqa: E402,F401
+from providers import cache_index  # noqa: E402
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    """A CacheIndex in a temporary directory that knows nothing of the real .data."""
+    for name in ("SEARCH_DIR", "RESULTS_DIR", "DOWNLOAD_DIR", "PDF_STORE_DIR"):
+        path = tmp_path / name.lower()
+        path.mkdir()
+        monkeypatch.setattr(cache_index, name, str(path))
+    return cache_index.CacheIndex(str(tmp_path / "cache_index.db"))
@@ -0,0 +1,51 @@
+import pytest
+
+from providers import browser_pool
+from providers.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    def __init__(self, headless):
+        self.quit_called = False
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(browser_pool, "_FACTORIES", {"firefox": FakeDriver, "chrome": FakeDriver})
+    monkeypatch.setattr(BrowserPool, "_instance", None)
+    instance = BrowserPool()
+    instance.size = 2
+    instance._slots = {b: browser_pool.threading.BoundedSemaphore(2) for b in browser_pool.BROWSERS}
+    yield instance
+    instance.close()
+
+
+def test_warm_up_counts_leased_drivers(pool):
+    with pool.lease("firefox"), pool.lease("firefox"):
+        pool.warm_up("firefox")
+        assert pool._idle["firefox"] == []
+    assert len(pool._idle["firefox"]) == 2
+    assert pool._live["firefox"] == 2
+
+
+def test_warm_up_tops_up_to_the_pool_size(pool):
+    with pool.lease("chrome"):
+        pool.warm_up("chrome")
+    assert len(pool._idle["chrome"]) == 2
+    pool.warm_up("chrome")
+    assert len(pool._idle["chrome"]) == 2
+
+
+def test_failed_start_is_not_counted(pool, monkeypatch):
+    def broken(headless):
+        raise RuntimeError("no browser installed")
+    monkeypatch.setitem(browser_pool._FACTORIES, "firefox", broken)
+    with pytest.raises(RuntimeError):
+        pool.warm_up("firefox")
+    assert pool._live["firefox"] == 0
@@ -0,0 +1,91 @@
+import os
+import time
+
+from providers import cache_index
+from providers.cache_index import HTML
+
+
+def put(index, key, tmp_path):
+    path = tmp_path / f"{key}.html"
+    path.write_text("<html></html>")
+    index.put(HTML, "Provider", key, str(path))
+
+
+def test_hits_are_written_in_batches(index, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_index, "CACHE_TOUCH_INTERVAL", 3600)
+    monkeypatch.setattr(cache_index, "CACHE_TOUCH_BATCH", 2)
+    put(index, "a", tmp_path)
+    put(index, "b", tmp_path)
+
+    index.touch(HTML, "Provider", "a")
+    index.touch(HTML, "Provider", "a")
+    assert index.get(HTML, "Provider", "a").hits == 0
+
+    index.touch(HTML, "Provider", "b")
+    assert index.get(HTML, "Provider", "a").hits == 2
+    assert index.get(HTML, "Provider", "b").hits == 1
+
+
+def test_eviction_order_sees_buffered_hits(index, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_index, "CACHE_TOUCH_INTERVAL", 3600)
+    put(index, "old", tmp_path)
+    put(index, "new", tmp_path)
+
+    index.touch(HTML, "Provider", "old")
+    assert [entry.key for entry in index.least_recently_used(HTML)] == ["new", "old"]
+
+
+def test_put_get_and_url_lookup(index, tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<html>abc</html>")
+    index.put(HTML, "Provider", "k", str(path), url="https://example.org/a")
+
+    entry = index.get(HTML, "Provider", "k")
+    assert (entry.location, entry.size, entry.url) == (str(path), path.stat().st_size, "https://example.org/a")
+    assert [e.key for e in index.find_by_url("https://example.org/a", HTML)] == ["k"]
+    assert index.get(HTML, "Other", "k") is None
+
+
+def test_put_again_keeps_the_known_url(index, tmp_path):
+    put(index, "k", tmp_path)
+    index.put(HTML, "Provider", "k", str(tmp_path / "k.html"), url="https://example.org/a")
+    put(index, "k", tmp_path)
+    assert index.get(HTML, "Provider", "k").url == "https://example.org/a"
+
+
+def test_remove_drops_validators(index, tmp_path):
+    put(index, "k", tmp_path)
+    index.set_validators(HTML, "Provider", "k", {"etag": '"v1"'})
+    assert index.get_validators(HTML, "Provider", "k") == {"etag": '"v1"'}
+
+    index.remove(HTML, "Provider", "k")
+    assert index.get(HTML, "Provider", "k") is None
+    assert index.get_validators(HTML, "Provider", "k") == {}
+
+
+def test_older_than_can_skip_revalidatable_entries(index, tmp_path):
+    put(index, "plain", tmp_path)
+    put(index, "validated", tmp_path)
+    index.set_validators(HTML, "Provider", "validated", {"last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    later = time.time() + 1
+    assert {e.key for e in index.older_than(HTML, "Provider", later)} == {"plain", "validated"}
+    assert {e.key for e in index.older_than(HTML, "Provider", later, with_validators=False)} == {"plain"}
+
+
+def test_rebuild_indexes_files_on_disk(index):
+    html = os.path.join(cache_index.SEARCH_DIR, "ab", "IEEEXplore_" + "a" * 32 + ".html.gz")
+    os.makedirs(os.path.dirname(html))
+    open(html, "wb").close()
+    result = os.path.join(cache_index.RESULTS_DIR, "IEEEXplore_" + "b" * 32 + ".json")
+    with open(result, "w") as f:
+        f.write("{}")
+    open(os.path.join(cache_index.DOWNLOAD_DIR, "Some_paper.pdf"), "wb").close()
+
+    assert index.rebuild() == 3
+    assert index.get(HTML, "IEEEXplore", "a" * 32).location == html
+    assert index.get(cache_index.RESULT, "IEEEXplore", "b" * 32).location == result
+    assert index.get(cache_index.PDF, "", "Some_paper") is not None
+    assert index.stats() == {"html:IEEEXplore": {"entries": 1, "bytes": 0},
+                             "result:IEEEXplore": {"entries": 1, "bytes": 2},
+                             "pdf": {"entries": 1, "bytes": 0}}
@@ -0,0 +1,46 @@
+import time
+
+from providers.cache_index import HTML
+from providers.cache_manager import CacheManager
+from providers.ieeexplore import IEEEXplore
+
+DAY = 24 * 3600
+
+
+def add_page(index, tmp_path, key, fetched_at, size=100):
+    path = tmp_path / f"{key}.html"
+    path.write_bytes(b"x" * size)
+    index.put(HTML, "IEEEXplore", key, str(path), size=size, fetched_at=fetched_at)
+    return path
+
+
+def test_expired_pages_without_validators_are_dropped(index, tmp_path):
+    expired = time.time() - IEEEXplore.cache_ttl - DAY
+    path = add_page(index, tmp_path, "a" * 32, expired)
+
+    report = CacheManager(max_bytes=10 ** 9, html_dir=str(tmp_path), index=index).compact()
+    assert report.expired == 1
+    assert not path.exists()
+    assert index.get(HTML, "IEEEXplore", "a" * 32) is None
+
+
+def test_expired_pages_with_validators_are_kept_for_revalidation(index, tmp_path):
+    expired = time.time() - IEEEXplore.cache_ttl - DAY
+    path = add_page(index, tmp_path, "b" * 32, expired)
+    index.set_validators(HTML, "IEEEXplore", "b" * 32, {"etag": '"v1"'})
+
+    report = CacheManager(max_bytes=10 ** 9, html_dir=str(tmp_path), index=index).compact()
+    assert report.expired == 0
+    assert path.exists()
+    assert index.get_validators(HTML, "IEEEXplore", "b" * 32) == {"etag": '"v1"'}
+
+
+def test_pages_with_validators_still_go_under_size_pressure(index, tmp_path):
+    expired = time.time() - IEEEXplore.cache_ttl - DAY
+    add_page(index, tmp_path, "c" * 32, expired, size=1000)
+    index.set_validators(HTML, "IEEEXplore", "c" * 32, {"etag": '"v1"'})
+
+    report = CacheManager(max_bytes=500, html_dir=str(tmp_path), index=index).compact()
+    assert report.evicted == 1
+    assert index.get(HTML, "IEEEXplore", "c" * 32) is None
+    assert index.get_validators(HTML, "IEEEXplore", "c" * 32) == {}
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from extract_searches import SearchEngine, SearchRun
+from providers import GoogleScholarProvider
+from workers import job_storage, worker
+from workers.job import Job, JobConfig, JobStatus
+from workers.job_storage import JobStorage
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_storage, "JOBS_DIR", str(tmp_path))
+    (tmp_path / "job").mkdir()
+    return tmp_path
+
+
+def paper(page, n):
+    return {"title": f"Paper {page}.{n}", "url": f"https://example.org/{page}/{n}"}
+
+
+class FakePage:
+    def __init__(self, page):
+        self.page = page
+
+    def parse_entries(self, logger=None):
+        return [paper(self.page, n) for n in range(2)]
+
+
+class FakeEngine(SearchEngine):
+    def __init__(self):
+        super().__init__()
+        self.fetched = []
+
+    def _fetch_page(self, url, stop_check, throttle_callback, logger):
+        page = int(url.split("start=")[1].split("&")[0]) // 10
+        self.fetched.append(page)
+        return FakePage(page)
+
+    def _save_result(self, paper):
+        pass
+
+
+def search(engine, checkpoint=None):
+    saved = []
+    results = list(engine.iter_search("solar cells", JobConfig(max_results=30), checkpoint=checkpoint,
+                                      checkpoint_callback=saved.append))
+    return results, saved
+
+
+def test_checkpoint_tracks_pages_and_is_cleared_at_the_end(monkeypatch):
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda p: p))
+    results, saved = search(FakeEngine())
+    assert len(results) == 6
+    assert saved[-1] is None
+    last = saved[-2]
+    assert last["completed_pages"] == [0, 1, 2]
+    assert last["last_completed_index"] == 20
+    assert last["emitted"] == 6
+    assert last["pending"] == {}
+
+
+def test_resume_skips_done_pages_and_enriches_leftovers(monkeypatch):
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda p: {**p, "abstract": "Text"}))
+    checkpoint = {"completed_pages": [0], "emitted": 2, "pending": {"1": [paper(1, 1)]}}
+    engine = FakeEngine()
+
+    results, saved = search(engine, checkpoint)
+    assert engine.fetched == [2]
+    assert sorted(r["title"] for r in results) == ["Paper 1.1", "Paper 2.0", "Paper 2.1"]
+    assert all(r["abstract"] == "Text" for r in results)
+    assert saved[-1] is None
+
+
+def test_async_job_keeps_its_file_io_off_the_loop(jobs_dir, monkeypatch):
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda p: p))
+    monkeypatch.setattr(worker, "SearchEngine", FakeEngine)
+    monkeypatch.setattr(worker, "JOBS_DIR", str(jobs_dir))
+    JobStorage.save_job(Job("job", "solar cells", JobStatus.PENDING, JobConfig(max_results=30), datetime.now()))
+
+    on_loop = []
+    for name in ("load_job", "save_job", "load_checkpoint", "reset_results", "append_result",
+                 "save_checkpoint", "delete_checkpoint"):
+        def spy(*args, _name=name, _func=getattr(JobStorage, name)):
+            if threading.current_thread() is loop_thread:
+                on_loop.append(_name)
+            return _func(*args)
+        monkeypatch.setattr(JobStorage, name, staticmethod(spy))
+
+    async def run_job():
+        nonlocal loop_thread
+        loop_thread = threading.current_thread()
+        blocking = lambda func, *args, **kwargs: asyncio.get_running_loop().run_in_executor(None, func, *args)
+        search_worker = await blocking(worker.SearchWorker, "job")
+        await search_worker.run_async(blocking)
+
+    loop_thread = None
+    asyncio.run(run_job())
+    assert on_loop == []
+    assert JobStorage.load_job("job").status == JobStatus.COMPLETED
+    assert len(JobStorage.get_results("job")) == 6
+
+
+def test_source_puts_leftovers_first():
+    checkpoint = {"completed_pages": [0], "emitted": 2, "pending": {"2": [paper(2, 0)]}}
+    run = SearchRun(None, "solar cells", JobConfig(max_results=30), checkpoint=checkpoint)
+    assert run.count == 2
+    assert run.source() == [(2, [paper(2, 0)]), (1, None)]
+
+
+def test_checkpoint_storage_round_trip():
+    JobStorage.save_checkpoint("job", {"completed_pages": [0], "emitted": 2})
+    assert JobStorage.load_checkpoint("job") == {"completed_pages": [0], "emitted": 2}
+    JobStorage.delete_checkpoint("job")
+    assert JobStorage.load_checkpoint("job") is None
+
+
+def test_results_log_is_trimmed_to_the_checkpoint():
+    for n in range(3):
+        JobStorage.append_result("job", paper(0, n))
+    with open(JobStorage._get_results_log_path("job"), "a") as f:
+        f.write('{"title": "half a li')
+
+    JobStorage.trim_results("job", 2)
+    assert [r["title"] for r in JobStorage.iter_results("job")] == ["Paper 0.0", "Paper 0.1"]
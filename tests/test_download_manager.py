@@ -0,0 +1,155 @@
+import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+import pytest
+
+from providers import download_manager, pdf_store, provider
+from providers.download_manager import DownloadManager, DownloadError, PART_SUFFIX, STATE_SUFFIX
+
+BODY = b"%PDF-1.7\n" + bytes(range(256)) * 64
+URL = "https://example.org/paper.pdf"
+
+
+class FakeResponse:
+    def __init__(self, status_code, data, headers, delay=0.0):
+        self.delay = delay
+        self.status_code = status_code
+        self.headers = headers
+        self.url = URL
+        self._data = data
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self._data), chunk_size):
+            time.sleep(self.delay)
+            yield self._data[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeServer:
+    """Serves BODY with Range/If-Range support; can drop the connection after some bytes."""
+
+    def __init__(self, body=BODY, ranges=True, etag='"v1"'):
+        self.body = body
+        self.ranges = ranges
+        self.etag = etag
+        self.drop_after = None
+        self.delay = 0.0
+        self.requests = []
+
+    def get(self, url, stream=True, headers=None):
+        headers = headers or {}
+        self.requests.append(headers.get("Range"))
+        common = {"ETag": self.etag}
+        match = re.match(r"bytes=(\d+)-(\d*)", headers.get("Range", ""))
+        if match and self.ranges and headers.get("If-Range", self.etag) == self.etag:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(self.body) - 1
+            status, data = 206, self.body[start:end + 1]
+        else:
+            status, data = 200, self.body
+            common.update({"Content-Length": str(len(self.body)),
+                           "Accept-Ranges": "bytes" if self.ranges else "none"})
+        if self.drop_after is not None:
+            data, self.drop_after = data[:self.drop_after], None
+        return FakeResponse(status, data, common, self.delay)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(download_manager, "HttpClient", lambda: server)
+    monkeypatch.setattr(download_manager, "RateLimiter", lambda: type("Limiter", (), {"acquire": lambda self, url: nullcontext()})())
+    monkeypatch.setattr(download_manager, "DOWNLOAD_CHUNK_SIZE", 1024)
+    return server
+
+
+@pytest.fixture
+def dest(tmp_path):
+    return str(tmp_path / "paper.pdf")
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_small_file_is_streamed_in_one_request(server, dest):
+    assert DownloadManager().download(URL, dest) == dest
+    assert read(dest) == BODY
+    assert server.requests == [None]
+    assert not os.path.exists(dest + PART_SUFFIX)
+    assert not os.path.exists(dest + STATE_SUFFIX)
+
+
+def test_large_file_is_fetched_as_parallel_ranges(server, dest, monkeypatch):
+    monkeypatch.setattr(download_manager, "DOWNLOAD_SEGMENT_MIN_SIZE", 1024)
+    monkeypatch.setattr(download_manager, "DOWNLOAD_SEGMENTS", 4)
+    DownloadManager().download(URL, dest)
+    assert read(dest) == BODY
+    assert len([r for r in server.requests if r]) == 4
+
+
+def test_interrupted_download_resumes_where_it_stopped(server, dest):
+    server.drop_after = 5000
+    with pytest.raises(DownloadError):
+        DownloadManager().download(URL, dest)
+    assert os.path.exists(dest + PART_SUFFIX)
+
+    DownloadManager().download(URL, dest)
+    assert read(dest) == BODY
+    assert server.requests[-1] == f"bytes=5000-{len(BODY) - 1}"
+
+
+def test_changed_file_restarts_the_download(server, dest):
+    server.drop_after = 5000
+    with pytest.raises(DownloadError):
+        DownloadManager().download(URL, dest)
+
+    server.etag = '"v2"'
+    DownloadManager().download(URL, dest)
+    assert read(dest) == BODY
+    assert server.requests[-2:] == [f"bytes=5000-{len(BODY) - 1}", None]
+
+
+def test_error_page_is_not_kept(server, dest):
+    server.body = b"<html>Access denied</html>" * 100
+    with pytest.raises(DownloadError):
+        DownloadManager().download(URL, dest)
+    for path in (dest, dest + PART_SUFFIX, dest + STATE_SUFFIX):
+        assert not os.path.exists(path)
+
+
+def concurrently(func, callers=2):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(func())) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_downloads_to_one_file_do_not_interleave(server, dest):
+    server.delay = 0.01
+    results = concurrently(lambda: DownloadManager().download(URL, dest))
+    assert results == [dest, dest]
+    assert read(dest) == BODY
+    assert DownloadManager()._dest_locks == {}
+
+
+def test_concurrent_pdf_downloads_of_one_url_share_the_transfer(server, index, tmp_path, monkeypatch):
+    store = pdf_store.PdfStore(str(tmp_path / "objects"), index=index)
+    monkeypatch.setattr(provider, "get_pdf_store", lambda: store)
+    monkeypatch.setattr(pdf_store, "PDF_INCOMING_DIR", str(tmp_path / "incoming"))
+    server.delay = 0.01
+
+    results = concurrently(lambda: provider.Provider.download_pdf("Some Paper", URL))
+    assert len(server.requests) == 1
+    assert results[0] == results[1]
+    assert results[0][0] is True
+    assert read(results[0][1]) == BODY
@@ -0,0 +1,25 @@
+from providers import GoogleScholarProvider, EmptyProvider
+from providers.provider import Provider
+from providers import negative_cache
+
+PAPER = {"title": "Paper", "url": "https://unknown.example.org/paper/1", "abstract": "Abstract not found"}
+
+
+def test_unmapped_domain_is_not_fetched(monkeypatch, tmp_path):
+    fetches = []
+    monkeypatch.setattr(Provider, "get_html_cache", lambda self: fetches.append(self.url))
+    monkeypatch.setattr(Provider, "get_html", lambda self: fetches.append(self.url))
+    monkeypatch.setattr(Provider, "stream", lambda self: fetches.append(self.url) or False)
+    monkeypatch.setattr(negative_cache.NegativeCache, "check", lambda self, url: False)
+
+    paper = GoogleScholarProvider.enrich(PAPER)
+    assert fetches == []
+    assert paper["provider"] == EmptyProvider.__name__
+    assert paper["abstract"] == "Abstract not found"
+
+
+def test_empty_provider_load_does_not_fetch(monkeypatch):
+    monkeypatch.setattr(Provider, "get_html_cache", lambda self: (_ for _ in ()).throw(AssertionError("fetched")))
+    provider = EmptyProvider("https://unknown.example.org/paper/1", cache=True)
+    provider.load()
+    assert provider.abstract == "Abstract not found"
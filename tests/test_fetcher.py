@@ -0,0 +1,106 @@
+import pytest
+
+from providers.fetcher import TieredFetcher, FetchResult, BlockedPageError, detect_block, HTTP_TIER, BROWSER_TIER
+from providers.rate_limiter import RateLimiter
+
+ARTICLE_TEXT = "Solar cells convert light into electricity. " * 40
+CLOUDFLARE_SCRIPT = '<script src="/cdn-cgi/challenge-platform/scripts/jsd/main.js"></script>'
+
+
+def page(body: str, title: str = "Paper") -> str:
+    return f"<html><head><title>{title}</title></head><body>{body}</body></html>"
+
+
+def test_article_is_usable():
+    assert detect_block(page(f"<p>{ARTICLE_TEXT}</p>")) is None
+
+
+def test_article_with_cloudflare_script_is_usable():
+    assert detect_block(page(f"<p>{ARTICLE_TEXT}</p>{CLOUDFLARE_SCRIPT}")) is None
+
+
+def test_short_challenge_page_is_blocked():
+    assert detect_block(page(CLOUDFLARE_SCRIPT, title="Please wait")) == "blocked"
+
+
+@pytest.mark.parametrize("html, reason", [
+    ("", "empty"),
+    (page("Our systems have detected unusual traffic from your computer network."), "blocked"),
+    (page("", title="Just a moment..."), "blocked"),
+    (page("Please solve the captcha"), "captcha"),
+    (page("<script>app()</script>Please enable JavaScript"), "js_shell"),
+    (page("Short"), "too_short"),
+])
+def test_block_reasons(html, reason):
+    assert detect_block(html) == reason
+
+
+@pytest.fixture
+def tiered(monkeypatch):
+    instance = TieredFetcher()
+    monkeypatch.setattr(instance, "_tiers", {})
+    monkeypatch.setattr(instance, "_save", lambda: None)
+    return instance
+
+
+def test_falls_back_to_http_without_browsers(tiered, monkeypatch):
+    def no_browser(url):
+        raise RuntimeError("no browser installed")
+    monkeypatch.setattr(TieredFetcher, "fetch_browser", staticmethod(no_browser))
+    monkeypatch.setattr(tiered, "fetch_http", lambda url, extra_check=None, validators=None: FetchResult("<html>ok</html>"))
+
+    result = tiered._fetch_tiers("https://example.org/a", prefer_browser=True, extra_check=None)
+    assert result.html == "<html>ok</html>"
+    assert tiered.get_tier("https://example.org/a") == HTTP_TIER
+
+
+def test_browser_used_when_http_is_blocked(tiered, monkeypatch):
+    def blocked(url, extra_check=None, validators=None):
+        raise BlockedPageError(url, "captcha")
+    monkeypatch.setattr(tiered, "fetch_http", blocked)
+    monkeypatch.setattr(TieredFetcher, "fetch_browser", staticmethod(lambda url: page(f"<p>{ARTICLE_TEXT}</p>")))
+
+    result = tiered._fetch_tiers("https://example.org/b", prefer_browser=False, extra_check=None)
+    assert ARTICLE_TEXT in result.html
+    assert tiered.get_tier("https://example.org/b") == BROWSER_TIER
+
+
+def test_no_second_http_attempt_after_http_and_browser_fail(tiered, monkeypatch):
+    calls = []
+
+    def blocked(url, extra_check=None, validators=None):
+        calls.append(url)
+        raise BlockedPageError(url, "captcha")
+
+    def no_browser(url):
+        raise RuntimeError("no browser installed")
+    monkeypatch.setattr(tiered, "fetch_http", blocked)
+    monkeypatch.setattr(TieredFetcher, "fetch_browser", staticmethod(no_browser))
+
+    with pytest.raises(RuntimeError):
+        tiered._fetch_tiers("https://example.org/c", prefer_browser=False, extra_check=None)
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def blocks(monkeypatch):
+    reported = []
+    monkeypatch.setattr(RateLimiter, "report_block", lambda self, url: reported.append(url))
+    monkeypatch.setattr(RateLimiter, "report_success", lambda self, url: None)
+    return reported
+
+
+@pytest.mark.parametrize("reason, paused", [("js_shell", False), ("too_short", False), ("captcha", True),
+                                            ("http_429", True), ("scholar_captcha", True)])
+def test_only_real_blocks_pause_the_domain(tiered, blocks, monkeypatch, reason, paused):
+    def no_browser(url):
+        raise RuntimeError("no browser installed")
+
+    def fallback(url, extra_check=None, validators=None):
+        raise BlockedPageError(url, reason)
+    monkeypatch.setattr(TieredFetcher, "fetch_browser", staticmethod(no_browser))
+    monkeypatch.setattr(tiered, "fetch_http", fallback)
+
+    with pytest.raises(BlockedPageError):
+        tiered.fetch_result("https://example.org/d", prefer_browser=True, cache_failures=False)
+    assert blocks == (["https://example.org/d"] if paused else [])
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from core.job_control import CANCEL, PAUSE, RESUME, JobControl, JobControlRegistry, current_control
+
+
+def test_cancel_runs_callbacks_and_wakes_paused_work():
+    control = JobControl("job")
+    quit_calls = []
+    control.pause()
+    with control.on_cancel(lambda: quit_calls.append(1)):
+        threading.Timer(0.1, control.cancel).start()
+        assert control.wait_if_paused() is False
+    assert quit_calls == [1]
+    assert control.cancelled and not control.paused
+
+
+def test_callback_registered_after_cancel_runs_at_once():
+    control = JobControl("job")
+    control.cancel()
+    calls = []
+    with control.on_cancel(lambda: calls.append(1)):
+        pass
+    assert calls == [1]
+
+
+def test_sleep_is_cut_short_by_cancel():
+    control = JobControl("job")
+    threading.Timer(0.1, control.cancel).start()
+    started = time.monotonic()
+    assert control.sleep(5) is False
+    assert time.monotonic() - started < 2
+    assert JobControl("other").sleep(0) is True
+
+
+def test_listeners_see_each_state_change_once():
+    control = JobControl("job")
+    signals = []
+    control.add_listener(signals.append)
+    control.pause()
+    control.pause()
+    control.resume()
+    control.resume()
+    control.cancel()
+    control.pause()
+    assert signals == [PAUSE, RESUME, CANCEL]
+
+
+def test_abandon_cancels():
+    control = JobControl("job")
+    control.abandon()
+    assert control.abandoned and control.cancelled
+
+
+def test_bind_sets_the_current_control_for_the_thread():
+    control = JobControl("job")
+    assert current_control() is None
+    with control.bind():
+        assert current_control() is control
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(current_control()))
+        thread.start()
+        thread.join()
+        assert seen == [None]
+    assert current_control() is None
+
+
+def test_registry_signals_running_jobs_only():
+    registry = JobControlRegistry()
+    control = registry.get("job")
+    assert registry.get("job") is control
+    assert registry.signal("job", PAUSE) and control.paused
+    assert registry.signal("job", RESUME) and not control.paused
+    assert registry.signal("other", CANCEL) is False
+    with pytest.raises(ValueError):
+        registry.signal("job", "stop")
+    registry.remove("job")
+    assert registry.job_ids() == []
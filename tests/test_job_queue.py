@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+
+from core.job_control import JobControlRegistry
+from workers.job_queue import JobQueue
+from workers.worker_pool import _apply_controls
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return JobQueue(str(tmp_path / "job_queue.db"), lease_timeout=60)
+
+
+def test_claims_are_unique_across_threads(job_queue):
+    for i in range(50):
+        job_queue.enqueue(f"job-{i}")
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(owner):
+        while True:
+            lease = job_queue.claim(owner)
+            if lease is None:
+                return
+            with lock:
+                claimed.append(lease.job_id)
+
+    threads = [threading.Thread(target=worker, args=(f"owner-{i}",)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(f"job-{i}" for i in range(50))
+
+
+def test_claims_oldest_first(job_queue):
+    job_queue.enqueue("first")
+    job_queue.enqueue("second")
+    assert job_queue.claim("a").job_id == "first"
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    job_queue = JobQueue(str(tmp_path / "job_queue.db"), lease_timeout=0.05)
+    job_queue.enqueue("job")
+    first = job_queue.claim("a")
+    assert job_queue.claim("b") is None
+    time.sleep(0.1)
+
+    second = job_queue.claim("b")
+    assert second.job_id == "job" and second.attempts == 2
+    # The first owner can neither renew nor finish it any more
+    assert not job_queue.heartbeat(first)
+    job_queue.complete(first)
+    assert job_queue.is_leased("job")
+    assert job_queue.heartbeat(second)
+
+
+def test_remove_unclaimed_leaves_running_jobs(job_queue):
+    job_queue.enqueue("queued")
+    job_queue.enqueue("running")
+    job_queue.claim("a")
+    assert not job_queue.remove_unclaimed("queued")
+    assert job_queue.remove_unclaimed("running")
+
+
+def test_enqueue_missing_skips_queued_jobs(job_queue):
+    job_queue.enqueue("a")
+    assert job_queue.enqueue_missing(["a", "b"]) == ["b"]
+
+
+def test_enqueue_clears_signal(job_queue):
+    job_queue.enqueue("job")
+    job_queue.set_control("job", "cancel")
+    job_queue.enqueue("job")
+    assert job_queue.get_controls(["job"]) == {"job": (None, None)}
+
+
+def test_queued_signals_reach_running_jobs(job_queue):
+    controls = JobControlRegistry()
+    job_queue.enqueue("job")
+    lease = job_queue.claim("a")
+    control = controls.get("job")
+    control.owner = lease.owner
+
+    job_queue.set_control("job", "pause")
+    _apply_controls(controls, job_queue)
+    assert control.paused
+
+    job_queue.set_control("job", None)
+    _apply_controls(controls, job_queue)
+    assert not control.paused and not control.cancelled
+
+
+def test_lost_lease_abandons_the_job(tmp_path):
+    job_queue = JobQueue(str(tmp_path / "job_queue.db"), lease_timeout=0.05)
+    controls = JobControlRegistry()
+    job_queue.enqueue("job")
+    control = controls.get("job")
+    control.owner = job_queue.claim("a").owner
+    time.sleep(0.1)
+    job_queue.claim("b")
+
+    _apply_controls(controls, job_queue)
+    assert control.cancelled and control.abandoned
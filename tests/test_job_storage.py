@@ -0,0 +1,53 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from workers import job_storage
+from workers.job import Job, JobConfig, JobStatus
+from workers.job_storage import JobStorage
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_storage, "JOBS_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_job(job_id="job"):
+    return Job(job_id, "solar cells", JobStatus.PENDING, JobConfig(max_results=30), datetime.now())
+
+
+def test_save_and_load(jobs_dir):
+    JobStorage.save_job(make_job())
+    job = JobStorage.load_job("job")
+    assert job.query == "solar cells" and job.status == JobStatus.PENDING
+    assert JobStorage.job_exists("job")
+    assert not JobStorage.job_exists("other")
+    # Only metadata.json is left behind
+    assert [p.name for p in (jobs_dir / "job").iterdir()] == ["metadata.json"]
+
+
+def test_readers_never_see_a_partial_file():
+    job = make_job()
+    JobStorage.save_job(job)
+    stop = threading.Event()
+    misses = []
+
+    def writer():
+        while not stop.is_set():
+            job.progress = (job.progress + 0.01) % 1
+            JobStorage.save_job(job)
+
+    writers = [threading.Thread(target=writer) for _ in range(2)]
+    for t in writers:
+        t.start()
+    try:
+        for _ in range(500):
+            if JobStorage.load_job("job") is None:
+                misses.append(1)
+    finally:
+        stop.set()
+        for t in writers:
+            t.join()
+    assert not misses
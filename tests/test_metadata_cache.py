@@ -0,0 +1,50 @@
+from bs4 import BeautifulSoup
+
+from providers import provider as provider_module
+from providers.cache_manager import CacheManager
+from providers.ieeexplore import IEEEXplore
+from providers.metadata_cache import MetadataCache
+from providers.provider import ABSTRACT_NOT_FOUND
+
+FOUND = '<div class="abstract-text"><div>Abstract: Solar cells convert light.</div></div>'
+MISSING = "<div>Nothing here</div>"
+
+
+def provider_with(html, monkeypatch, metadata):
+    monkeypatch.setattr(provider_module, "get_metadata_cache", lambda: metadata)
+    provider = IEEEXplore("https://ieeexplore.ieee.org/document/1")
+    provider.soup = BeautifulSoup(html, "html.parser")
+    return provider
+
+
+def test_found_abstract_is_persisted(index, monkeypatch):
+    metadata = MetadataCache(index)
+    provider = provider_with(FOUND, monkeypatch, metadata)
+    abstract = provider.abstract
+    assert abstract.strip() == "Solar cells convert light."
+    assert metadata.get_abstract(provider.get_url_hash(), "IEEEXplore", IEEEXplore.extractor_version) == abstract
+
+
+def test_miss_is_not_persisted(index, monkeypatch):
+    metadata = MetadataCache(index)
+    provider = provider_with(MISSING, monkeypatch, metadata)
+    assert provider.abstract == ABSTRACT_NOT_FOUND
+    assert metadata.get_abstract(provider.get_url_hash(), "IEEEXplore", IEEEXplore.extractor_version) is None
+
+
+def test_stored_miss_is_ignored(index, monkeypatch):
+    metadata = MetadataCache(index)
+    provider = provider_with(FOUND, monkeypatch, metadata)
+    metadata.put_abstract(provider.get_url_hash(), "IEEEXplore", IEEEXplore.extractor_version, ABSTRACT_NOT_FOUND)
+    assert provider.cached_abstract() is None
+    assert provider.abstract.strip() == "Solar cells convert light."
+
+
+def test_compaction_purges_old_extractor_versions(index, tmp_path):
+    metadata = MetadataCache(index)
+    metadata.put_abstract("a" * 32, "IEEEXplore", IEEEXplore.extractor_version - 1, "old")
+    metadata.put_abstract("b" * 32, "IEEEXplore", IEEEXplore.extractor_version, "current")
+
+    report = CacheManager(max_bytes=10 ** 9, html_dir=str(tmp_path), index=index).compact()
+    assert report.stale_abstracts == 1
+    assert metadata.get_abstract("b" * 32, "IEEEXplore", IEEEXplore.extractor_version) == "current"
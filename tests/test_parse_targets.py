@@ -0,0 +1,69 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from providers.ieeexplore import IEEEXplore
+from providers.multi_providers import Frontiers
+from providers.streaming import AbstractStreamParser, attr_matches
+
+IEEE_PAGE = """
+<html><head><title>Paper</title></head><body>
+<div class="header">Menu</div>
+<div class="abstract-text row"><div>Abstract: Solar cells convert light.</div></div>
+<div class="footer">Footer</div>
+</body></html>
+"""
+
+FRONTIERS_PAGE = """
+<html><body>
+<div class="JournalAbstract extra"><p>Wind turbines turn.</p></div>
+</body></html>
+"""
+
+
+def full_parse(provider_class, html):
+    provider = provider_class("https://example.org/paper")
+    provider.soup = BeautifulSoup(html, "html.parser")
+    return provider.get_abstract()
+
+
+def restricted_parse(provider_class, html):
+    provider = provider_class("https://example.org/paper")
+    provider.soup = provider.get_soup(html)
+    return provider.get_abstract()
+
+
+@pytest.mark.parametrize("provider_class, html", [(IEEEXplore, IEEE_PAGE), (Frontiers, FRONTIERS_PAGE)])
+def test_restricted_parse_matches_full_parse(provider_class, html):
+    expected = full_parse(provider_class, html)
+    assert expected != "Abstract not found"
+    assert restricted_parse(provider_class, html) == expected
+
+
+def test_restricted_parse_drops_other_elements():
+    soup = IEEEXplore("https://example.org/paper").get_soup(IEEE_PAGE)
+    assert "Menu" not in soup.get_text()
+    assert "Footer" not in soup.get_text()
+
+
+@pytest.mark.parametrize("actual, expected", [
+    ("abstract-text row", True),
+    ("abstract-text", True),
+    ("row", False),
+    (None, False),
+])
+def test_strainer_uses_streaming_class_rule(actual, expected):
+    assert attr_matches("class", "abstract-text", actual) is expected
+    html = f'<div class="{actual}">x</div>' if actual is not None else "<div>x</div>"
+    soup = IEEEXplore("https://example.org/paper").get_soup(html)
+    assert (soup.find("div") is not None) is expected
+
+
+def test_multi_class_target_needs_the_whole_string():
+    assert attr_matches("class", "abstract mathjax", "abstract mathjax")
+    assert not attr_matches("class", "abstract mathjax", "abstract")
+
+
+def test_stream_parser_finds_the_same_target():
+    parser = AbstractStreamParser(IEEEXplore.get_parse_targets())
+    parser.feed(IEEE_PAGE)
+    assert parser.target_found
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from providers import pdf_store
+from providers.pdf_store import PdfStore, wait_for_download
+
+PDF_BYTES = b"%PDF-1.7\n" + b"0" * 4096
+
+
+@pytest.fixture
+def store(index, tmp_path):
+    return PdfStore(str(tmp_path / "objects"), index=index)
+
+
+@pytest.fixture
+def download_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_store, "PDF_INCOMING_DIR", str(tmp_path / "incoming"))
+    return pdf_store.browser_download_dir()
+
+
+def write(path, data=PDF_BYTES):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_browser_download_goes_into_the_store(store, download_dir):
+    write(os.path.join(download_dir, "Some paper.pdf"))
+
+    path = store.add_browser_download(download_dir, url="https://example.org/a.pdf", title="Some Paper")
+    assert path == store.path_for(pdf_store.file_sha256(path))
+    assert store.lookup(title="some paper") == path
+    assert store.lookup(url="https://example.org/a.pdf") == path
+    assert not os.path.exists(download_dir)
+
+
+def test_error_page_saved_by_the_browser_is_dropped(store, download_dir):
+    write(os.path.join(download_dir, "error.pdf"), b"<html>Access denied</html>")
+
+    assert store.add_browser_download(download_dir, url="https://example.org/a.pdf") is None
+    assert not os.path.exists(download_dir)
+
+
+def test_unfinished_browser_download_is_waited_for(download_dir):
+    write(os.path.join(download_dir, "paper.pdf"))
+    write(os.path.join(download_dir, "paper.pdf.part"))
+    assert wait_for_download(download_dir, timeout=0) is None
+
+    os.remove(os.path.join(download_dir, "paper.pdf.part"))
+    assert wait_for_download(download_dir, timeout=0) == os.path.join(download_dir, "paper.pdf")
+
+
+def test_same_content_is_stored_once(store, tmp_path):
+    first = store.add(write(tmp_path / "a.pdf"), url="https://example.org/a.pdf", title="Paper A")
+    second = store.add(write(tmp_path / "b.pdf"), url="https://mirror.org/b.pdf", title="Paper A (preprint)")
+    assert first == second
+    assert not (tmp_path / "b.pdf").exists()
+    assert store.lookup(url="https://mirror.org/b.pdf") == first
+
+
+def test_lookup_by_doi_url_and_title(store, tmp_path):
+    path = store.add(write(tmp_path / "a.pdf"), url="https://doi.org/10.1000/XYZ.123", title="Über Solar: Cells")
+    assert store.lookup(doi="10.1000/xyz.123") == path
+    assert store.lookup(url="https://doi.org/10.1000/XYZ.123?utm_source=x") == path
+    assert store.lookup(title="über solar cells") == path
+    assert store.lookup(title="Another paper") is None
+
+
+def test_evicted_file_is_not_found(store, tmp_path):
+    path = store.add(write(tmp_path / "a.pdf"), title="Paper A")
+    os.remove(path)
+    assert store.lookup(title="Paper A") is None
+
+
+def test_migrate_moves_title_named_pdfs(store, index):
+    source = pdf_store.cache_index.DOWNLOAD_DIR
+    write(os.path.join(source, "Solar_Cells.pdf"))
+    write(os.path.join(source, "broken.pdf"), b"not a pdf")
+    papers = [{"title": "Solar Cells", "download_url": "https://example.org/solar.pdf"}]
+
+    report = store.migrate(papers, source_dir=source)
+    assert report == {"migrated": 1, "duplicates": 0, "invalid": 1}
+    assert not os.path.exists(os.path.join(source, "Solar_Cells.pdf"))
+    assert store.lookup(url="https://example.org/solar.pdf") == store.lookup(title="solar cells") is not None
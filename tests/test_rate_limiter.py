@@ -0,0 +1,193 @@
+import threading
+import time
+
+import pytest
+
+from core.job_control import JobCancelled, JobControl
+from providers import rate_limiter
+from providers.rate_limiter import DomainLane, DomainPolicy, RateLimiter, TokenBucket
+from providers.shared_limits import SharedLimits
+
+SCHOLAR = DomainPolicy(rate=0.1, burst=1, concurrency=1, jitter=0.0)
+
+
+@pytest.fixture
+def lanes(tmp_path):
+    """Two lanes for one domain as two worker processes would build them."""
+    path = str(tmp_path / "rate_limits.db")
+    return (
+        DomainLane("scholar.google.com", SCHOLAR, SharedLimits(path)),
+        DomainLane("scholar.google.com", SCHOLAR, SharedLimits(path)),
+    )
+
+
+def test_shared_bucket_paces_both_processes(lanes):
+    first, second = lanes
+    assert first.reserve() == 0.0
+    assert second.reserve() == pytest.approx(10.0, abs=0.1)
+
+
+def test_shared_concurrency_limit(lanes):
+    first, second = lanes
+    slot = first.acquire_slot()
+    assert second.acquire_slot(timeout=0.1) is None
+    first.release_slot(slot)
+    assert second.acquire_slot(timeout=0.1) is not None
+
+
+def test_block_pauses_every_process(lanes):
+    first, second = lanes
+    assert first.report_block() == pytest.approx(60)
+    assert second.pause_remaining() > 59
+    assert second.report_block() == pytest.approx(120)
+    second.report_success()
+    assert first.metrics()["blocks"] == 0
+
+
+def test_expired_slot_of_crashed_process_is_freed(tmp_path):
+    store = SharedLimits(str(tmp_path / "rate_limits.db"), slot_timeout=-1)
+    assert store.try_acquire_slot("scholar.google.com", 1) is not None
+    assert store.try_acquire_slot("scholar.google.com", 1) is not None
+
+
+def test_held_slot_is_renewed_while_the_request_runs(tmp_path):
+    path = str(tmp_path / "rate_limits.db")
+    holder = SharedLimits(path, slot_timeout=0.3, renew_interval=0.05)
+    other = SharedLimits(path, slot_timeout=0.3, renew_interval=0.05)
+    slot = holder.try_acquire_slot("scholar.google.com", 1)
+    time.sleep(0.6)
+    assert other.try_acquire_slot("scholar.google.com", 1) is None
+    holder.release_slot(slot)
+    assert other.try_acquire_slot("scholar.google.com", 1) is not None
+
+
+def test_slot_waiters_back_off(lanes):
+    first, second = lanes
+    slot = first.acquire_slot()
+    waits = []
+
+    def wait(seconds):
+        waits.append(seconds)
+        if len(waits) == 6:
+            raise JobCancelled("gave up")
+
+    with pytest.raises(JobCancelled):
+        second.acquire_slot(wait=wait)
+    assert waits == [0.05, 0.1, 0.2, 0.4, 0.8, 1.0]
+    first.release_slot(slot)
+
+
+def test_metrics_include_requests_of_other_processes(lanes):
+    first, second = lanes
+    first.reserve()
+    first.record_start(2.0)
+    first.record_end()
+    metrics = second.metrics()
+    assert metrics["requests"] == 1
+    assert metrics["max_wait"] == 2.0
+    assert metrics["requests_per_minute"] == 1.0
+    assert metrics["policy"]["concurrency"] == 1
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "policy_for", staticmethod(lambda domain: SCHOLAR))
+    return RateLimiter()
+
+
+def test_cancelled_job_does_not_wait_for_a_slot(limiter):
+    control = JobControl("job")
+    control.cancel()
+    with control.bind(), pytest.raises(JobCancelled):
+        with limiter.acquire("https://cancelled.test/a"):
+            pass
+
+
+def test_cancelled_job_stops_waiting_for_a_shared_slot(limiter, tmp_path, monkeypatch):
+    monkeypatch.setattr(limiter, "store", SharedLimits(str(tmp_path / "rate_limits.db")))
+    url = "https://shared.test/a"
+    lane = limiter.lane(url)
+    slot = lane.acquire_slot()
+    control = JobControl("job")
+    threading.Timer(0.3, control.cancel).start()
+    started = time.monotonic()
+    with control.bind(), pytest.raises(JobCancelled):
+        with limiter.acquire(url):
+            pass
+    assert time.monotonic() - started < 1
+    lane.release_slot(slot)
+
+
+def test_block_pause_is_slept_without_the_slot_and_cancellable(limiter):
+    url = "https://paused.test/a"
+    lane = limiter.lane(url)
+    lane.report_block()
+    control = JobControl("job")
+    errors = []
+
+    def fetch():
+        with control.bind():
+            try:
+                with limiter.acquire(url):
+                    pass
+            except JobCancelled as e:
+                errors.append(e)
+
+    worker = threading.Thread(target=fetch)
+    worker.start()
+    time.sleep(0.2)
+    # The waiting job leaves the domain's only slot free
+    slot = lane.acquire_slot(timeout=0)
+    assert slot is not None
+    lane.release_slot(slot)
+
+    control.cancel()
+    worker.join(timeout=2)
+    assert not worker.is_alive()
+    assert len(errors) == 1
+
+
+def test_paced_wait_is_cancellable(limiter):
+    url = "https://paced.test/a"
+    limiter.lane(url).reserve()  # the next request waits 10s for a token
+    control = JobControl("job")
+    threading.Timer(0.1, control.cancel).start()
+    started = time.monotonic()
+    with control.bind(), pytest.raises(JobCancelled):
+        with limiter.acquire(url):
+            pass
+    assert time.monotonic() - started < 2
+    assert limiter.lane(url).acquire_slot(timeout=0) is not None
+
+
+def test_bucket_allows_the_burst_then_paces():
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_policy_falls_back_to_parent_domain_and_default(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "RATE_LIMITS", {"example.org": {"rate": 0.5, "concurrency": 1}})
+    policy = RateLimiter.policy_for("www.example.org")
+    assert (policy.rate, policy.concurrency) == (0.5, 1)
+    assert policy.burst == rate_limiter.RATE_LIMIT_DEFAULT["burst"]
+    assert RateLimiter.policy_for("other.org") == DomainPolicy(**rate_limiter.RATE_LIMIT_DEFAULT)
+
+
+def test_repeated_blocks_back_off_exponentially():
+    lane = DomainLane("scholar.google.com", SCHOLAR)
+    assert [lane.report_block() for _ in range(3)] == [60, 120, 240]
+    assert lane.pause_remaining() > 239
+    lane.report_success()
+    assert lane.metrics()["blocks"] == 0
+
+
+def test_concurrency_limit_and_metrics(limiter):
+    url = "https://metrics.test/a"
+    lane = limiter.lane(url)
+    with limiter.acquire(url):
+        assert lane.acquire_slot(timeout=0) is None
+        assert limiter.metrics()["metrics.test"]["in_flight"] == 1
+    metrics = limiter.metrics()["metrics.test"]
+    assert (metrics["requests"], metrics["in_flight"], metrics["requests_per_minute"]) == (1, 0, 1.0)
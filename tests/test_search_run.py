@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+
+import extract_searches
+from core.pipeline import Pipeline, Stage
+from extract_searches import SearchRun
+from providers import GoogleScholarProvider
+from workers.job import JobConfig
+
+PAPER = {"title": "Paper", "url": "https://example.org/paper", "abstract": "Abstract not found"}
+
+
+def make_run(**kwargs) -> SearchRun:
+    return SearchRun(None, "solar cells", JobConfig(max_results=20), **kwargs)
+
+
+def test_slow_enrichment_falls_back_to_snippet(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(extract_searches, "ENRICH_TIMEOUT", 0.3)
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda paper: release.wait(5) and paper))
+    run = make_run()
+    started = time.monotonic()
+    try:
+        assert run.enrich_with_deadline((0, 0, PAPER)) == [(0, 0, PAPER)]
+        assert time.monotonic() - started < 2
+    finally:
+        release.set()
+
+
+def test_enrichment_result_is_used(monkeypatch):
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda paper: {**paper, "abstract": "Text"}))
+    assert make_run().enrich_with_deadline((0, 0, PAPER))[0][2]["abstract"] == "Text"
+
+
+def test_runs_share_one_enricher(monkeypatch):
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda paper: paper))
+    make_run().enrich_with_deadline((0, 0, PAPER))
+    make_run().enrich_with_deadline((0, 0, PAPER))
+    names = {t.name.split("_")[0] for t in threading.enumerate() if t.name.startswith("enrich")}
+    assert names == {"enrich"}
+
+
+def test_async_enrich_deadline_is_kept_by_the_loop(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(extract_searches, "ENRICH_TIMEOUT", 0.3)
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda paper: release.wait(5) and paper))
+
+    class Page:
+        def parse_entries(self, logger=None):
+            return [PAPER]
+
+    class Engine(extract_searches.SearchEngine):
+        def _fetch_page(self, url, stop_check, throttle_callback, logger):
+            return Page()
+
+        def _save_result(self, paper):
+            pass
+
+    async def collect():
+        started = time.monotonic()
+        papers = [p async for p in Engine().aiter_search("solar cells", JobConfig(max_results=10))]
+        elapsed = time.monotonic() - started
+        release.set()
+        return papers, elapsed
+
+    try:
+        papers, elapsed = asyncio.run(collect())
+    finally:
+        release.set()
+    assert papers == [PAPER]
+    assert elapsed < 2
+
+
+def test_cancel_stops_waiting_for_enrichment(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(GoogleScholarProvider, "enrich", staticmethod(lambda paper: release.wait(5) and paper))
+    run = make_run()
+    threading.Timer(0.1, run.control.cancel).start()
+    try:
+        assert run.enrich_with_deadline((0, 0, PAPER)) == []
+    finally:
+        release.set()
+
+
+def test_failed_persist_lets_the_page_complete():
+    checkpoints = []
+    run = make_run(checkpoint_callback=checkpoints.append)
+    items = run.parse((0, [PAPER, {**PAPER, "title": "Other"}]))
+    persist = Stage("persist", run.persist)
+
+    run.emitted(items[0])
+    run.on_error(persist, items[1], OSError("disk full"))
+    assert run.completed == {0}
+    assert run.pending == {}
+    assert checkpoints[-1]["failed"] == 1
+
+    run.completed.add(1)
+    run.pipeline = Pipeline(run.name, [])
+    run.finish()
+    assert checkpoints[-1] is None
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from core.job_control import JobCancelled, JobControl
+from providers.single_flight import SingleFlight
+
+
+def run_concurrently(group, key, func, callers):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(group.do(key, func))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results, errors
+
+
+def slow(result, calls, delay=0.2):
+    def func():
+        calls.append(1)
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return func
+
+
+def test_concurrent_callers_share_one_call():
+    group, calls = SingleFlight(), []
+    results, errors = run_concurrently(group, "page", slow("<html>", calls), callers=5)
+    assert calls == [1]
+    assert results == ["<html>"] * 5
+    assert not errors
+
+
+def test_followers_get_the_leaders_exception():
+    group, calls = SingleFlight(), []
+    results, errors = run_concurrently(group, "page", slow(ValueError("blocked"), calls), callers=3)
+    assert calls == [1]
+    assert not results
+    assert [str(e) for e in errors] == ["blocked"] * 3
+
+
+def test_nothing_is_kept_after_the_call():
+    group, calls = SingleFlight(), []
+    group.do("page", slow("a", calls, delay=0))
+    group.do("page", slow("b", calls, delay=0))
+    assert calls == [1, 1]
+    assert group._calls == {}
+
+
+def test_follower_retries_when_another_jobs_cancel_aborts_the_leader():
+    group = SingleFlight()
+    started = threading.Event()
+    leader_control = JobControl("leader")
+
+    def leader_call():
+        started.set()
+        if not leader_control.sleep(5):
+            raise JobCancelled("leader cancelled")
+        return "leader"
+
+    def lead():
+        with leader_control.bind():
+            with pytest.raises(JobCancelled):
+                group.do("page", leader_call)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(2)
+    results = []
+    follower = threading.Thread(target=lambda: results.append(group.do("page", lambda: "follower")))
+    follower.start()
+    time.sleep(0.1)
+    leader_control.cancel()
+    leader.join(timeout=2)
+    follower.join(timeout=2)
+    assert results == ["follower"]
+
+
+def test_cancelled_follower_stops_waiting_for_the_leader():
+    group = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def leader_call():
+        started.set()
+        release.wait(5)
+        return "leader"
+
+    leader = threading.Thread(target=lambda: group.do("page", leader_call))
+    leader.start()
+    started.wait(2)
+
+    control = JobControl("follower")
+    threading.Timer(0.1, control.cancel).start()
+    begun = time.monotonic()
+    try:
+        with control.bind(), pytest.raises(JobCancelled):
+            group.do("page", lambda: "follower")
+        assert time.monotonic() - begun < 1
+    finally:
+        release.set()
+        leader.join(timeout=2)
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.config import ASYNC_MAX_JOBS, ASYNC_IO_THREADS, ASYNC_PARSE_WORKERS
+from providers.rate_limiter import RateLimiter
+from providers.urls import get_domain
+
+
+class AsyncRuntime:
+    """
+    One asyncio loop on a dedicated thread that runs search jobs as coroutines.
+    A job holds a thread only while one of its blocking calls (a fetch, an
+    enrichment, a file write) runs, and calls to a domain wait on the loop for
+    that domain's concurrency limit, so far more jobs can be in flight than
+    WorkerPool has threads.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(AsyncRuntime, cls).__new__(cls)
+                cls._instance._initialized = False
+            return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self.loop = asyncio.new_event_loop()
+        self._io = ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS, thread_name_prefix="async-io")
+        # Parsing is CPU-bound; a few threads keep it off the loop without crowding the I/O calls
+        self._parse = ThreadPoolExecutor(max_workers=ASYNC_PARSE_WORKERS, thread_name_prefix="async-parse")
+        self.loop.set_default_executor(self._io)
+        self._jobs = asyncio.Semaphore(ASYNC_MAX_JOBS)
+        self._domain_slots: Dict[str, asyncio.Semaphore] = {}
+        self._thread = threading.Thread(target=self._run_loop, name="async-runtime", daemon=True)
+        self._thread.start()
+        self._initialized = True
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, job: Callable[[], Awaitable]) -> Future:
+        """Schedule a job coroutine; at most ASYNC_MAX_JOBS run at once, the rest wait their turn."""
+        async def limited():
+            async with self._jobs:
+                return await job()
+
+        return asyncio.run_coroutine_threadsafe(limited(), self.loop)
+
+    def _domain_slot(self, url: str) -> asyncio.Semaphore:
+        domain = get_domain(url)
+        if domain not in self._domain_slots:
+            policy = RateLimiter.policy_for(domain)
+            self._domain_slots[domain] = asyncio.Semaphore(policy.concurrency)
+        return self._domain_slots[domain]
+
+    async def run_blocking(self, func: Callable, *args, url: Optional[str] = None, cpu: bool = False):
+        """
+        Run a blocking call in a thread. Calls that request `url` first wait,
+        without a thread, for a free slot of its domain and for any block pause
+        to end; the rate limiter inside the call then only paces them.
+        """
+        executor = self._parse if cpu else self._io
+        if not url:
+            return await self.loop.run_in_executor(executor, func, *args)
+
+        async with self._domain_slot(url):
+            limiter = RateLimiter()
+            paused = limiter.paused_for(url)
+            while paused > 0:
+                await asyncio.sleep(paused)
+                paused = limiter.paused_for(url)
+            return await self.loop.run_in_executor(executor, func, *args)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1.0)
+        self._io.shutdown(wait=False, cancel_futures=True)
+        self._parse.shutdown(wait=False, cancel_futures=True)
@@ -9,6 +9,7 @@ class JobStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+    PAUSED = "paused"
 
 @dataclass
 class JobConfig:
@@ -31,6 +32,8 @@ class Job:
     progress: float = 0.0
     total_results: int = 0
     error: Optional[str] = None
+    # Set while Scholar is blocking this job's requests; the job resumes on its own
+    throttled_until: Optional[datetime] = None
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -43,7 +46,8 @@ class Job:
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "progress": self.progress,
             "total_results": self.total_results,
-            "error": self.error
+            "error": self.error,
+            "throttled_until": self.throttled_until.isoformat() if self.throttled_until else None
         }
 
     @classmethod
@@ -59,5 +63,6 @@ class Job:
             completed_at=datetime.fromisoformat(data["completed_at"]) if data.get("completed_at") else None,
             progress=data.get("progress", 0.0),
             total_results=data.get("total_results", 0),
-            error=data.get("error")
+            error=data.get("error"),
+            throttled_until=datetime.fromisoformat(data["throttled_until"]) if data.get("throttled_until") else None
         )
@@ -0,0 +1,180 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.config import JOB_QUEUE_PATH, JOB_LEASE_TIMEOUT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_queue (
+    job_id TEXT PRIMARY KEY,
+    enqueued_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    heartbeat_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    -- Latest cancel/pause signal for the worker holding the job; NULL to run
+    control TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_job_queue_claim ON job_queue (lease_expires_at, enqueued_at);
+"""
+
+
+@dataclass
+class Lease:
+    job_id: str
+    owner: str
+    # Claims of the job so far, this one included
+    attempts: int
+
+
+def new_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobQueue:
+    """
+    Durable job queue in SQLite (WAL), shared by every server process. A worker
+    claims a job with a lease that it renews by heartbeat; a job whose lease
+    expires (its worker died or hung) becomes claimable again. Rows are deleted
+    once a job is finished.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, lease_timeout: float = JOB_LEASE_TIMEOUT):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(job_queue)")}
+        if "control" not in columns:
+            # Queues created before job control existed
+            conn.execute("ALTER TABLE job_queue ADD COLUMN control TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # One connection per thread; WAL lets readers run alongside the writer
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, job_id: str):
+        """Add a job, or make it claimable again at the end of the queue."""
+        with self.transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO job_queue (job_id, enqueued_at) VALUES (?, ?)
+                ON CONFLICT (job_id) DO UPDATE SET
+                    enqueued_at = excluded.enqueued_at, lease_owner = NULL, lease_expires_at = NULL, control = NULL
+                """,
+                (job_id, time.time()),
+            )
+
+    def enqueue_missing(self, job_ids: Iterable[str]) -> List[str]:
+        """Enqueue the jobs that have no queue row at all; returns them."""
+        added = []
+        now = time.time()
+        with self.transaction() as conn:
+            for job_id in job_ids:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO job_queue (job_id, enqueued_at) VALUES (?, ?)", (job_id, now)
+                )
+                if cursor.rowcount:
+                    added.append(job_id)
+        return added
+
+    def claim(self, owner: str) -> Optional[Lease]:
+        """Lease the oldest job that is unclaimed or whose lease has expired."""
+        now = time.time()
+        # A single UPDATE is atomic, so two workers can never claim the same row
+        rows = self._connect().execute(
+            """
+            UPDATE job_queue SET lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?, attempts = attempts + 1
+            WHERE job_id = (
+                SELECT job_id FROM job_queue
+                WHERE lease_expires_at IS NULL OR lease_expires_at < ?
+                ORDER BY enqueued_at LIMIT 1
+            )
+            RETURNING job_id, attempts
+            """,
+            (owner, now + self.lease_timeout, now, now),
+        ).fetchall()
+        return Lease(rows[0]["job_id"], owner, rows[0]["attempts"]) if rows else None
+
+    def heartbeat(self, lease: Lease) -> bool:
+        """Extend a lease. False if it was lost, i.e. the job was reclaimed or removed."""
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE job_queue SET lease_expires_at = ?, heartbeat_at = ? WHERE job_id = ? AND lease_owner = ?",
+            (now + self.lease_timeout, now, lease.job_id, lease.owner),
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, lease: Lease):
+        self._connect().execute(
+            "DELETE FROM job_queue WHERE job_id = ? AND lease_owner = ?", (lease.job_id, lease.owner)
+        )
+
+    def remove_unclaimed(self, job_id: str) -> bool:
+        """Drop a job unless a worker holds a live lease on it."""
+        cursor = self._connect().execute(
+            "DELETE FROM job_queue WHERE job_id = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+            (job_id, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def set_control(self, job_id: str, signal: Optional[str]) -> bool:
+        """Record a signal for whichever worker holds the job. False if it isn't queued."""
+        cursor = self._connect().execute(
+            "UPDATE job_queue SET control = ? WHERE job_id = ?", (signal, job_id)
+        )
+        return cursor.rowcount > 0
+
+    def get_controls(self, job_ids: List[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """(signal, lease owner) of each of the given jobs that is still queued."""
+        if not job_ids:
+            return {}
+        placeholders = ", ".join("?" * len(job_ids))
+        rows = self._connect().execute(
+            f"SELECT job_id, control, lease_owner FROM job_queue WHERE job_id IN ({placeholders})", job_ids
+        ).fetchall()
+        return {row["job_id"]: (row["control"], row["lease_owner"]) for row in rows}
+
+    def is_leased(self, job_id: str) -> bool:
+        row = self._connect().execute(
+            "SELECT lease_expires_at FROM job_queue WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return row is not None and row["lease_expires_at"] is not None and row["lease_expires_at"] >= time.time()
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
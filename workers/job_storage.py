@@ -1,6 +1,8 @@
 import json
 import os
-from typing import List, Optional
+import tempfile
+from itertools import islice
+from typing import Iterator, List, Optional
 from core.config import JOBS_DIR
 from .job import Job, JobStatus
 from providers.provider import DefaultEncoder
@@ -18,13 +20,34 @@ class JobStorage:
     def _get_results_path(job_id: str) -> str:
         return os.path.join(JobStorage._get_job_dir(job_id), "results.json")
 
+    @staticmethod
+    def _get_results_log_path(job_id: str) -> str:
+        return os.path.join(JobStorage._get_job_dir(job_id), "results.jsonl")
+
+    @staticmethod
+    def _get_checkpoint_path(job_id: str) -> str:
+        return os.path.join(JobStorage._get_job_dir(job_id), "checkpoint.json")
+
     @staticmethod
     def save_job(job: Job):
         job_dir = JobStorage._get_job_dir(job.id)
         os.makedirs(job_dir, exist_ok=True)
-        
-        with open(JobStorage._get_metadata_path(job.id), "w") as f:
-            json.dump(job.to_dict(), f, indent=4)
+
+        # Workers, the API and other server processes read this file while it
+        # is rewritten: write a private temp file and swap it in
+        fd, tmp_path = tempfile.mkstemp(dir=job_dir, prefix=".metadata-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(job.to_dict(), f, indent=4)
+            os.replace(tmp_path, JobStorage._get_metadata_path(job.id))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def job_exists(job_id: str) -> bool:
+        return os.path.exists(JobStorage._get_metadata_path(job_id))
 
     @staticmethod
     def load_job(job_id: str) -> Optional[Job]:
@@ -63,13 +86,83 @@ class JobStorage:
             json.dump(results, f, indent=4, cls=DefaultEncoder)
 
     @staticmethod
-    def get_results(job_id: str) -> List[dict]:
-        path = JobStorage._get_results_path(job_id)
+    def reset_results(job_id: str):
+        """Start an empty results log for a fresh run of the job."""
+        job_dir = JobStorage._get_job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        open(JobStorage._get_results_log_path(job_id), "w").close()
+
+    @staticmethod
+    def append_result(job_id: str, result: dict):
+        """Append one result to the job's JSONL log as soon as it is found."""
+        with open(JobStorage._get_results_log_path(job_id), "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, cls=DefaultEncoder) + "\n")
+            f.flush()
+
+    @staticmethod
+    def trim_results(job_id: str, keep: int):
+        """Cut the results log back to its first `keep` results, as a checkpoint recorded them."""
+        log_path = JobStorage._get_results_log_path(job_id)
+        tmp_path = f"{log_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            if os.path.exists(log_path):
+                with open(log_path, "r", encoding="utf-8") as f:
+                    for line in islice(f, keep):
+                        if line.endswith("\n"):
+                            out.write(line)
+        os.replace(tmp_path, log_path)
+
+    @staticmethod
+    def save_checkpoint(job_id: str, checkpoint: dict):
+        path = JobStorage._get_checkpoint_path(job_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, cls=DefaultEncoder)
+        # Replace in one step so a crash never leaves half a checkpoint
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load_checkpoint(job_id: str) -> Optional[dict]:
+        path = JobStorage._get_checkpoint_path(job_id)
         if not os.path.exists(path):
-            return []
-        
+            return None
         try:
             with open(path, "r") as f:
                 return json.load(f)
         except Exception:
-            return []
+            return None
+
+    @staticmethod
+    def delete_checkpoint(job_id: str):
+        path = JobStorage._get_checkpoint_path(job_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def iter_results(job_id: str) -> Iterator[dict]:
+        """Yield a job's results one at a time, including those of a job still running."""
+        log_path = JobStorage._get_results_log_path(job_id)
+        if os.path.exists(log_path):
+            with open(log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # The writer is mid-line (or crashed there); the rest isn't readable yet
+                        return
+            return
+
+        # Jobs finished before results were logged incrementally
+        path = JobStorage._get_results_path(job_id)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as f:
+                yield from json.load(f)
+        except Exception:
+            return
+
+    @staticmethod
+    def get_results(job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        stop = offset + limit if limit is not None else None
+        return list(islice(JobStorage.iter_results(job_id), offset, stop))
@@ -1,79 +1,191 @@
+import asyncio
 import traceback
 import os
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 
 from core.logging import JobLogger
 from core.config import JOBS_DIR
+from core.job_control import CANCEL, get_job_controls
 from extract_searches import SearchEngine
 from .job import Job, JobStatus
 from .job_storage import JobStorage
 
+
+async def _run_in_executor(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
 class SearchWorker:
-    def __init__(self, job_id: str):
+    def __init__(self, job_id: str, progress_listener: Callable[[str, float, int], None] = None,
+                 lease_owner: Optional[str] = None):
         self.job_id = job_id
+        # Told about progress as it happens; may live in another process
+        self.progress_listener = progress_listener
         self.job: Optional[Job] = JobStorage.load_job(job_id)
+        self.checkpoint: Optional[dict] = None
+        # Cancel and pause signals reach the job through here, not through its metadata
+        self.control = get_job_controls().get(job_id)
+        # Losing this job queue lease stops the job without touching its state
+        self.control.owner = lease_owner
+        self._save_lock = threading.Lock()
+        self.control.add_listener(self.on_control)
         self.logger = JobLogger(job_id, os.path.join(JOBS_DIR, job_id, "logs"))
 
     def run(self):
+        if not self._start():
+            return
+        try:
+            # Each paper is logged as soon as it is parsed, so running jobs
+            # show partial results and a crash keeps what was found
+            count = self._resumed_count()
+            for paper in SearchEngine().iter_search(**self._search_args()):
+                if self.control.abandoned:
+                    break
+                JobStorage.append_result(self.job_id, paper)
+                count += 1
+            self._finish(count)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._close()
+
+    async def run_async(self, run_blocking=None):
+        """
+        run() as a coroutine. `run_blocking` is passed on to SearchEngine.aiter_search
+        and also runs this worker's file writes, which must not stall the shared loop.
+        """
+        blocking = run_blocking or _run_in_executor
+        if not await blocking(self._start):
+            return
+        try:
+            count = self._resumed_count()
+            async for paper in SearchEngine().aiter_search(**self._search_args(), run_blocking=run_blocking):
+                if self.control.abandoned:
+                    break
+                await blocking(JobStorage.append_result, self.job_id, paper)
+                count += 1
+            await blocking(self._finish, count)
+        except Exception as e:
+            await blocking(self._fail, e)
+        finally:
+            await blocking(self._close)
+
+    def _start(self) -> bool:
         if not self.job:
             self.logger.error(f"Job not found: {self.job_id}")
+            self._close()
+            return False
+        self.logger.info(f"Worker started for job {self.job_id}")
+        self._update_status(JobStatus.RUNNING, started_at=datetime.now())
+        # A job interrupted by a crash, a cancel or a restart continues from its
+        # last checkpoint; results saved after it are dropped and found again
+        self.checkpoint = JobStorage.load_checkpoint(self.job_id)
+        if self.checkpoint:
+            JobStorage.trim_results(self.job_id, self.checkpoint.get("emitted", 0))
+        else:
+            JobStorage.reset_results(self.job_id)
+        return True
+
+    def _resumed_count(self) -> int:
+        return self.checkpoint.get("emitted", 0) if self.checkpoint else 0
+
+    def _search_args(self) -> dict:
+        return {
+            "query": self.job.query,
+            "config": self.job.config,
+            "progress_callback": self.on_progress,
+            "stop_check": self.stop_check,
+            "logger": self.logger,
+            "throttle_callback": self.on_throttle,
+            "checkpoint": self.checkpoint,
+            "checkpoint_callback": self.on_checkpoint,
+            "control": self.control,
+        }
+
+    def stop_check(self) -> bool:
+        return self.control.cancelled
+
+    def on_progress(self, progress: float, count: int):
+        self.job.progress = progress
+        self.job.total_results = count
+        # Persist periodic updates? Or just keeping in memory if needed
+        # For file storage, detailed updates might be I/O heavy,
+        # but let's save metadata for monitoring
+        self._save()
+        if self.progress_listener:
+            self.progress_listener(self.job_id, progress, count)
+
+    def on_control(self, signal: str):
+        # Show a pause or resume that arrived from another process even though
+        # no progress is saved meanwhile; the end of the run records a cancel
+        if signal != CANCEL and self.job:
+            self._save()
+
+    def on_checkpoint(self, checkpoint: Optional[dict]):
+        if self.control.abandoned:
             return
+        if checkpoint is None:
+            JobStorage.delete_checkpoint(self.job_id)
+        else:
+            JobStorage.save_checkpoint(self.job_id, checkpoint)
 
-        try:
-            self.logger.info(f"Worker started for job {self.job_id}")
-            self._update_status(JobStatus.RUNNING, started_at=datetime.now())
-
-            engine = SearchEngine()
-            
-            # Define stop check callback
-            def stop_check():
-                # Reload job status from storage to check for external cancellation
-                current_job = JobStorage.load_job(self.job_id)
-                if current_job and current_job.status in [JobStatus.CANCELLED, JobStatus.FAILED]:
-                    return True
-                return False
-
-            # Define progress callback
-            def on_progress(progress, count):
-                self.job.progress = progress
-                self.job.total_results = count
-                # Persist periodic updates? Or just keeping in memory if needed
-                # For file storage, detailed updates might be I/O heavy, 
-                # but let's save metadata for monitoring
-                JobStorage.save_job(self.job)
-
-            results = engine.search(
-                query=self.job.query,
-                config=self.job.config,
-                progress_callback=on_progress,
-                stop_check=stop_check,
-                logger=self.logger
-            )
-
-            # Check if we stopped because of cancellation
-            if stop_check():
-                self.logger.info("Job execution stopped due to cancellation.")
-                return
-
-            JobStorage.save_results(self.job_id, results)
-            
-            self.job.total_results = len(results)
-            self._update_status(JobStatus.COMPLETED, completed_at=datetime.now(), progress=1.0)
-            self.logger.info("Job completed successfully")
+    def on_throttle(self, until: Optional[datetime]):
+        self.job.throttled_until = until
+        self._save()
 
-        except Exception as e:
-            err_msg = f"{str(e)}\n{traceback.format_exc()}"
-            self.logger.error(f"Job failed: {err_msg}")
-            self.job.error = str(e)
-            self._update_status(JobStatus.FAILED, completed_at=datetime.now())
+    def _finish(self, count: int):
+        # Check if we stopped because of cancellation
+        if self.stop_check():
+            self._cancelled()
+            return
 
-        finally:
-            self.logger.close()
+        self.job.total_results = count
+        self._update_status(JobStatus.COMPLETED, completed_at=datetime.now(), progress=1.0,
+                            throttled_until=None)
+        self.logger.info("Job completed successfully")
+
+    def _fail(self, e: Exception):
+        if self.stop_check():
+            # Aborting in-flight work can surface as any error
+            self._cancelled()
+            return
+        # May run on another thread than the one that caught it
+        err_msg = f"{str(e)}\n{''.join(traceback.format_exception(type(e), e, e.__traceback__))}"
+        self.logger.error(f"Job failed: {err_msg}")
+        self.job.error = str(e)
+        self._update_status(JobStatus.FAILED, completed_at=datetime.now(), throttled_until=None)
+
+    def _cancelled(self):
+        if self.control.abandoned:
+            self.logger.warning("Lost the job's lease; leaving it to the worker that took it over.")
+            return
+        self.logger.info("Job execution stopped due to cancellation.")
+        self._update_status(JobStatus.CANCELLED, throttled_until=None)
+
+    def _close(self):
+        get_job_controls().remove(self.job_id)
+        self.logger.close()
+
+    def _save(self):
+        if self.control.abandoned:
+            return
+        # The manager sets CANCELLED or PAUSED along with the signal; keep it
+        # rather than writing back the status this worker loaded
+        if self.control.cancelled:
+            self.job.status = JobStatus.CANCELLED
+        elif self.control.paused:
+            self.job.status = JobStatus.PAUSED
+        elif self.job.status == JobStatus.PAUSED:
+            self.job.status = JobStatus.RUNNING
+        with self._save_lock:
+            JobStorage.save_job(self.job)
 
     def _update_status(self, status: JobStatus, **kwargs):
         self.job.status = status
         for k, v in kwargs.items():
             setattr(self.job, k, v)
-        JobStorage.save_job(self.job)
+        with self._save_lock:
+            JobStorage.save_job(self.job)
 
@@ -1,10 +1,84 @@
 import threading
 import queue
 import time
-from typing import Dict
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from logging.handlers import QueueHandler
+from typing import Callable, Dict, Optional, Tuple
 
-from core.config import MAX_WORKERS
+from core.config import MAX_WORKERS, WORKER_MODE, WORKER_MAX_JOBS_PER_PROCESS, ASYNC_MAX_JOBS
+from core.config import JOB_HEARTBEAT_INTERVAL, JOB_POLL_INTERVAL, JOB_MAX_ATTEMPTS, JOB_CONTROL_POLL_INTERVAL
+from core.job_control import CANCEL, RESUME, JobControlRegistry, get_job_controls
+from .job import JobStatus
+from .job_storage import JobStorage
+from .job_queue import JobQueue, Lease, get_job_queue, new_owner_id
 from .worker import SearchWorker
+from .async_runtime import AsyncRuntime
+
+THREAD_MODE = "thread"
+PROCESS_MODE = "process"
+ASYNC_MODE = "async"
+
+# Set in worker processes: where progress and log records go back to the server
+_events = None
+
+
+def _apply_controls(controls: JobControlRegistry, job_queue: JobQueue):
+    """
+    Apply the signals recorded in the queue to the jobs running in this
+    process, and stop the ones whose lease has gone to another worker.
+    """
+    job_ids = controls.job_ids()
+    states = job_queue.get_controls(job_ids)
+    for job_id in job_ids:
+        control = controls.find(job_id)
+        if control is None:
+            continue
+        signal, owner = states.get(job_id, (None, None))
+        if control.owner is not None and owner != control.owner:
+            if not control.abandoned:
+                print(f"Lost the lease on job {job_id}; stopping it here")
+                control.abandon()
+            continue
+        controls.signal(job_id, signal or RESUME)
+
+
+def _watch_controls(running: Callable[[], bool] = lambda: True):
+    """
+    Signals sent from this process act at once; this picks up the ones sent
+    from other server processes, or to a worker process.
+    """
+    controls = get_job_controls()
+    job_queue = get_job_queue()
+    while running():
+        time.sleep(JOB_CONTROL_POLL_INTERVAL)
+        try:
+            _apply_controls(controls, job_queue)
+        except Exception as e:
+            print(f"Job control check failed: {e}")
+
+
+def _init_process(events):
+    global _events
+    _events = events
+    # Job loggers propagate to the root logger, which in the server process
+    # writes server.log; forward their records there
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(events)]
+    root.setLevel(logging.INFO)
+    threading.Thread(target=_watch_controls, daemon=True).start()
+
+
+def _report_progress(job_id: str, progress: float, count: int):
+    _events.put(("progress", job_id, progress, count))
+
+
+def _run_in_process(job_id: str, lease_owner: str):
+    SearchWorker(job_id, progress_listener=_report_progress, lease_owner=lease_owner).run()
+
 
 class WorkerPool:
     _instance = None
@@ -20,35 +94,249 @@ class WorkerPool:
     def __init__(self):
         if self._initialized:
             return
-            
-        self.job_queue = queue.Queue()
+
+        # Jobs are queued in SQLite so they survive restarts and can be
+        # claimed by the workers of any server process
+        self.job_queue = get_job_queue()
+        self.owner = new_owner_id()
         self.running = True
         self.workers = []
+        self.mode = WORKER_MODE
+        self._leases: Dict[str, Lease] = {}
+        self._leases_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Latest (progress, result count) of each running job
+        self._progress: Dict[str, Tuple[float, int]] = {}
+        self._progress_lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        if self.mode == PROCESS_MODE:
+            # Spawned, not forked: the server's threads and browser drivers must not be copied
+            self._mp_context = multiprocessing.get_context("spawn")
+            self._events = self._mp_context.Queue()
+            listener = threading.Thread(target=self._event_loop, daemon=True)
+            listener.start()
+            self.workers.append(listener)
+        self.recover()
         self._start_workers()
         self._initialized = True
 
     def _start_workers(self):
-        for _ in range(MAX_WORKERS):
-            t = threading.Thread(target=self._worker_loop, daemon=True)
+        if self.mode == ASYNC_MODE:
+            loops = [self._async_dispatch_loop]
+        else:
+            loops = [self._worker_loop] * MAX_WORKERS
+        for loop in loops + [self._heartbeat_loop, lambda: _watch_controls(lambda: self.running)]:
+            t = threading.Thread(target=loop, daemon=True)
             t.start()
             self.workers.append(t)
 
+    def recover(self):
+        """Requeue jobs left pending or running by a server that stopped or crashed."""
+        stranded = []
+        for job in JobStorage.list_jobs():
+            if job.status not in (JobStatus.PENDING, JobStatus.RUNNING):
+                continue
+            if job.status == JobStatus.RUNNING:
+                if self.job_queue.is_leased(job.id):
+                    # Still running in another server process
+                    continue
+                job.status = JobStatus.PENDING
+                JobStorage.save_job(job)
+            stranded.append(job.id)
+        requeued = self.job_queue.enqueue_missing(stranded)
+        if stranded:
+            print(f"Recovered {len(stranded)} stranded jobs ({len(requeued)} were missing from the queue)")
+
+    def _claim(self) -> Optional[Lease]:
+        """Lease the next job that still needs to run, or None if there is none."""
+        while self.running:
+            lease = self.job_queue.claim(self.owner)
+            if lease is None:
+                return None
+            job = JobStorage.load_job(lease.job_id)
+            if job is None and JobStorage.job_exists(lease.job_id) and lease.attempts <= JOB_MAX_ATTEMPTS:
+                # Unreadable rather than gone; put it back instead of dropping it
+                print(f"Could not read job {lease.job_id}; leaving it queued")
+                self.job_queue.enqueue(lease.job_id)
+                # Try again after the poll interval rather than claiming it straight back
+                return None
+            if job is None or job.status not in (JobStatus.PENDING, JobStatus.RUNNING):
+                # Cancelled while queued, or finished just before its lease expired
+                self.job_queue.complete(lease)
+                continue
+            if lease.attempts > JOB_MAX_ATTEMPTS:
+                # Every worker that took it so far died with it
+                self._fail_job(lease.job_id, f"Abandoned after {lease.attempts - 1} attempts")
+                self.job_queue.complete(lease)
+                continue
+            with self._leases_lock:
+                self._leases[lease.job_id] = lease
+            return lease
+        return None
+
+    def _release(self, lease: Lease):
+        with self._leases_lock:
+            self._leases.pop(lease.job_id, None)
+        self.job_queue.complete(lease)
+        self._clear_progress(lease.job_id)
+
+    def _wait_for_work(self):
+        self._wakeup.wait(JOB_POLL_INTERVAL)
+        self._wakeup.clear()
+
     def _worker_loop(self):
         while self.running:
             try:
-                job_id = self.job_queue.get(timeout=1.0)
-                worker = SearchWorker(job_id)
-                worker.run()
-                self.job_queue.task_done()
-            except queue.Empty:
+                lease = self._claim()
+                if lease is None:
+                    self._wait_for_work()
+                    continue
+                try:
+                    if self.mode == PROCESS_MODE:
+                        self._run_in_process(lease)
+                    else:
+                        SearchWorker(lease.job_id, progress_listener=self._set_progress,
+                                     lease_owner=lease.owner).run()
+                finally:
+                    self._release(lease)
+            except Exception as e:
+                print(f"Worker pool error: {e}")
+                time.sleep(JOB_POLL_INTERVAL)
+
+    def _async_dispatch_loop(self):
+        # Claim only as many jobs as can run, so other servers can take the rest
+        slots = threading.BoundedSemaphore(ASYNC_MAX_JOBS)
+        while self.running:
+            if not slots.acquire(timeout=JOB_POLL_INTERVAL):
                 continue
+            try:
+                lease = self._claim()
             except Exception as e:
                 print(f"Worker pool error: {e}")
+                lease = None
+            if lease is None:
+                slots.release()
+                self._wait_for_work()
+                continue
+            future = AsyncRuntime().submit(lambda lease=lease: self._run_async(lease))
+            future.add_done_callback(lambda _, lease=lease: (self._release(lease), slots.release()))
+
+    def _heartbeat_loop(self):
+        while self.running:
+            time.sleep(JOB_HEARTBEAT_INTERVAL)
+            with self._leases_lock:
+                leases = list(self._leases.values())
+            for lease in leases:
+                try:
+                    if not self.job_queue.heartbeat(lease):
+                        # Another worker may have reclaimed it; two runs would
+                        # write the same results and checkpoint
+                        print(f"Lost the lease on job {lease.job_id}; stopping it here")
+                        with self._leases_lock:
+                            self._leases.pop(lease.job_id, None)
+                        control = get_job_controls().find(lease.job_id)
+                        if control is not None:
+                            control.abandon()
+                except Exception as e:
+                    print(f"Heartbeat failed for job {lease.job_id}: {e}")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=MAX_WORKERS,
+                    mp_context=self._mp_context,
+                    initializer=_init_process,
+                    initargs=(self._events,),
+                    max_tasks_per_child=WORKER_MAX_JOBS_PER_PROCESS,
+                )
+            return self._executor
+
+    def _run_in_process(self, lease: Lease):
+        job_id = lease.job_id
+        executor = self._get_executor()
+        try:
+            # The worker process notices a lost lease through the queue itself
+            executor.submit(_run_in_process, job_id, lease.owner).result()
+        except BrokenProcessPool as e:
+            # A worker process died (out of memory, crashed driver) and took
+            # the whole executor with it; the next job gets a fresh one
+            with self._executor_lock:
+                if self._executor is executor:
+                    self._executor = None
+            self._fail_job(job_id, f"Worker process died: {e}")
+
+    @staticmethod
+    def _fail_job(job_id: str, error: str):
+        job = JobStorage.load_job(job_id)
+        if job and job.status == JobStatus.RUNNING:
+            job.status = JobStatus.FAILED
+            job.error = error
+            job.completed_at = datetime.now()
+            JobStorage.save_job(job)
+
+    def _event_loop(self):
+        """Receive progress updates and log records from worker processes."""
+        while self.running:
+            try:
+                event = self._events.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if isinstance(event, logging.LogRecord):
+                logging.getLogger(event.name).handle(event)
+            elif event[0] == "progress":
+                self._set_progress(*event[1:])
+
+    def _set_progress(self, job_id: str, progress: float, count: int):
+        with self._progress_lock:
+            self._progress[job_id] = (progress, count)
+
+    def _clear_progress(self, job_id: str):
+        with self._progress_lock:
+            self._progress.pop(job_id, None)
+
+    def get_progress(self, job_id: str) -> Optional[Tuple[float, int]]:
+        """Live (progress, result count) of a job running in this pool, or None."""
+        with self._progress_lock:
+            return self._progress.get(job_id)
+
+    async def _run_async(self, lease: Lease):
+        try:
+            runtime = AsyncRuntime()
+            # Loading the job and opening its log touch the disk
+            worker = await runtime.run_blocking(
+                lambda: SearchWorker(lease.job_id, progress_listener=self._set_progress, lease_owner=lease.owner))
+            await worker.run_async(runtime.run_blocking)
+        except Exception as e:
+            print(f"Worker pool error: {e}")
 
     def submit_job(self, job_id: str):
-        self.job_queue.put(job_id)
+        self.job_queue.enqueue(job_id)
+        self._wakeup.set()
+
+    def is_running(self, job_id: str) -> bool:
+        """Whether a worker of any server process holds the job."""
+        return self.job_queue.is_leased(job_id)
+
+    def signal_job(self, job_id: str, signal: str):
+        """Send CANCEL, PAUSE or RESUME to a running job, wherever it runs."""
+        # The queue carries it to other processes; RESUME just clears the last signal
+        self.job_queue.set_control(job_id, None if signal == RESUME else signal)
+        get_job_controls().signal(job_id, signal)
+
+    def cancel_job(self, job_id: str):
+        """Drop a job that has not started, or stop a running one."""
+        if not self.job_queue.remove_unclaimed(job_id):
+            self.signal_job(job_id, CANCEL)
 
     def stop(self):
         self.running = False
         for t in self.workers:
             t.join(timeout=1.0)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.mode == ASYNC_MODE:
+            AsyncRuntime().stop()